@@ -0,0 +1,6 @@
+#!/bin/bash
+# Lets the local replica (postgres_replica in docker-compose.local.yml) stream WAL from this server.
+# Runs once, when the primary's data directory is initialised.
+set -e
+
+echo "host replication all all scram-sha-256" >> "$PGDATA/pg_hba.conf"
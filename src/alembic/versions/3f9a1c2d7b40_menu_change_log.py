@@ -0,0 +1,36 @@
+"""menu change log
+
+Revision ID: 3f9a1c2d7b40
+Revises: b79758753011
+Create Date: 2026-10-18 10:12:41.502318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9a1c2d7b40'
+down_revision: Union[str, Sequence[str], None] = 'b79758753011'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('menu_change',
+    sa.Column('id', sa.BigInteger(), nullable=False),
+    sa.Column('entity', sa.String(length=32), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=False),
+    sa.Column('is_deleted', sa.Boolean(), nullable=False),
+    sa.Column('changed_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    schema='menu'
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('menu_change', schema='menu')
@@ -0,0 +1,123 @@
+"""fk indexes and natural keys
+
+Indexes every foreign key of the menu and orders schemas and adds the unique
+constraints the loaders rely on. Composite unique constraints lead with their
+foreign key column, so they double as its index (food.type_id,
+food_size.parent_id, food_modifier_options.food_id,
+modifier_option.modifier_category_id, menu.food_id).
+
+Plain indexes are built CONCURRENTLY to avoid blocking writes on live tables.
+Duplicate food <-> modifier option links carry no data and are removed here.
+Any other duplicate is referenced by orders or users, so it is not merged
+automatically: the upgrade aborts before touching the schema and lists the
+conflicting rows (key and ids) to resolve by hand first.
+
+Revision ID: 8b2e4d61c9a7
+Revises: 3f9a1c2d7b40
+Create Date: 2026-10-18 11:02:17.114903
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b2e4d61c9a7'
+down_revision: Union[str, Sequence[str], None] = '3f9a1c2d7b40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (index name, table, column, schema)
+fk_indexes = [
+    ('ix_menu_food_modifier_options_modifier_option_id', 'food_modifier_options', 'modifier_option_id', 'menu'),
+    ('ix_orders_orders_user_id', 'orders', 'user_id', 'orders'),
+    ('ix_orders_orders_status_id', 'orders', 'status_id', 'orders'),
+    ('ix_orders_orders_restaurant_id', 'orders', 'restaurant_id', 'orders'),
+    ('ix_orders_orders_food_order_id', 'orders_food', 'order_id', 'orders'),
+    ('ix_orders_orders_food_size_order_id', 'orders_food_size', 'order_id', 'orders'),
+    ('ix_orders_orders_modifier_option_order_id', 'orders_modifier_option', 'order_id', 'orders'),
+]
+
+# (constraint name, table, columns, schema)
+unique_constraints = [
+    ('uq_food_type_name', 'food_type', ['name'], 'menu'),
+    ('uq_food_type_id_name', 'food', ['type_id', 'name'], 'menu'),
+    ('uq_food_size_parent_id_name', 'food_size', ['parent_id', 'name'], 'menu'),
+    ('uq_food_modifier_options_food_id_modifier_option_id', 'food_modifier_options', ['food_id', 'modifier_option_id'], 'menu'),
+    ('uq_modifier_category_name', 'modifier_category', ['name'], 'menu'),
+    ('uq_modifier_option_modifier_category_id_name', 'modifier_option', ['modifier_category_id', 'name'], 'menu'),
+    ('uq_menu_food_id', 'menu', ['food_id'], 'menu'),
+    ('uq_user_email', 'user', ['email'], 'users'),
+]
+
+
+# duplicates listed per constraint when the upgrade aborts
+MAX_REPORTED_DUPLICATES = 20
+
+
+def _duplicate_report() -> list[str]:
+    """One line per group of rows that would violate a unique constraint"""
+    if op.get_context().as_sql:
+        return []  # offline --sql mode has no data to check
+
+    conn = op.get_bind()
+    report = []
+
+    for name, table, columns, schema in unique_constraints:
+        key = ", ".join(f'"{column}"' for column in columns)
+        rows = conn.execute(sa.text(f"""
+            SELECT {key}, array_agg(id ORDER BY id) AS ids
+            FROM "{schema}"."{table}"
+            GROUP BY {key}
+            HAVING count(*) > 1
+            ORDER BY {key}
+            LIMIT {MAX_REPORTED_DUPLICATES + 1}
+        """)).all()
+
+        for row in rows[:MAX_REPORTED_DUPLICATES]:
+            values = ", ".join(f"{column}={value!r}" for column, value in zip(columns, row))
+            report.append(f"  {schema}.{table} ({name}): {values} -> ids {list(row.ids)}")
+        if len(rows) > MAX_REPORTED_DUPLICATES:
+            report.append(f"  {schema}.{table} ({name}): ... more duplicates not shown")
+
+    return report
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(sa.text("""
+        DELETE FROM menu.food_modifier_options a
+        USING menu.food_modifier_options b
+        WHERE a.food_id = b.food_id
+          AND a.modifier_option_id = b.modifier_option_id
+          AND a.id > b.id
+    """))
+
+    duplicates = _duplicate_report()
+    if duplicates:
+        raise RuntimeError(
+            "Cannot add unique constraints, these rows are duplicates. Merge or rename them "
+            "(and repoint the rows referencing the removed ids), then rerun the upgrade:\n"
+            + "\n".join(duplicates)
+        )
+
+    for name, table, columns, schema in unique_constraints:
+        op.create_unique_constraint(name, table, columns, schema=schema)
+
+    with op.get_context().autocommit_block():
+        for name, table, column, schema in fk_indexes:
+            op.create_index(name, table, [column], unique=False, schema=schema,
+                            postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, column, schema in reversed(fk_indexes):
+            op.drop_index(name, table_name=table, schema=schema, postgresql_concurrently=True, if_exists=True)
+
+    for name, table, columns, schema in reversed(unique_constraints):
+        op.drop_constraint(name, table, schema=schema, type_='unique')
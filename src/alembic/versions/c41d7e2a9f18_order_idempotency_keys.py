@@ -0,0 +1,44 @@
+"""order idempotency keys
+
+Revision ID: c41d7e2a9f18
+Revises: 8b2e4d61c9a7
+Create Date: 2026-10-18 14:37:05.228610
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41d7e2a9f18'
+down_revision: Union[str, Sequence[str], None] = '8b2e4d61c9a7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('idempotency_key',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('key', sa.String(length=255), nullable=False),
+    sa.Column('request_hash', sa.String(length=64), nullable=False),
+    sa.Column('order_id', sa.Integer(), nullable=True),
+    sa.Column('response', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['order_id'], ['orders.orders.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.user.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'key', name='uq_idempotency_key_user_id_key'),
+    schema='orders'
+    )
+    op.create_index(op.f('ix_orders_idempotency_key_order_id'), 'idempotency_key', ['order_id'], unique=False, schema='orders')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_orders_idempotency_key_order_id'), table_name='idempotency_key', schema='orders')
+    op.drop_table('idempotency_key', schema='orders')
@@ -0,0 +1,67 @@
+"""order history indexes
+
+Adds orders.created_at and the composite indexes behind keyset-paginated order
+history. Each index leads with its filter column, so the user, restaurant and
+status ones replace the single-column foreign key indexes of 8b2e4d61c9a7.
+Built CONCURRENTLY to avoid blocking order writes.
+
+Revision ID: d7a3f0b6e521
+Revises: c41d7e2a9f18
+Create Date: 2026-10-18 15:20:48.903117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7a3f0b6e521'
+down_revision: Union[str, Sequence[str], None] = 'c41d7e2a9f18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (index name, columns)
+history_indexes = [
+    ('ix_orders_orders_user_id_created_at_id', ['user_id', 'created_at', 'id']),
+    ('ix_orders_orders_restaurant_id_created_at_id', ['restaurant_id', 'created_at', 'id']),
+    ('ix_orders_orders_status_id_created_at_id', ['status_id', 'created_at', 'id']),
+    ('ix_orders_orders_created_at_id', ['created_at', 'id']),
+]
+
+# (index name, column) superseded by the ones above
+fk_indexes = [
+    ('ix_orders_orders_user_id', 'user_id'),
+    ('ix_orders_orders_status_id', 'status_id'),
+    ('ix_orders_orders_restaurant_id', 'restaurant_id'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # existing orders get the migration time
+    op.add_column('orders', sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+                  schema='orders')
+
+    with op.get_context().autocommit_block():
+        for name, columns in history_indexes:
+            op.create_index(name, 'orders', columns, unique=False, schema='orders',
+                            postgresql_concurrently=True, if_not_exists=True)
+
+        for name, _ in fk_indexes:
+            op.drop_index(name, table_name='orders', schema='orders', postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, column in fk_indexes:
+            op.create_index(name, 'orders', [column], unique=False, schema='orders',
+                            postgresql_concurrently=True, if_not_exists=True)
+
+        for name, _ in reversed(history_indexes):
+            op.drop_index(name, table_name='orders', schema='orders', postgresql_concurrently=True, if_exists=True)
+
+    op.drop_column('orders', 'created_at', schema='orders')
@@ -1 +1,9 @@
-from .exceptions import InternalError
\ No newline at end of file
+from .exceptions import InternalError
+from .pg_notify import notify, notify_sync, pg_listener
+from .cache import Snapshot, SnapshotCache, TTLCache
+from .responses import FastJSONResponse, default_response_class
+from .http_cache import cached_json_response
+from .query_counter import QueryCounter
+from .json_stream import JsonStreamReader, iter_json_array
+from .pg_copy import copy_rows, create_staging_table
+from .parallel import map_chunked
\ No newline at end of file
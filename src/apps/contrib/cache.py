@@ -0,0 +1,211 @@
+import asyncio
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Hashable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .pg_notify import notify, pg_listener
+
+
+@dataclass(frozen=True, slots=True)
+class Snapshot:
+    version: int
+    body: bytes
+    etag: str
+    built_at: float
+    expires_at: float | None = None
+
+
+class SnapshotCache:
+    """In-process cache of pre-serialized response bodies.
+
+    Every snapshot is tagged with the cache version it was built for. Write
+    paths commit through ``commit_changes``, which bumps the version and drops
+    all snapshots on this worker and, via NOTIFY on ``<name>_changed``, on every
+    other worker. Rebuilds are single-flight per key: concurrent misses wait for
+    the first caller instead of each querying the database.
+
+    ``max_source_lag`` is how far behind the primary the builder's session may
+    be (a read replica). Snapshots built within that window after an
+    invalidation may predate the write, so they expire at its end instead of
+    living until the next write.
+    """
+
+    def __init__(self, name: str, *, max_source_lag: float = 0.0):
+        self.name = name
+        self.max_source_lag = max_source_lag
+        self.channel = f"{name}_changed"
+        self.version = 0
+        self._snapshots: dict[str, Snapshot] = dict()
+        self._locks: dict[str, asyncio.Lock] = dict()
+
+        self.hits = 0
+        self.misses = 0
+        self.remote_invalidations = 0
+        self.last_invalidated_at: float | None = None
+        # seconds between a write on another worker and this worker dropping its copy
+        self.last_remote_lag: float | None = None
+        self.max_remote_lag: float = 0.0
+
+        pg_listener.subscribe(self.channel, self._on_notify)
+
+    def invalidate(self, *, changed_at: float | None = None) -> int:
+        """Drops all snapshots. ``changed_at`` is set for writes seen through another worker"""
+        self.version += 1
+        self._snapshots.clear()
+        self.last_invalidated_at = time.time()
+
+        if changed_at is not None:
+            lag = max(self.last_invalidated_at - changed_at, 0.0)
+            self.remote_invalidations += 1
+            self.last_remote_lag = lag
+            self.max_remote_lag = max(self.max_remote_lag, lag)
+
+        return self.version
+
+    async def commit_changes(self, *, db_sess: AsyncSession) -> None:
+        """Commits a write to the cached data and invalidates it on every worker"""
+        await notify(db_sess=db_sess, channel=self.channel, payload={"pid": os.getpid(), "changed_at": time.time()})
+        await db_sess.commit()
+        self.invalidate()
+
+    def _on_notify(self, payload: dict[str, Any] | None) -> None:
+        if payload is None:  # listener reconnected, writes may have been missed
+            self.invalidate()
+            return
+
+        if payload.get("pid") == os.getpid():  # already invalidated by commit_changes
+            return
+
+        self.invalidate(changed_at=payload.get("changed_at"))
+
+    def peek(self, key: str) -> Snapshot | None:
+        snapshot = self._snapshots.get(key)
+
+        if snapshot is None or snapshot.version != self.version:
+            return None
+
+        if snapshot.expires_at is not None and time.time() >= snapshot.expires_at:
+            return None
+
+        return snapshot
+
+    async def get(self, key: str, build: Callable[[], Awaitable[bytes]]) -> Snapshot:
+        snapshot = self.peek(key)
+        if snapshot is not None:
+            self.hits += 1
+            return snapshot
+
+        lock = self._locks.setdefault(key, asyncio.Lock())
+
+        async with lock:
+            snapshot = self.peek(key)
+            if snapshot is not None:
+                self.hits += 1  # coalesced behind another rebuild
+                return snapshot
+
+            self.misses += 1
+            version = self.version
+            started_at = time.time()
+            body = await build()
+
+            expires_at = None
+            if self.last_invalidated_at is not None and started_at < self.last_invalidated_at + self.max_source_lag:
+                expires_at = self.last_invalidated_at + self.max_source_lag
+
+            snapshot = Snapshot(
+                version=version,
+                body=body,
+                # content hash, so every worker hands out the same tag for the same body
+                etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"',
+                built_at=time.time(),
+                expires_at=expires_at,
+            )
+
+            # a write committed while we were building: serve it once, don't keep it
+            if version == self.version:
+                self._snapshots[key] = snapshot
+
+            return snapshot
+
+    def stats(self) -> dict[str, Any]:
+        now = time.time()
+        lookups = self.hits + self.misses
+
+        return {
+            "name": self.name,
+            "pid": os.getpid(),
+            "version": self.version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else None,
+            "remote_invalidations": self.remote_invalidations,
+            "last_remote_lag_ms": self.last_remote_lag * 1000 if self.last_remote_lag is not None else None,
+            "max_remote_lag_ms": self.max_remote_lag * 1000,
+            "snapshot_age_s": {key: now - snapshot.built_at for key, snapshot in self._snapshots.items()},
+        }
+
+
+class TTLCache:
+    """Small in-process LRU whose entries also expire ``ttl`` seconds after being set.
+
+    Meant for hot rows read on most requests (e.g. the authenticated user).
+    ``ttl <= 0`` or ``maxsize <= 0`` disables it: every ``get`` misses.
+    """
+
+    def __init__(self, *, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.maxsize > 0
+
+    def get(self, key: Hashable) -> Any | None:
+        entry = self._entries.get(key)
+
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if not self.enabled:
+            return
+
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl_s": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else None,
+        }
@@ -0,0 +1,46 @@
+"""Conditional GET support for cached catalogue endpoints"""
+from typing import Awaitable, Callable
+
+from fastapi import Request, Response
+
+from config import env_int
+
+from .cache import SnapshotCache
+from .responses import FastJSONResponse
+
+
+CACHE_MAX_AGE = env_int("CATALOGUE_CACHE_MAX_AGE", 30)
+CACHE_STALE_WHILE_REVALIDATE = env_int("CATALOGUE_CACHE_STALE_WHILE_REVALIDATE", 60)
+
+
+def cache_control() -> str:
+    return f"public, max-age={CACHE_MAX_AGE}, stale-while-revalidate={CACHE_STALE_WHILE_REVALIDATE}"
+
+
+def etag_matches(req: Request, etag: str) -> bool:
+    """If-None-Match uses weak comparison, so W/ prefixes are ignored"""
+    if_none_match = req.headers.get("if-none-match")
+
+    if not if_none_match:
+        return False
+
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+
+    return False
+
+
+async def cached_json_response(*, req: Request, cache: SnapshotCache, key: str,
+                               build: Callable[[], Awaitable[bytes]]) -> Response:
+    """Serves ``key`` from ``cache``; 304 when the client already holds this version"""
+    snapshot = await cache.get(key, build)
+
+    headers = {"ETag": snapshot.etag, "Cache-Control": cache_control()}
+
+    if etag_matches(req, snapshot.etag):
+        return Response(status_code=304, headers=headers)
+
+    return FastJSONResponse(content=snapshot.body, headers=headers)
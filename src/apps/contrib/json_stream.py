@@ -0,0 +1,147 @@
+import json
+import re
+from typing import Any, Iterator, TextIO
+
+
+_WHITESPACE = " \t\n\r"
+# characters a number may continue with: "1" may become "1.5e-3"
+_NUMBER_TAIL = re.compile(r"[0-9.eE+-]*\Z")
+# a literal, number or escape cut short: nothing but token characters up to the end of the buffer
+_PARTIAL_TOKEN = re.compile(r'[^\s,:\[\]{}"]*\Z')
+
+
+class JsonStreamReader:
+    """Pull parser for JSON documents too big to ``json.load``.
+
+    Objects and arrays are walked lazily with ``keys()`` / ``elements()``; any
+    value can be read whole with ``read()``, which hands it to json's C
+    scanner. Only the value being decoded is buffered, so memory is bounded by
+    the largest value read whole, not by the size of the document. A value the
+    caller leaves unread when the walk moves on is skipped.
+    """
+
+    def __init__(self, fp: TextIO, *, chunk_size: int = 1 << 16):
+        self._fp = fp
+        self._chunk_size = chunk_size
+        self._buf = ""
+        self._pos = 0
+        self._consumed = 0  # characters dropped from the front of _buf
+        self._eof = False
+        self._decoder = json.JSONDecoder()
+
+    @property
+    def offset(self) -> int:
+        return self._consumed + self._pos
+
+    def _fill(self) -> bool:
+        if self._eof:
+            return False
+
+        if self._pos > len(self._buf) // 2:
+            self._consumed += self._pos
+            self._buf, self._pos = self._buf[self._pos:], 0
+
+        # grow geometrically, so a value spanning many chunks is not rescanned once per chunk
+        chunk = self._fp.read(max(self._chunk_size, len(self._buf)))
+        if not chunk:
+            self._eof = True
+            return False
+
+        self._buf += chunk
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character, empty at the end of the document"""
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buf) or not self._fill():
+                return self._buf[self._pos:self._pos + 1]
+
+    def _expect(self, char: str) -> None:
+        if self.peek() != char:
+            raise ValueError(f"Expected {char!r} at offset {self.offset}, got {self.peek()!r}")
+        self._pos += 1
+
+    def read(self) -> Any:
+        """Decodes the next value whole"""
+        self.peek()
+
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError as e:
+                # more input only helps when the error is the end of the buffer, anything else fails right away
+                if self._is_truncated(e) and self._fill():
+                    continue
+                raise
+
+            # a number cut by the chunk boundary decodes fine, but short: "1" of "1.5", "2" of "2e10"
+            if self._is_number(value) and _NUMBER_TAIL.match(self._buf, end) and self._fill():
+                continue
+
+            self._pos = end
+            return value
+
+    def _is_truncated(self, e: json.JSONDecodeError) -> bool:
+        return e.msg.startswith("Unterminated string") or _PARTIAL_TOKEN.match(self._buf, e.pos) is not None
+
+    @staticmethod
+    def _is_number(value: Any) -> bool:
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+    def _skip_unread(self, offset: int) -> None:
+        if self.offset == offset:
+            self.read()
+
+    def keys(self) -> Iterator[str]:
+        """Keys of the next object; the caller reads, walks or ignores each value before the next key"""
+        self._expect("{")
+        first = True
+
+        while True:
+            if self.peek() == "}":
+                self._pos += 1
+                return
+            if not first:
+                self._expect(",")
+            first = False
+
+            key = self.read()
+            self._expect(":")
+
+            offset = self.offset
+            yield key
+            self._skip_unread(offset)
+
+    def elements(self) -> Iterator[int]:
+        """Indexes of the next array's elements; the caller reads, walks or ignores each element"""
+        self._expect("[")
+        index = 0
+
+        while True:
+            if self.peek() == "]":
+                self._pos += 1
+                return
+            if index:
+                self._expect(",")
+
+            offset = self.offset
+            yield index
+            self._skip_unread(offset)
+            index += 1
+
+
+def iter_json_array(fp: TextIO, key: str | None = None) -> Iterator[Any]:
+    """Elements of the top-level array, or of the array under top-level ``key``, decoded one at a time"""
+    reader = JsonStreamReader(fp)
+
+    if key is None:
+        for _ in reader.elements():
+            yield reader.read()
+        return
+
+    for name in reader.keys():
+        if name == key:
+            for _ in reader.elements():
+                yield reader.read()
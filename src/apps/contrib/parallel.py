@@ -0,0 +1,36 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Any, Callable, Iterable, Iterator
+
+
+def _apply(fn: Callable[[Any], Any], chunk: list[Any]) -> list[Any]:
+    return [fn(item) for item in chunk]
+
+
+def map_chunked(fn: Callable[[Any], Any], items: Iterable[Any], *, workers: int = 1,
+                chunk_size: int = 1000) -> Iterator[Any]:
+    """``map(fn, items)`` over a process pool, results in input order.
+
+    ``Executor.map`` and ``Pool.imap`` both drain the input up front; here at
+    most two chunks per worker are in flight, so a lazy input over a huge file
+    stays lazy. ``fn`` is pickled, so it must be a module-level function.
+    """
+    if workers <= 1:
+        yield from map(fn, items)
+        return
+
+    items = iter(items)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+
+        while True:
+            while len(pending) < workers * 2:
+                chunk = list(islice(items, chunk_size))
+                if not chunk:
+                    break
+                pending.append(executor.submit(_apply, fn, chunk))
+
+            if not pending:
+                return
+            yield from pending.popleft().result()
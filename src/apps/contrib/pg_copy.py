@@ -0,0 +1,29 @@
+from typing import Any, Iterable, Sequence
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+
+def create_staging_table(*, db_sess: Session, table: str, columns: str) -> None:
+    """Temp table dropped on commit; unlogged and private to the session, so COPY into it is cheap"""
+    db_sess.execute(text(f"CREATE TEMP TABLE {table} ({columns}) ON COMMIT DROP"))
+
+
+def copy_rows(*, db_sess: Session, table: str, columns: Sequence[str], rows: Iterable[Sequence[Any]]) -> int:
+    """Streams ``rows`` into ``table`` with COPY FROM STDIN in the session's transaction.
+
+    Rows are consumed lazily and sent in chunks by psycopg, so a generator
+    over a file of any size is loaded in constant memory. Returns the row count.
+    """
+    raw_conn = db_sess.connection().connection.driver_connection
+    count = 0
+
+    with raw_conn.cursor() as cursor:
+        with cursor.copy(f"COPY {table} ({', '.join(columns)}) FROM STDIN") as copy:
+            for row in rows:
+                copy.write_row(row)
+                count += 1
+
+    # fresh statistics, or the merge is planned for an empty table
+    db_sess.execute(text(f"ANALYZE {table}"))
+    return count
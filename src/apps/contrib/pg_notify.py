@@ -0,0 +1,112 @@
+import asyncio
+import json
+import logging
+from typing import Any, Callable
+
+import asyncpg
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from config import get_module_logger
+
+
+logger: logging.Logger = get_module_logger(__name__)
+
+# handler(payload) -> None; payload is None when notifications may have been missed
+NotifyHandler = Callable[[dict[str, Any] | None], None]
+
+
+async def notify(*, db_sess: AsyncSession, channel: str, payload: dict[str, Any]) -> None:
+    """Queues NOTIFY in the session's transaction, Postgres delivers it on commit"""
+    await db_sess.execute(
+        text("SELECT pg_notify(:channel, :payload)"),
+        {"channel": channel, "payload": json.dumps(payload)},
+    )
+
+
+def notify_sync(*, db_sess: Session, channel: str, payload: dict[str, Any]) -> None:
+    """``notify`` for the sync sessions of scripts and loaders"""
+    db_sess.execute(
+        text("SELECT pg_notify(:channel, :payload)"),
+        {"channel": channel, "payload": json.dumps(payload)},
+    )
+
+
+class PgNotifyListener:
+    """Per-worker LISTEN connection shared by every channel subscriber.
+
+    Uses its own asyncpg connection so it never holds a slot of the SQLAlchemy
+    pool. When the connection drops, subscribers are called with ``None``
+    (anything could have been missed) and the listener reconnects.
+    """
+
+    reconnect_delay = 1.0
+
+    def __init__(self):
+        self._handlers: dict[str, list[NotifyHandler]] = dict()
+        self._task: asyncio.Task | None = None
+        self.connected = False
+
+    def subscribe(self, channel: str, handler: NotifyHandler) -> None:
+        self._handlers.setdefault(channel, []).append(handler)
+
+    async def start(self, dsn: str) -> None:
+        if self._task is None and self._handlers:
+            self._task = asyncio.create_task(self._run(dsn))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _dispatch(self, channel: str, payload: dict[str, Any] | None) -> None:
+        for handler in self._handlers.get(channel, []):
+            try:
+                handler(payload)
+            except Exception as e:
+                logger.error(f"notify handler for {channel} failed: {e}")
+
+    def _on_notification(self, conn, pid, channel: str, raw_payload: str) -> None:
+        try:
+            payload = json.loads(raw_payload) if raw_payload else dict()
+        except ValueError:
+            payload = dict()
+        self._dispatch(channel, payload)
+
+    async def _run(self, dsn: str) -> None:
+        while True:
+            conn = None
+            try:
+                conn = await asyncpg.connect(dsn)
+                closed = asyncio.Event()
+                conn.add_termination_listener(lambda _: closed.set())
+
+                for channel in self._handlers:
+                    await conn.add_listener(channel, self._on_notification)
+
+                self.connected = True
+                logger.info(f"listening on {', '.join(self._handlers)}")
+                await closed.wait()
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"listen connection failed: {e}")
+            finally:
+                if self.connected:
+                    # the gap between drop and reconnect is unobserved
+                    for channel in self._handlers:
+                        self._dispatch(channel, None)
+                self.connected = False
+                if conn is not None and not conn.is_closed():
+                    await conn.close()
+
+            await asyncio.sleep(self.reconnect_delay)
+
+
+pg_listener = PgNotifyListener()
@@ -0,0 +1,30 @@
+from sqlalchemy import Engine, event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+
+class QueryCounter:
+    """Counts statements sent through an engine. Meant for benchmark and check scripts.
+
+    Usage:
+        with QueryCounter(engine) as counter:
+            ...
+        print(counter.count)
+    """
+
+    def __init__(self, engine: Engine | AsyncEngine):
+        self.engine = engine.sync_engine if isinstance(engine, AsyncEngine) else engine
+        self.statements: list[str] = list()
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __enter__(self) -> "QueryCounter":
+        event.listen(self.engine, "before_cursor_execute", self._before_cursor_execute)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        event.remove(self.engine, "before_cursor_execute", self._before_cursor_execute)
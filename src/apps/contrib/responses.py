@@ -0,0 +1,35 @@
+import os
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # optional, installed with the fast-json extra
+    orjson = None
+
+
+# opt-in: FAST_JSON_RESPONSES=true switches the app's default response class
+FAST_JSON_RESPONSES = os.getenv("FAST_JSON_RESPONSES", "false").lower() == "true"
+
+
+class FastJSONResponse(JSONResponse):
+    """ORJSONResponse-style response that also accepts already-encoded JSON.
+
+    ``bytes`` content (e.g. a pydantic ``dump_json`` result or a cached
+    snapshot) is sent as is, without validation or re-encoding. Everything
+    else is encoded with orjson, or with the stdlib when orjson is missing.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, (bytes, bytearray, memoryview)):
+            return bytes(content)
+
+        if orjson is None:
+            return super().render(content)
+
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+def default_response_class() -> type[JSONResponse]:
+    return FastJSONResponse if FAST_JSON_RESPONSES and orjson is not None else JSONResponse
@@ -0,0 +1,39 @@
+from typing import Iterable
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import db_settings
+from apps.contrib import SnapshotCache
+from .enums import MenuEntity
+from .models import MenuChange
+
+# Public catalogue snapshots (menu and friends). Bumped by every food_menu write path.
+# Built from ReadSessionDep, so snapshots taken right after a write expire once the replica caught up.
+menu_cache = SnapshotCache(name="menu", max_source_lag=db_settings.replica_max_lag)
+
+MENU_SNAPSHOT_KEY = "menu"
+FOOD_TYPES_SNAPSHOT_KEY = "food_types"
+MODIFIER_CATEGORIES_SNAPSHOT_KEY = "modifier_categories"
+MODIFIER_OPTIONS_SNAPSHOT_KEY = "modifier_options"
+MENU_FULL_SYNC_SNAPSHOT_KEY = "menu_changes:0"
+
+# pg_advisory_xact_lock key serializing menu writers
+MENU_CHANGES_LOCK_KEY = 0x6D656E75
+
+
+async def commit_menu_changes(*, db_sess: AsyncSession, entity: MenuEntity, entity_ids: Iterable[int],
+                              is_deleted: bool = False) -> None:
+    """Logs a food_menu write, commits it and invalidates the menu cache on every worker.
+
+    Writers take a transaction-level advisory lock before the change rows get
+    their ids, so versions become visible in id order and a client that saw
+    version N can never miss a change numbered below N.
+    """
+    await db_sess.execute(select(func.pg_advisory_xact_lock(MENU_CHANGES_LOCK_KEY)))
+
+    db_sess.add_all(
+        MenuChange(entity=entity.value, entity_id=entity_id, is_deleted=is_deleted) for entity_id in entity_ids
+    )
+
+    await menu_cache.commit_changes(db_sess=db_sess)
@@ -0,0 +1,13 @@
+from typing import Annotated
+
+from fastapi import Depends
+
+from config import SessionDep
+from .loaders import FoodDetailLoader
+
+
+async def get_food_detail_loader(db_sess: SessionDep) -> FoodDetailLoader:
+    """One loader per request, shared by every dependency and service that asks for it"""
+    return FoodDetailLoader(db_sess=db_sess)
+
+FoodDetailLoaderDep = Annotated[FoodDetailLoader, Depends(get_food_detail_loader)]
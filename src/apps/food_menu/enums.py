@@ -3,4 +3,12 @@ from enum import Enum
 class PriorityName(Enum):
     LOW = "low"
     MEDIUM = "medium"
-    HIGH = "high"
\ No newline at end of file
+    HIGH = "high"
+
+class MenuEntity(Enum):
+    """Kinds of rows tracked by the menu change log, values are the table names"""
+    FOOD = "food"
+    FOOD_TYPE = "food_type"
+    MENU = "menu"
+    MODIFIER_CATEGORY = "modifier_category"
+    MODIFIER_OPTION = "modifier_option"
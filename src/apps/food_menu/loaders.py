@@ -0,0 +1,72 @@
+import asyncio
+from typing import Iterable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .queries import get_food_details_by_food_ids
+from .schemas import ReadSingleFoodSchema
+
+
+class FoodDetailLoader:
+    """Batched, memoized ``ReadSingleFoodSchema`` loader (DataLoader-style).
+
+    ``load`` calls made in the same event-loop tick are collected into one
+    batch that is resolved with the fixed three queries of
+    ``get_food_details_by_food_ids``. Results are memoized for the loader's
+    lifetime, which is one request when obtained through ``FoodDetailLoaderDep``.
+    Missing foods resolve to ``None``. Batches run one after another, since
+    an ``AsyncSession`` cannot run two queries at once.
+    """
+
+    def __init__(self, *, db_sess: AsyncSession):
+        self.db_sess = db_sess
+        self._memo: dict[int, ReadSingleFoodSchema | None] = dict()
+        self._pending: dict[int, asyncio.Future] = dict()
+        self._dispatch_task: asyncio.Task | None = None
+        self._query_lock = asyncio.Lock()
+
+    async def load(self, food_id: int) -> ReadSingleFoodSchema | None:
+        if food_id in self._memo:
+            return self._memo[food_id]
+
+        future = self._pending.get(food_id)
+
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._pending[food_id] = future
+
+            if self._dispatch_task is None:
+                self._dispatch_task = loop.create_task(self._dispatch())
+
+        return await future
+
+    async def load_many(self, food_ids: Iterable[int]) -> dict[int, ReadSingleFoodSchema]:
+        """Details of every existing food among ``food_ids``, in one batch"""
+        food_ids = list(dict.fromkeys(food_ids))
+        details = await asyncio.gather(*(self.load(food_id) for food_id in food_ids))
+
+        return {food_id: detail for food_id, detail in zip(food_ids, details) if detail is not None}
+
+    async def _dispatch(self) -> None:
+        await asyncio.sleep(0)  # let the current tick enqueue the rest of the batch
+
+        batch, self._pending = self._pending, dict()
+        self._dispatch_task = None
+
+        try:
+            # loads arriving while a batch is in flight form the next batch, which waits for this one
+            async with self._query_lock:
+                food_ids = [food_id for food_id in batch if food_id not in self._memo]
+                details = await get_food_details_by_food_ids(db_sess=self.db_sess, food_ids=food_ids) if food_ids else {}
+        except Exception as e:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for food_id, future in batch.items():
+            if food_id not in self._memo:
+                self._memo[food_id] = details.get(food_id)
+            if not future.done():
+                future.set_result(self._memo[food_id])
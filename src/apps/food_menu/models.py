@@ -1,4 +1,6 @@
-from sqlalchemy import ForeignKey
+from datetime import datetime
+
+from sqlalchemy import BigInteger, DateTime, ForeignKey, String, UniqueConstraint, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from config import Base, BaseModelFieldTypes
@@ -13,6 +15,10 @@ class BaseMenuModel(Base):
 
 class Menu(BaseMenuModel):
     __tablename__ = "menu"
+    __table_args__ = (
+        UniqueConstraint("food_id", name="uq_menu_food_id"),
+        {'schema': 'menu'},
+    )
 
     food_id: Mapped[int] = mapped_column(ForeignKey("menu.food.id"))
     priority_level: Mapped[int]  = mapped_column(nullable=True)
@@ -20,6 +26,10 @@ class Menu(BaseMenuModel):
 
 class FoodType(BaseMenuModel):
     __tablename__ = "food_type"
+    __table_args__ = (
+        UniqueConstraint("name", name="uq_food_type_name"),
+        {'schema': 'menu'},
+    )
 
     name: Mapped[BaseModelFieldTypes.str_255]
 
@@ -27,6 +37,10 @@ class FoodType(BaseMenuModel):
 
 class Food(BaseMenuModel):
     __tablename__ = "food"
+    __table_args__ = (
+        UniqueConstraint("type_id", "name", name="uq_food_type_id_name"),  # also serves type_id lookups
+        {'schema': 'menu'},
+    )
 
     name: Mapped[BaseModelFieldTypes.str_255]
     type_id: Mapped[int] = mapped_column(ForeignKey("menu.food_type.id"))
@@ -40,6 +54,10 @@ class Food(BaseMenuModel):
 
 class FoodSize(BaseMenuModel):
     __tablename__ = "food_size"
+    __table_args__ = (
+        UniqueConstraint("parent_id", "name", name="uq_food_size_parent_id_name"),  # also serves parent_id lookups
+        {'schema': 'menu'},
+    )
 
     name: Mapped[BaseModelFieldTypes.str_255]
     parent_id: Mapped[int] = mapped_column(ForeignKey("menu.food.id"))
@@ -53,15 +71,23 @@ class FoodSize(BaseMenuModel):
 
 class FoodModifierOption(BaseMenuModel):
     __tablename__ = "food_modifier_options"
+    __table_args__ = (
+        UniqueConstraint("food_id", "modifier_option_id", name="uq_food_modifier_options_food_id_modifier_option_id"),
+        {'schema': 'menu'},
+    )
 
     food_id: Mapped[int] = mapped_column(ForeignKey("menu.food.id"))
-    modifier_option_id: Mapped[int] = mapped_column(ForeignKey("menu.modifier_option.id"))
+    modifier_option_id: Mapped[int] = mapped_column(ForeignKey("menu.modifier_option.id"), index=True)
     
     food: Mapped["Food"] = relationship(back_populates="modifier_options")
     option: Mapped["ModifierOption"] = relationship(back_populates="food_modifier_option")
 
 class ModifierCategory(BaseMenuModel): # соусы
     __tablename__ = "modifier_category"
+    __table_args__ = (
+        UniqueConstraint("name", name="uq_modifier_category_name"),
+        {'schema': 'menu'},
+    )
     name: Mapped[BaseModelFieldTypes.str_255]
 
     options: Mapped["ModifierOption"] = relationship(back_populates="modifier_category")
@@ -69,6 +95,11 @@ class ModifierCategory(BaseMenuModel): # соусы
 
 class ModifierOption(BaseMenuModel):
     __tablename__ = "modifier_option"
+    __table_args__ = (
+        # also serves modifier_category_id lookups
+        UniqueConstraint("modifier_category_id", "name", name="uq_modifier_option_modifier_category_id_name"),
+        {'schema': 'menu'},
+    )
     name: Mapped[BaseModelFieldTypes.str_255]
     modifier_category_id: Mapped[int] = mapped_column(ForeignKey("menu.modifier_category.id"))
     price: Mapped[float]
@@ -76,3 +107,14 @@ class ModifierOption(BaseMenuModel):
     modifier_category: Mapped["ModifierCategory"] = relationship(back_populates="options")
 
     food_modifier_option: Mapped["FoodModifierOption"] = relationship(back_populates="option")
+
+
+class MenuChange(BaseMenuModel):
+    """Append-only change log; its id is the public menu version"""
+    __tablename__ = "menu_change"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    entity: Mapped[str] = mapped_column(String(32))
+    entity_id: Mapped[int]
+    is_deleted: Mapped[bool] = mapped_column(default=False)
+    changed_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
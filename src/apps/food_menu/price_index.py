@@ -0,0 +1,132 @@
+import asyncio
+import math
+import time
+from array import array
+from typing import Any
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .cache import menu_cache
+from .models import Food, FoodSize, FoodModifierOption, ModifierOption
+
+
+class MenuPrices:
+    """Immutable price and ownership tables of one menu version.
+
+    Ids are serial and dense, so every table is an array indexed by id:
+    ``nan`` marks a missing price, ``-1`` a missing parent. An order priced
+    against one ``MenuPrices`` never sees a half-rebuilt index.
+    """
+
+    __slots__ = ("version", "built_at", "_foods", "_size_prices", "_size_food_ids",
+                 "_option_prices", "_food_option_ids")
+
+    def __init__(self, *, version: int, food_ids: list[int], sizes: list[tuple[int, int, float]],
+                 options: list[tuple[int, float]], food_options: list[tuple[int, int]]):
+        self.version = version
+        self.built_at = time.time()
+
+        self._foods = bytearray(max(food_ids, default=-1) + 1)
+        for food_id in food_ids:
+            self._foods[food_id] = 1
+
+        size_count = max((size_id for size_id, _, _ in sizes), default=-1) + 1
+        self._size_prices = array("d", [math.nan]) * size_count
+        self._size_food_ids = array("q", [-1]) * size_count
+        for size_id, food_id, price in sizes:
+            self._size_prices[size_id] = price
+            self._size_food_ids[size_id] = food_id
+
+        self._option_prices = array("d", [math.nan]) * (max((option_id for option_id, _ in options), default=-1) + 1)
+        for option_id, price in options:
+            self._option_prices[option_id] = price
+
+        food_option_ids: dict[int, set[int]] = dict()
+        for food_id, option_id in food_options:
+            food_option_ids.setdefault(food_id, set()).add(option_id)
+        self._food_option_ids = {food_id: frozenset(ids) for food_id, ids in food_option_ids.items()}
+
+    def has_food(self, food_id: int) -> bool:
+        return 0 <= food_id < len(self._foods) and self._foods[food_id] == 1
+
+    def food_size_price(self, food_size_id: int) -> float | None:
+        if 0 <= food_size_id < len(self._size_prices) and not math.isnan(price := self._size_prices[food_size_id]):
+            return price
+        return None
+
+    def food_size_food_id(self, food_size_id: int) -> int | None:
+        if 0 <= food_size_id < len(self._size_food_ids) and (food_id := self._size_food_ids[food_size_id]) != -1:
+            return food_id
+        return None
+
+    def modifier_option_price(self, modifier_option_id: int) -> float | None:
+        if 0 <= modifier_option_id < len(self._option_prices) \
+                and not math.isnan(price := self._option_prices[modifier_option_id]):
+            return price
+        return None
+
+    def food_modifier_option_ids(self, food_id: int) -> frozenset[int]:
+        return self._food_option_ids.get(food_id, frozenset())
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "version": self.version,
+            "age_s": time.time() - self.built_at,
+            "foods": sum(self._foods),
+            "food_sizes": sum(not math.isnan(price) for price in self._size_prices),
+            "modifier_options": sum(not math.isnan(price) for price in self._option_prices),
+            "bytes": len(self._foods) + self._size_prices.buffer_info()[1] * self._size_prices.itemsize
+                     + self._size_food_ids.buffer_info()[1] * self._size_food_ids.itemsize
+                     + self._option_prices.buffer_info()[1] * self._option_prices.itemsize,
+        }
+
+
+class PriceIndex:
+    """Per-worker ``MenuPrices``, versioned together with ``menu_cache``.
+
+    Every food_menu write (local or seen through NOTIFY) bumps the menu cache
+    version; the next ``get`` rebuilds the tables with four queries. Rebuilds
+    are single-flight, in between pricing needs no database reads.
+    """
+
+    def __init__(self):
+        self._prices: MenuPrices | None = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def prices(self) -> MenuPrices | None:
+        """Current tables, or None when they are missing or outdated"""
+        if self._prices is None or self._prices.version != menu_cache.version:
+            return None
+        return self._prices
+
+    async def get(self, *, db_sess: AsyncSession) -> MenuPrices:
+        prices = self.prices
+        if prices is not None:
+            return prices
+
+        async with self._lock:
+            prices = self.prices
+            if prices is not None:
+                return prices
+
+            version = menu_cache.version
+            prices = MenuPrices(
+                version=version,
+                food_ids=list((await db_sess.execute(select(Food.id))).scalars()),
+                sizes=list((await db_sess.execute(select(FoodSize.id, FoodSize.parent_id, FoodSize.price))).tuples()),
+                options=list((await db_sess.execute(select(ModifierOption.id, ModifierOption.price))).tuples()),
+                food_options=list((await db_sess.execute(
+                    select(FoodModifierOption.food_id, FoodModifierOption.modifier_option_id)
+                )).tuples()),
+            )
+
+            # a write committed while we were reading: use these tables once, rebuild next time
+            if version == menu_cache.version:
+                self._prices = prices
+
+            return prices
+
+
+price_index = PriceIndex()
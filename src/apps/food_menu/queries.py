@@ -0,0 +1,165 @@
+"""Set-based read queries for the food menu.
+
+Food helpers take an arbitrary set of food ids (a list or a ``SELECT`` of ids)
+and answer it with a single statement, grouping the rows into dicts keyed by
+``food.id``. The number of round-trips therefore stays the same no matter how
+many dishes are requested.
+"""
+from sqlalchemy import Select, func, or_, select, union
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .enums import MenuEntity
+from .models import Food, FoodSize, FoodType, FoodModifierOption, ModifierCategory, ModifierOption, Menu, MenuChange
+from .schemas import ReadSingleFoodSchema, ReadSingleFoodSizeSchema, ReadModifierCategoryOptionSchema, \
+    ReadSingleModifierOptionSchema
+
+
+FoodIds = list[int] | Select
+
+
+async def get_menu_food_ids(*, db_sess: AsyncSession) -> list[int]:
+    """Food ids of the menu entries in menu order, each food at most once (``uq_menu_food_id``)"""
+    res = await db_sess.execute(select(Menu.food_id).order_by(Menu.id))
+    return list(res.scalars().all())
+
+
+async def get_food_sizes_by_food_ids(*, db_sess: AsyncSession,
+                                     food_ids: FoodIds) -> dict[int, list[ReadSingleFoodSizeSchema]]:
+    stmt = (
+        select(FoodSize.id, FoodSize.parent_id, FoodSize.name, FoodSize.is_new, FoodSize.price)
+        .where(FoodSize.parent_id.in_(food_ids))
+        .order_by(FoodSize.id)
+    )
+    res = await db_sess.execute(stmt)
+
+    output: dict[int, list[ReadSingleFoodSizeSchema]] = dict()
+
+    for row in res:
+        output.setdefault(row.parent_id, []).append(
+            ReadSingleFoodSizeSchema(id=row.id, name=row.name, is_new=row.is_new, price=row.price)
+        )
+
+    return output
+
+
+async def get_food_modifiers_by_food_ids(*, db_sess: AsyncSession,
+                                         food_ids: FoodIds) -> dict[int, list[ReadModifierCategoryOptionSchema]]:
+    """Modifier options of every food, grouped by modifier category in first-seen order"""
+    stmt = (
+        select(
+            FoodModifierOption.food_id,
+            ModifierOption.id,
+            ModifierOption.name,
+            ModifierOption.price,
+            ModifierCategory.id.label("modifier_cat_id"),
+            ModifierCategory.name.label("modifier_cat_name"),
+        )
+        .join(ModifierOption, ModifierOption.id == FoodModifierOption.modifier_option_id)
+        .join(ModifierCategory, ModifierCategory.id == ModifierOption.modifier_category_id)
+        .where(FoodModifierOption.food_id.in_(food_ids))
+        .order_by(FoodModifierOption.id)
+    )
+    res = await db_sess.execute(stmt)
+
+    # food_id -> modifier_cat_id -> category schema; dicts keep insertion order
+    grouped: dict[int, dict[int, ReadModifierCategoryOptionSchema]] = dict()
+
+    for row in res:
+        food_categories = grouped.setdefault(row.food_id, dict())
+
+        category = food_categories.get(row.modifier_cat_id)
+        if category is None:
+            category = ReadModifierCategoryOptionSchema(
+                modifier_cat_id=row.modifier_cat_id,
+                modifier_cat_name=row.modifier_cat_name,
+                modifier_options=[],
+            )
+            food_categories[row.modifier_cat_id] = category
+
+        category.modifier_options.append(
+            ReadSingleModifierOptionSchema(id=row.id, name=row.name, price=row.price)
+        )
+
+    return {food_id: list(categories.values()) for food_id, categories in grouped.items()}
+
+
+async def get_food_details_by_food_ids(*, db_sess: AsyncSession,
+                                       food_ids: FoodIds) -> dict[int, ReadSingleFoodSchema]:
+    """Builds ``ReadSingleFoodSchema`` for every requested food in three queries"""
+    stmt = (
+        select(Food.id, Food.name, Food.description, Food.type_id, FoodType.name.label("type_name"))
+        .join(FoodType, FoodType.id == Food.type_id)
+        .where(Food.id.in_(food_ids))
+    )
+    res = await db_sess.execute(stmt)
+    foods = res.all()
+
+    if not foods:
+        return dict()
+
+    food_sizes = await get_food_sizes_by_food_ids(db_sess=db_sess, food_ids=food_ids)
+    food_modifiers = await get_food_modifiers_by_food_ids(db_sess=db_sess, food_ids=food_ids)
+
+    return {
+        food.id: ReadSingleFoodSchema(
+            id=food.id,
+            name=food.name,
+            description=food.description,
+            food_type_id=food.type_id,
+            food_type_name=food.type_name,
+            food_sizes=food_sizes.get(food.id, []),
+            food_modifiers=food_modifiers.get(food.id, []),
+        )
+        for food in foods
+    }
+
+
+# ================== Change log ========================
+
+async def get_menu_version_range(*, db_sess: AsyncSession) -> tuple[int, int]:
+    """Oldest retained and current menu version, (0, 0) before the first logged change"""
+    res = await db_sess.execute(
+        select(func.coalesce(func.min(MenuChange.id), 0), func.coalesce(func.max(MenuChange.id), 0))
+    )
+    oldest, current = res.one()
+
+    return oldest, current
+
+
+async def get_latest_menu_changes(*, db_sess: AsyncSession, since: int,
+                                  version: int) -> dict[MenuEntity, dict[int, bool]]:
+    """Latest change of every row in ``(since, version]``: entity -> entity_id -> is_deleted"""
+    stmt = (
+        select(MenuChange.entity, MenuChange.entity_id, MenuChange.is_deleted)
+        .distinct(MenuChange.entity, MenuChange.entity_id)
+        .where(MenuChange.id > since, MenuChange.id <= version)
+        .order_by(MenuChange.entity, MenuChange.entity_id, MenuChange.id.desc())
+    )
+    res = await db_sess.execute(stmt)
+
+    output: dict[MenuEntity, dict[int, bool]] = {entity: dict() for entity in MenuEntity}
+
+    for row in res:
+        output[MenuEntity(row.entity)][row.entity_id] = row.is_deleted
+
+    return output
+
+
+async def get_food_ids_affected_by(*, db_sess: AsyncSession, food_type_ids: list[int],
+                                   modifier_category_ids: list[int], modifier_option_ids: list[int]) -> set[int]:
+    """Foods whose nested payload embeds one of the given types, categories or options"""
+    if not (food_type_ids or modifier_category_ids or modifier_option_ids):
+        return set()
+
+    stmt = union(
+        select(Food.id).where(Food.type_id.in_(food_type_ids)),
+        select(FoodModifierOption.food_id)
+        .join(ModifierOption, ModifierOption.id == FoodModifierOption.modifier_option_id)
+        .where(or_(
+            ModifierOption.id.in_(modifier_option_ids),
+            ModifierOption.modifier_category_id.in_(modifier_category_ids),
+        )),
+    )
+    res = await db_sess.execute(stmt)
+
+    return set(res.scalars().all())
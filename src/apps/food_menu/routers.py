@@ -1,14 +1,23 @@
 from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, Request
 
-from config import SessionDep
+from config import SessionDep, ReadSessionDep
+from apps.contrib import pg_listener, cached_json_response, FastJSONResponse
+from apps.users.depends import admin_role_required
 from sqlalchemy import delete
 
 from .models import Food, FoodType, ModifierCategory, ModifierOption, Menu
+from .enums import MenuEntity
+from .depends import FoodDetailLoaderDep
+from .price_index import price_index
 from .schemas import WriteSingleFoodSchema, WriteModifierCategorySchema, WriteModifierOptionSchema, WriteFoodTypeSchema, WriteSingleMenuSchema
-from .schemas import ReadModifierCategorySchema, ReadFoodTypeSchema, ReadSingleMenuSchema, ReadSingleFoodSchema
-from .service import create_food_service, create_modifier_category_service, create_modifier_option_service, create_food_type_service, create_menu_service
-from .service import get_modifier_category_service, get_modifier_options_service, get_food_type_service, get_menu_service, get_image_url_by_id_service
-from .service import upload_file_by_id_service
+from .schemas import ReadModifierCategorySchema, ReadFoodTypeSchema, ReadSingleMenuSchema, ReadSingleFoodSchema, ReadAllMenu, \
+    ReadModifierCategoryOptionSchema, ReadMenuChangesSchema
+from .service import create_food_service, create_foods_service, create_modifier_category_service, create_modifier_option_service, create_food_type_service, create_menu_service
+from .service import get_image_url_by_id_service
+from .service import upload_file_by_id_service, get_menu_json_service, get_food_type_json_service, \
+    get_modifier_category_json_service, get_modifier_options_json_service, get_menu_changes_json_service
+from .cache import menu_cache, commit_menu_changes, MENU_SNAPSHOT_KEY, FOOD_TYPES_SNAPSHOT_KEY, \
+    MODIFIER_CATEGORIES_SNAPSHOT_KEY, MODIFIER_OPTIONS_SNAPSHOT_KEY, MENU_FULL_SYNC_SNAPSHOT_KEY
 
 common_router = APIRouter(tags=["Food"])
 admin_router = APIRouter(tags=["Food - admin"])
@@ -17,10 +26,16 @@ admin_router = APIRouter(tags=["Food - admin"])
 # =============== Food
 
 @admin_router.post("", status_code=201, response_model=ReadSingleFoodSchema)
-async def create_food(db_sess: SessionDep, food_data: WriteSingleFoodSchema):
-    food = await create_food_service(db_sess=db_sess, food_data=food_data)
+async def create_food(db_sess: SessionDep, food_data: WriteSingleFoodSchema, loader: FoodDetailLoaderDep):
+    food = await create_food_service(db_sess=db_sess, food_data=food_data, loader=loader)
     return food
 
+@admin_router.post("/bulk", status_code=201, response_model=list[ReadSingleFoodSchema], description="Создать несколько блюд",
+                   dependencies=[Depends(admin_role_required)])
+async def create_foods(db_sess: SessionDep, foods_data: list[WriteSingleFoodSchema], loader: FoodDetailLoaderDep):
+    foods = await create_foods_service(db_sess=db_sess, foods_data=foods_data, loader=loader)
+    return foods
+
 @admin_router.post("/{food_id}/upload-image")
 async def upload_food_image(
         food_id:int,
@@ -39,7 +54,7 @@ async def upload_food_image(
 @common_router.get("/{food_id}/image")
 async def get_food_image(
         food_id: int,
-        db_ses: SessionDep,
+        db_ses: ReadSessionDep,
         req: Request
 ):
     path = await get_image_url_by_id_service(db_sess=db_ses, model=Food, id=food_id,
@@ -55,15 +70,15 @@ async def create_food_type(db_sess: SessionDep, food_type_data: WriteFoodTypeSch
     return food_type
 
 @common_router.get("/type", response_model=list[ReadFoodTypeSchema])
-async def get_food_type(db_sess: SessionDep):
-    food_type = await get_food_type_service(db_sess=db_sess)
-    return food_type
+async def get_food_type(db_sess: ReadSessionDep, req: Request):
+    return await cached_json_response(req=req, cache=menu_cache, key=FOOD_TYPES_SNAPSHOT_KEY,
+                                      build=lambda: get_food_type_json_service(db_sess=db_sess))
 
 @admin_router.delete("/type/{food_type_id}", status_code=204)
 async def delete_food_type(food_type_id: int, db_sess: SessionDep):
     stmt = delete(FoodType).where(FoodType.id == food_type_id)
     await db_sess.execute(stmt)
-    await db_sess.commit()
+    await commit_menu_changes(db_sess=db_sess, entity=MenuEntity.FOOD_TYPE, entity_ids=[food_type_id], is_deleted=True)
 
 
 # ============= Modifiers
@@ -75,23 +90,23 @@ async def create_modifier_category(db_sess: SessionDep, modifier_cat_data: Write
 
 
 @common_router.get("/modifiers", response_model=list[ReadModifierCategorySchema])
-async def get_modifier_category(db_sess: SessionDep):
-    modifier_categories = await get_modifier_category_service(db_sess=db_sess)
-    return modifier_categories
+async def get_modifier_category(db_sess: ReadSessionDep, req: Request):
+    return await cached_json_response(req=req, cache=menu_cache, key=MODIFIER_CATEGORIES_SNAPSHOT_KEY,
+                                      build=lambda: get_modifier_category_json_service(db_sess=db_sess))
 
 
 @admin_router.delete("/modifiers/{modifier_cat_id}", status_code=204)
 async def delete_modifier_category(modifier_cat_id: int, db_sess: SessionDep):
     stmt = delete(ModifierCategory).where(ModifierCategory.id == modifier_cat_id)
     await db_sess.execute(stmt)
-    await db_sess.commit()
+    await commit_menu_changes(db_sess=db_sess, entity=MenuEntity.MODIFIER_CATEGORY, entity_ids=[modifier_cat_id], is_deleted=True)
 
 # ============== Modifiers options
 
-@common_router.get("/modifiers/options")
-async def get_modifier_options(db_sess: SessionDep):
-    modifier_options = await get_modifier_options_service(db_sess=db_sess)
-    return modifier_options
+@common_router.get("/modifiers/options", response_model=list[ReadModifierCategoryOptionSchema])
+async def get_modifier_options(db_sess: ReadSessionDep, req: Request):
+    return await cached_json_response(req=req, cache=menu_cache, key=MODIFIER_OPTIONS_SNAPSHOT_KEY,
+                                      build=lambda: get_modifier_options_json_service(db_sess=db_sess))
 
 @admin_router.post("/modifiers/options")
 async def create_modifier_option(db_sess: SessionDep, modifier_option_data: WriteModifierOptionSchema):
@@ -102,7 +117,7 @@ async def create_modifier_option(db_sess: SessionDep, modifier_option_data: Writ
 async def delete_modifier_option(modifier_option_id: int, db_sess: SessionDep):
     stmt = delete(ModifierOption).where(ModifierOption.id == modifier_option_id)
     await db_sess.execute(stmt)
-    await db_sess.commit()
+    await commit_menu_changes(db_sess=db_sess, entity=MenuEntity.MODIFIER_OPTION, entity_ids=[modifier_option_id], is_deleted=True)
 
 
 # ============ Menu
@@ -117,9 +132,31 @@ async def create_menu(db_sess: SessionDep, menu_data: WriteSingleMenuSchema):
 async def delete_menu(menu_id: int, db_sess: SessionDep):
     stmt = delete(Menu).where(Menu.id == menu_id)
     await db_sess.execute(stmt)
-    await db_sess.commit()
-
-@common_router.get("/menu", description="Получить меню")
-async def get_menu(db_sess: SessionDep):
-    resp = await get_menu_service(db_sess=db_sess)
-    return resp
+    await commit_menu_changes(db_sess=db_sess, entity=MenuEntity.MENU, entity_ids=[menu_id], is_deleted=True)
+
+@admin_router.get("/menu/cache-stats", description="Статистика кэша меню текущего воркера",
+                  dependencies=[Depends(admin_role_required)])
+async def get_menu_cache_stats():
+    prices = price_index.prices
+
+    return {
+        **menu_cache.stats(),
+        "listener_connected": pg_listener.connected,
+        "price_index": prices.stats() if prices is not None else None,
+    }
+
+@common_router.get("/menu", description="Получить меню", response_model=list[ReadAllMenu])
+async def get_menu(db_sess: ReadSessionDep, req: Request):
+    return await cached_json_response(req=req, cache=menu_cache, key=MENU_SNAPSHOT_KEY,
+                                      build=lambda: get_menu_json_service(db_sess=db_sess))
+
+@common_router.get("/menu/changes", response_model=ReadMenuChangesSchema,
+                   description="Изменения меню после версии since (0 - полная синхронизация)")
+async def get_menu_changes(db_sess: SessionDep, req: Request, since: int = 0):
+    # stays on the primary: a lagging replica would report an older version than the client holds
+    if since <= 0:  # first launch of every client, worth caching
+        return await cached_json_response(req=req, cache=menu_cache, key=MENU_FULL_SYNC_SNAPSHOT_KEY,
+                                          build=lambda: get_menu_changes_json_service(db_sess=db_sess, since=0))
+
+    changes = await get_menu_changes_json_service(db_sess=db_sess, since=since)
+    return FastJSONResponse(content=changes)
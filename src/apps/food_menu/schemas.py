@@ -91,3 +91,25 @@ class ReadAllMenu(BaseModel):
 
 
 
+
+# =============== Menu delta sync =================
+
+class ReadMenuChangesSchema(BaseModel):
+    """Everything added, changed or deleted after the client's menu version.
+
+    With ``full_resync`` the lists hold the whole current catalogue and the
+    client should replace its copy instead of merging. Food sizes and modifiers
+    travel inside their foods.
+    """
+    version: int
+    full_resync: bool
+    food_types: list[ReadFoodTypeSchema] = []
+    deleted_food_type_ids: list[int] = []
+    foods: list[ReadSingleFoodSchema] = []
+    deleted_food_ids: list[int] = []
+    modifier_categories: list[ReadModifierCategorySchema] = []
+    deleted_modifier_category_ids: list[int] = []
+    modifier_options: list[ReadModifierOptionSchema] = []
+    deleted_modifier_option_ids: list[int] = []
+    menu: list[ReadSingleMenuSchema] = []
+    deleted_menu_ids: list[int] = []
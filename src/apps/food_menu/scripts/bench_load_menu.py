@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark for MenuJsonLoader on a synthetic 10k-dish menu.
+
+Runs the bulk upsert twice: into an empty catalogue (everything is new) and
+again with the same file (everything is diffed away). With --legacy the old
+row-by-row loader runs as well, which takes minutes at this size. Everything
+happens inside an outer transaction that is rolled back at the end, so the
+database is left untouched.
+"""
+
+import json
+import sys
+import tempfile
+import time
+sys.path.append('/app/src')
+
+from sqlalchemy.orm import Session
+
+from apps.contrib import QueryCounter
+from apps.food_menu.scripts.load.load_menu import MenuJsonLoader
+from config import db_settings
+
+
+FOOD_TYPES = 20
+FOODS_PER_TYPE = 500
+SIZES = ("Мини", "Стандарт", "Макси")
+MODIFIER_CATEGORIES = 5
+OPTIONS_PER_CATEGORY = 6
+
+
+def build_menu() -> dict:
+    categories = [
+        {
+            "name": f"bench соусы {c}",
+            "options": [{"name": f"bench соус {c}.{o}", "price": 150.0 + o * 50} for o in range(OPTIONS_PER_CATEGORY)],
+        }
+        for c in range(MODIFIER_CATEGORIES)
+    ]
+
+    return {"food_types": [
+        {
+            "name": f"bench категория {t}",
+            "foods": [
+                {
+                    "name": f"bench шаурма {t}.{f}",
+                    "description": "Фирменная шаурма с курицей, свежими овощами и соусом.",
+                    "priority": t * FOODS_PER_TYPE + f + 1,
+                    "sizes": [{"name": size, "price": 1490.0 + 500 * i, "is_new": False} for i, size in enumerate(SIZES)],
+                    "modifier_categories": categories[f % MODIFIER_CATEGORIES:][:2],
+                }
+                for f in range(FOODS_PER_TYPE)
+            ],
+        }
+        for t in range(FOOD_TYPES)
+    ]}
+
+
+def run(name: str, db_sess: Session, menu_filepath: str, bulk: bool) -> None:
+    loader = MenuJsonLoader(menu_filepath, db_sess=db_sess)
+
+    with QueryCounter(db_settings.sync_engine) as counter:
+        started = time.perf_counter()
+        loader.load(bulk=bulk)
+        elapsed = time.perf_counter() - started
+
+    print(f"  {name:<28} {elapsed:>9.2f} s {counter.count:>10} statements")
+
+
+def bench_load_menu():
+    print(f"📥 MENU LOADER BENCHMARK ({FOOD_TYPES * FOODS_PER_TYPE} dishes, "
+          f"{FOOD_TYPES * FOODS_PER_TYPE * len(SIZES)} sizes)")
+    print("=" * 60)
+
+    with tempfile.NamedTemporaryFile("w", suffix=".json", encoding="utf-8") as menu_file:
+        json.dump(build_menu(), menu_file, ensure_ascii=False)
+        menu_file.flush()
+
+        with db_settings.sync_engine.connect() as conn:
+            conn.begin()
+            try:
+                def session() -> Session:
+                    # loader commits become savepoint releases of the outer transaction
+                    return Session(bind=conn, expire_on_commit=False, join_transaction_mode="create_savepoint")
+
+                run("bulk upsert, new menu", session(), menu_file.name, bulk=True)
+                run("bulk upsert, unchanged menu", session(), menu_file.name, bulk=True)
+
+                if "--legacy" in sys.argv:
+                    run("row by row (legacy)", session(), menu_file.name, bulk=False)
+            finally:
+                conn.rollback()
+
+    print("=" * 60)
+    print("All changes were rolled back.")
+
+
+if __name__ == '__main__':
+    bench_load_menu()
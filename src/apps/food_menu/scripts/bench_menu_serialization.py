@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark for menu serialization: FastAPI's default path vs the pre-encoded paths.
+
+Runs on a synthetic 500-dish ReadAllMenu tree, no database required.
+"""
+
+import json
+import sys
+import time
+sys.path.append('/app/src')
+
+from fastapi.encoders import jsonable_encoder
+
+from apps.contrib.responses import orjson
+from apps.food_menu.schemas import ReadAllMenu, ReadSingleFoodSchema, ReadSingleFoodSizeSchema, \
+    ReadModifierCategoryOptionSchema, ReadSingleModifierOptionSchema
+from apps.food_menu.service import menu_adapter
+
+
+DISHES = 500
+FOOD_TYPES = 10
+REPEATS = 50
+
+
+def build_menu() -> list[ReadAllMenu]:
+    modifiers = [
+        ReadModifierCategoryOptionSchema(
+            modifier_cat_id=cat_id,
+            modifier_cat_name=f"Соусы {cat_id}",
+            modifier_options=[
+                ReadSingleModifierOptionSchema(id=cat_id * 10 + i, name=f"Соус {i}", price=150)
+                for i in range(4)
+            ],
+        )
+        for cat_id in range(2)
+    ]
+
+    menu = [ReadAllMenu(food_type_id=type_id, food_type_name=f"Категория {type_id}", foods=[])
+            for type_id in range(FOOD_TYPES)]
+
+    for food_id in range(DISHES):
+        food_type = menu[food_id % FOOD_TYPES]
+        food_type.foods.append(ReadSingleFoodSchema(
+            id=food_id,
+            name=f"Шаурма {food_id}",
+            description="Фирменная шаурма с курицей, свежими овощами и соусом. " * 2,
+            food_type_id=food_type.food_type_id,
+            food_type_name=food_type.food_type_name,
+            food_sizes=[
+                ReadSingleFoodSizeSchema(id=food_id * 3 + i, name=size, is_new=False, price=1490 + 500 * i)
+                for i, size in enumerate(("Мини", "Стандарт", "Макси"))
+            ],
+            food_modifiers=modifiers,
+        ))
+
+    return menu
+
+
+def fastapi_default(menu):
+    """What FastAPI does for a route without a response class: validate, encode, json.dumps"""
+    content = jsonable_encoder(menu_adapter.validate_python(menu_adapter.dump_python(menu)))
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode()
+
+
+def orjson_response(menu):
+    """FastJSONResponse on a python tree"""
+    return orjson.dumps(menu_adapter.dump_python(menu, mode="json"))
+
+
+def pre_encoded(menu):
+    """get_menu_json_service: pydantic encodes straight to bytes, no re-validation"""
+    return menu_adapter.dump_json(menu)
+
+
+def bench(name, fn, menu, baseline=None):
+    body = fn(menu)
+    started = time.perf_counter()
+    for _ in range(REPEATS):
+        fn(menu)
+    elapsed = (time.perf_counter() - started) / REPEATS * 1000
+
+    speedup = f"{baseline / elapsed:>7.1f}x" if baseline else f"{'-':>8}"
+    print(f"  {name:<28} {elapsed:>9.2f} ms {speedup}  ({len(body) // 1024} KiB)")
+    return elapsed
+
+
+def bench_menu_serialization():
+    print(f"📦 MENU SERIALIZATION BENCHMARK ({DISHES} dishes, {REPEATS} runs each)")
+    print("=" * 60)
+
+    menu = build_menu()
+
+    baseline = bench("jsonable_encoder + json", fastapi_default, menu)
+    if orjson is not None:
+        bench("orjson (FastJSONResponse)", orjson_response, menu, baseline)
+    else:
+        print("  orjson is not installed, skipping (pip install '.[fast-json]')")
+    bench("pydantic dump_json (bytes)", pre_encoded, menu, baseline)
+
+    print("=" * 60)
+    print("Cached snapshots skip all of the above and send the stored bytes.")
+
+
+if __name__ == '__main__':
+    bench_menu_serialization()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Benchmark for GET /food/modifiers/options: query count and latency as options grow.
+
+Synthetic categories and options are inserted inside a transaction that is rolled
+back at the end, so the database is left untouched.
+"""
+
+import asyncio
+import sys
+import time
+sys.path.append('/app/src')
+
+from apps.contrib import QueryCounter
+from apps.food_menu.models import ModifierCategory, ModifierOption
+from apps.food_menu.service import get_modifier_options_service
+from config import db_settings
+
+
+OPTION_COUNTS = (10, 100, 1000, 5000)
+OPTIONS_PER_CATEGORY = 10
+REPEATS = 5
+
+
+async def bench_modifier_options():
+    print("⚙️  MODIFIER OPTIONS BENCHMARK")
+    print("=" * 60)
+    print(f"{'options':>10} {'categories':>12} {'queries':>9} {'avg ms':>10}")
+
+    async with db_settings.session() as db_sess:
+        try:
+            seeded = 0
+
+            for option_count in OPTION_COUNTS:
+                # top up the synthetic catalogue to option_count rows
+                while seeded < option_count:
+                    category = ModifierCategory(name=f"bench category {seeded // OPTIONS_PER_CATEGORY}")
+                    db_sess.add(category)
+                    await db_sess.flush()
+
+                    db_sess.add_all(
+                        ModifierOption(name=f"bench option {seeded + i}", modifier_category_id=category.id, price=100)
+                        for i in range(OPTIONS_PER_CATEGORY)
+                    )
+                    seeded += OPTIONS_PER_CATEGORY
+
+                await db_sess.flush()
+
+                with QueryCounter(db_sess.bind) as counter:
+                    started = time.perf_counter()
+                    for _ in range(REPEATS):
+                        output = await get_modifier_options_service(db_sess=db_sess)
+                    elapsed = (time.perf_counter() - started) / REPEATS
+
+                total_options = sum(len(category.modifier_options) for category in output)
+                print(f"{total_options:>10} {len(output):>12} {counter.count // REPEATS:>9} {elapsed * 1000:>10.2f}")
+
+        finally:
+            await db_sess.rollback()
+
+    print("=" * 60)
+    print("Query count should stay flat while options grow.")
+
+
+if __name__ == '__main__':
+    asyncio.run(bench_modifier_options())
@@ -1,11 +1,30 @@
 #!/usr/bin/env python3
 """
 Script to convert appfood_data.json to menu_data.json format
+
+The dump is parsed incrementally and written as it is converted, so memory
+stays flat for multi-gigabyte dumps. With --workers N products are converted
+in a process pool.
+
+    python convert_data.py [input] [output] [--ndjson] [--workers N]
 """
 
+import argparse
 import json
 import re
-from typing import Dict, Any, List
+import sys
+import time
+from typing import Dict, Any, Iterable, Iterator, Optional, TextIO
+sys.path.append('/app/src')
+
+from apps.contrib.json_stream import JsonStreamReader
+from apps.contrib.parallel import map_chunked
+
+
+PRICE_PATTERN = re.compile(r'\d+')
+
+# top-level key -> (section title key, section items key) of the scraper dump
+DUMP_SECTIONS = {'sections': ('title', 'products')}
 
 
 def extract_price_from_formatted(price_formatted: str) -> float:
@@ -13,10 +32,10 @@ def extract_price_from_formatted(price_formatted: str) -> float:
     if not price_formatted:
         return 0.0
     
-    # Extract numbers from the string
-    numbers = re.findall(r'\d+', price_formatted)
-    if numbers:
-        return float(numbers[0])
+    # Extract the first number from the string
+    match = PRICE_PATTERN.search(price_formatted)
+    if match:
+        return float(match.group())
     return 0.0
 
 
@@ -99,30 +118,118 @@ def convert_appfood_to_menu_data(appfood_data: Dict[str, Any]) -> Dict[str, Any]
     return menu_data
 
 
+def iter_menu_sections(fp: TextIO, formats: Dict[str, tuple[str, str]] = DUMP_SECTIONS
+                       ) -> Iterator[tuple[str, int, str, Optional[Dict[str, Any]]]]:
+    """Stream (top-level key, section index, section title, item) out of a menu document, in file order.
+
+    ``formats`` maps each top-level key to read to the title and items keys of
+    its sections. Every section is announced once with item None, so sections
+    without items are kept. The title has to precede the items, as the scraper
+    and write_menu_json write it.
+    """
+    reader = JsonStreamReader(fp)
+
+    for key in reader.keys():
+        if key not in formats:
+            continue
+        title_key, items_key = formats[key]
+
+        for section_no in reader.elements():
+            title = None
+
+            for section_key in reader.keys():
+                if section_key == title_key:
+                    title = reader.read()
+                    yield key, section_no, title, None
+                elif section_key == items_key:
+                    if title is None:
+                        raise ValueError(f"Section {section_no} has {items_key!r} before its {title_key!r}")
+                    for _ in reader.elements():
+                        yield key, section_no, title, reader.read()
+
+            if title is None:
+                raise ValueError(f"Section {section_no} has no {title_key!r}")
+
+
+def iter_products(fp: TextIO) -> Iterator[tuple[int, str, Optional[Dict[str, Any]]]]:
+    """(section index, section title, product) of a scraper dump, see iter_menu_sections"""
+    for _, section_no, title, product in iter_menu_sections(fp):
+        yield section_no, title, product
+
+
+def convert_item(item: tuple[int, str, Optional[Dict[str, Any]]]) -> tuple[int, str, Optional[Dict[str, Any]]]:
+    """convert_product_to_food for an iter_products item, picklable for the process pool"""
+    section_no, title, product = item
+    return section_no, title, convert_product_to_food(product) if product is not None else None
+
+
+def write_menu_json(out: TextIO, items: Iterable[tuple[int, str, Optional[Dict[str, Any]]]]) -> Dict[str, int]:
+    """Write converted items as menu_data.json, one food per line; returns the counts"""
+    counts = {"food_types": 0, "foods": 0, "modifier_categories": 0}
+    current = None
+    first_food = True
+
+    out.write('{\n  "food_types": [')
+    for section_no, title, food in items:
+        if section_no != current:
+            out.write(']}, ' if current is not None else '')
+            out.write(f'\n    {{"name": {json.dumps(title, ensure_ascii=False)}, "foods": [')
+            current, first_food = section_no, True
+            counts["food_types"] += 1
+
+        if food is None:
+            continue
+
+        out.write(('' if first_food else ',') + '\n      ' + json.dumps(food, ensure_ascii=False))
+        first_food = False
+        counts["foods"] += 1
+        counts["modifier_categories"] += len(food['modifier_categories'])
+
+    out.write(']}' if current is not None else '')
+    out.write('\n  ]\n}\n')
+    return counts
+
+
+def write_menu_ndjson(out: TextIO, items: Iterable[tuple[int, str, Optional[Dict[str, Any]]]]) -> Dict[str, int]:
+    """Write one food per line with its food type under "food_type"; returns the counts"""
+    counts = {"food_types": 0, "foods": 0, "modifier_categories": 0}
+
+    for _, title, food in items:
+        if food is None:
+            counts["food_types"] += 1
+            continue
+
+        out.write(json.dumps({"food_type": title, **food}, ensure_ascii=False) + '\n')
+        counts["foods"] += 1
+        counts["modifier_categories"] += len(food['modifier_categories'])
+
+    return counts
+
+
 def main():
     """Main conversion function"""
-    # Read the original data
-    with open('/app/src/assets/appfood_data.json', 'r', encoding='utf-8') as f:
-        appfood_data = json.load(f)
-    
-    # Convert to new format
-    menu_data = convert_appfood_to_menu_data(appfood_data)
-    
-    # Write the converted data
-    with open('/app/src/assets/menu_data_converted.json', 'w', encoding='utf-8') as f:
-        json.dump(menu_data, f, ensure_ascii=False, indent=2)
-    
+    parser = argparse.ArgumentParser(description="Convert an appfood dump to the menu_data.json format")
+    parser.add_argument('input', nargs='?', default='/app/src/assets/appfood_data.json')
+    parser.add_argument('output', nargs='?', default='/app/src/assets/menu_data_converted.json')
+    parser.add_argument('--ndjson', action='store_true', help="one food per line instead of a JSON document")
+    parser.add_argument('--workers', type=int, default=1, help="processes converting products")
+    parser.add_argument('--chunk-size', type=int, default=1000, help="products per task sent to a worker")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    write = write_menu_ndjson if args.ndjson else write_menu_json
+
+    with open(args.input, 'r', encoding='utf-8') as f, open(args.output, 'w', encoding='utf-8') as out:
+        items = map_chunked(convert_item, iter_products(f), workers=args.workers, chunk_size=args.chunk_size)
+        counts = write(out, items)
+
+    elapsed = time.perf_counter() - started
+
     print("Conversion completed!")
-    print(f"Converted {len(menu_data['food_types'])} food types")
-    
-    total_foods = sum(len(ft['foods']) for ft in menu_data['food_types'])
-    print(f"Total foods: {total_foods}")
-    
-    total_modifier_categories = sum(
-        sum(len(food['modifier_categories']) for food in ft['foods'])
-        for ft in menu_data['food_types']
-    )
-    print(f"Total modifier categories: {total_modifier_categories}")
+    print(f"Converted {counts['food_types']} food types")
+    print(f"Total foods: {counts['foods']}")
+    print(f"Total modifier categories: {counts['modifier_categories']}")
+    print(f"Throughput: {counts['foods'] / max(elapsed, 1e-9):.0f} records/sec ({elapsed:.2f}s)")
 
 
 if __name__ == '__main__':
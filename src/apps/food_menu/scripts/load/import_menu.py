@@ -0,0 +1,244 @@
+import itertools
+import os
+import time
+from typing import Any, Iterator, TextIO
+
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session, sessionmaker
+
+from apps.contrib import copy_rows, create_staging_table, notify_sync
+from apps.food_menu.cache import menu_cache, MENU_CHANGES_LOCK_KEY
+from apps.food_menu.enums import MenuEntity
+from apps.food_menu.scripts.convert_data import convert_product_to_food, iter_menu_sections
+from config import db_settings
+
+
+# top-level key -> (section title key, section items key): the scraper dump and the converted format
+MENU_FORMATS = {
+    "sections": ("title", "products"),
+    "food_types": ("name", "foods"),
+}
+# raw scraper dumps are converted on the fly
+ITEM_CONVERTERS = {
+    "sections": convert_product_to_food,
+}
+
+# one wide staging table, since a connection runs one COPY at a time and the file is read once
+STAGING_TABLE = "menu_import"
+STAGING_COLUMNS = ("kind", "section_no", "ord", "food_name", "category_name", "name",
+                   "description", "price", "is_new", "priority")
+
+MERGE_STATEMENTS = (
+    # food types
+    """
+    WITH written AS (
+        INSERT INTO menu.food_type (name)
+        SELECT name FROM menu_import WHERE kind = 'food_type' GROUP BY name ORDER BY min(ord)
+        ON CONFLICT (name) DO NOTHING
+        RETURNING id
+    )
+    INSERT INTO menu_import_changed SELECT 'food_type', id FROM written
+    """,
+    """
+    CREATE TEMP TABLE menu_import_section ON COMMIT DROP AS
+    SELECT s.section_no, ft.id AS type_id
+    FROM menu_import s JOIN menu.food_type ft ON ft.name = s.name
+    WHERE s.kind = 'food_type'
+    """,
+    # foods, the first occurrence of a (type, name) wins
+    """
+    WITH written AS (
+        INSERT INTO menu.food (type_id, name, description)
+        SELECT DISTINCT ON (s.type_id, f.name) s.type_id, f.name, f.description
+        FROM menu_import f JOIN menu_import_section s USING (section_no)
+        WHERE f.kind = 'food'
+        ORDER BY s.type_id, f.name, f.ord
+        ON CONFLICT (type_id, name) DO UPDATE SET description = EXCLUDED.description
+        WHERE menu.food.description IS DISTINCT FROM EXCLUDED.description
+        RETURNING id
+    )
+    INSERT INTO menu_import_changed SELECT 'food', id FROM written
+    """,
+    """
+    CREATE TEMP TABLE menu_import_food ON COMMIT DROP AS
+    SELECT f.section_no, f.name, food.id AS food_id, f.priority, f.ord
+    FROM menu_import f
+    JOIN menu_import_section s USING (section_no)
+    JOIN menu.food food ON food.type_id = s.type_id AND food.name = f.name
+    WHERE f.kind = 'food'
+    """,
+    "ANALYZE menu_import_food",
+    # menu entries, a missing priority is the position of the food in the file
+    """
+    WITH first AS (
+        SELECT DISTINCT ON (food_id) food_id, priority, ord FROM menu_import_food ORDER BY food_id, ord
+    ), written AS (
+        INSERT INTO menu.menu (food_id, priority_level)
+        SELECT food_id, coalesce(priority, row_number() OVER (ORDER BY ord)) FROM first
+        ON CONFLICT (food_id) DO UPDATE SET priority_level = EXCLUDED.priority_level
+        WHERE menu.menu.priority_level IS DISTINCT FROM EXCLUDED.priority_level
+        RETURNING id
+    )
+    INSERT INTO menu_import_changed SELECT 'menu', id FROM written
+    """,
+    # food sizes, a change shows up as a change of their food
+    """
+    WITH written AS (
+        INSERT INTO menu.food_size (parent_id, name, price, is_new)
+        SELECT DISTINCT ON (f.food_id, z.name) f.food_id, z.name, z.price, z.is_new
+        FROM menu_import z JOIN menu_import_food f ON f.section_no = z.section_no AND f.name = z.food_name
+        WHERE z.kind = 'food_size'
+        ORDER BY f.food_id, z.name, z.ord
+        ON CONFLICT (parent_id, name) DO UPDATE SET price = EXCLUDED.price, is_new = EXCLUDED.is_new
+        WHERE (menu.food_size.price, menu.food_size.is_new) IS DISTINCT FROM (EXCLUDED.price, EXCLUDED.is_new)
+        RETURNING parent_id
+    )
+    INSERT INTO menu_import_changed SELECT 'food', parent_id FROM written
+    """,
+    # modifier categories
+    """
+    WITH written AS (
+        INSERT INTO menu.modifier_category (name)
+        SELECT name FROM menu_import WHERE kind = 'modifier_category' GROUP BY name ORDER BY min(ord)
+        ON CONFLICT (name) DO NOTHING
+        RETURNING id
+    )
+    INSERT INTO menu_import_changed SELECT 'modifier_category', id FROM written
+    """,
+    # modifier options, the first occurrence of a (category, name) wins
+    """
+    WITH written AS (
+        INSERT INTO menu.modifier_option (modifier_category_id, name, price)
+        SELECT DISTINCT ON (c.id, o.name) c.id, o.name, o.price
+        FROM menu_import o JOIN menu.modifier_category c ON c.name = o.category_name
+        WHERE o.kind = 'modifier_option'
+        ORDER BY c.id, o.name, o.ord
+        ON CONFLICT (modifier_category_id, name) DO UPDATE SET price = EXCLUDED.price
+        WHERE menu.modifier_option.price IS DISTINCT FROM EXCLUDED.price
+        RETURNING id
+    )
+    INSERT INTO menu_import_changed SELECT 'modifier_option', id FROM written
+    """,
+    # food <-> modifier option links, a new link shows up as a change of its food
+    """
+    WITH written AS (
+        INSERT INTO menu.food_modifier_options (food_id, modifier_option_id)
+        SELECT DISTINCT f.food_id, mo.id
+        FROM menu_import o
+        JOIN menu_import_food f ON f.section_no = o.section_no AND f.name = o.food_name
+        JOIN menu.modifier_category c ON c.name = o.category_name
+        JOIN menu.modifier_option mo ON mo.modifier_category_id = c.id AND mo.name = o.name
+        WHERE o.kind = 'modifier_option'
+        ON CONFLICT (food_id, modifier_option_id) DO NOTHING
+        RETURNING food_id
+    )
+    INSERT INTO menu_import_changed SELECT 'food', food_id FROM written
+    """,
+)
+
+
+class MenuCopyImporter:
+    """Imports menus of any size: streamed through COPY into a staging table, then merged set-based.
+
+    Accepts the raw scraper dump (``sections`` / ``products``, converted with
+    ``convert_data.py``) as well as the converted ``food_types`` format. Rows
+    are upserted like ``MenuJsonLoader.load(bulk=True)`` does: the first
+    occurrence of a natural key wins, only new or changed rows are written,
+    nothing is deleted. Memory does not grow with the file, the largest
+    product is the most that is held at once.
+    """
+
+    def __init__(self, menu_filepath: str = '/app/src/assets/appfood_data.json', db_sess: Session | None = None):
+        self.menu_filepath = menu_filepath
+
+        if db_sess is None:
+            SessionLocal = sessionmaker(db_settings.sync_engine, expire_on_commit=False)
+            db_sess = SessionLocal()
+        self.db_sess = db_sess
+
+    @staticmethod
+    def _food_rows(section_no: int, food: dict[str, Any], ord_: Iterator[int]) -> Iterator[tuple]:
+        yield ("food", section_no, next(ord_), None, None, food['name'],
+               food['description'], None, None, food.get('priority'))
+
+        for size_data in food['sizes']:
+            yield ("food_size", section_no, next(ord_), food['name'], None, size_data['name'],
+                   None, size_data['price'], size_data['is_new'], None)
+
+        for category_data in food['modifier_categories']:
+            yield ("modifier_category", section_no, next(ord_), None, None, category_data['name'],
+                   None, None, None, None)
+
+            for option_data in category_data['options']:
+                yield ("modifier_option", section_no, next(ord_), food['name'], category_data['name'],
+                       option_data['name'], None, option_data['price'], None, None)
+
+    def _iter_rows(self, fp: TextIO) -> Iterator[tuple]:
+        """Staging rows in file order; ``ord`` keeps that order for the merge"""
+        ord_ = itertools.count(1)
+
+        for key, section_no, title, item in iter_menu_sections(fp, MENU_FORMATS):
+            if item is None:
+                yield ("food_type", section_no, next(ord_), None, None, title, None, None, None, None)
+                continue
+
+            convert = ITEM_CONVERTERS.get(key)
+            yield from self._food_rows(section_no, convert(item) if convert else item, ord_)
+
+    def _merge(self) -> dict[MenuEntity, int]:
+        """Set-based merge of the staging table; returns the number of changed rows per entity"""
+        self.db_sess.execute(text("CREATE TEMP TABLE menu_import_changed (entity text, entity_id integer) ON COMMIT DROP"))
+
+        for statement in MERGE_STATEMENTS:
+            self.db_sess.execute(text(statement))
+
+        # same ordering guarantee as commit_menu_changes: change ids are assigned in commit order
+        self.db_sess.execute(select(func.pg_advisory_xact_lock(MENU_CHANGES_LOCK_KEY)))
+        self.db_sess.execute(text("""
+            INSERT INTO menu.menu_change (entity, entity_id, is_deleted)
+            SELECT DISTINCT entity, entity_id, false FROM menu_import_changed ORDER BY entity, entity_id
+        """))
+
+        changed = {entity: 0 for entity in MenuEntity}
+        for entity, count in self.db_sess.execute(text(
+            "SELECT entity, count(DISTINCT entity_id) FROM menu_import_changed GROUP BY entity"
+        )):
+            changed[MenuEntity(entity)] = count
+
+        if any(changed.values()):
+            notify_sync(db_sess=self.db_sess, channel=menu_cache.channel,
+                        payload={"pid": os.getpid(), "changed_at": time.time()})
+
+        return changed
+
+    def load(self) -> dict[MenuEntity, int]:
+        """Imports the file in one transaction; returns the number of changed rows per entity"""
+        try:
+            print(f"Importing menu from {self.menu_filepath}...")
+            started = time.perf_counter()
+
+            create_staging_table(db_sess=self.db_sess, table=STAGING_TABLE, columns="""
+                kind text NOT NULL, section_no integer NOT NULL, ord bigint NOT NULL,
+                food_name text, category_name text, name text NOT NULL,
+                description text, price double precision, is_new boolean, priority integer
+            """)
+
+            with open(self.menu_filepath, "r", encoding="utf-8") as f:
+                staged = copy_rows(db_sess=self.db_sess, table=STAGING_TABLE, columns=STAGING_COLUMNS,
+                                   rows=self._iter_rows(f))
+            copied = time.perf_counter()
+            print(f"  Staged {staged} rows in {copied - started:.2f}s ({staged / max(copied - started, 1e-9):.0f} rows/s)")
+
+            changed = self._merge()
+            self.db_sess.commit()
+
+            print(f"  Merged in {time.perf_counter() - copied:.2f}s: "
+                  + ", ".join(f"{count} {entity.value}" for entity, count in changed.items()) + " changed")
+            return changed
+
+        except Exception as e:
+            print(f"Error importing menu: {e}")
+            self.db_sess.rollback()
+            raise
+        finally:
+            self.db_sess.close()
@@ -1,21 +1,38 @@
 import json
+import os
+import sys
+import time
 
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session, sessionmaker
 
+from apps.food_menu.cache import menu_cache, MENU_CHANGES_LOCK_KEY
+from apps.food_menu.enums import MenuEntity
 from apps.food_menu.models import (
     FoodType, Food, Menu, FoodModifierOption, 
-    FoodSize, ModifierCategory, ModifierOption
+    FoodSize, ModifierCategory, ModifierOption, MenuChange
 )
+from apps.contrib import notify_sync
 from config import db_settings
 
 
+# rows per INSERT ... ON CONFLICT statement, keeps every statement well below the 65535 bind parameter limit
+BULK_BATCH_SIZE = 1000
+
+# stands in for an (id, value) row that is not in the database yet: its [1:] matches no (value,)
+_MISSING = (None,)
+
+
 class MenuJsonLoader:
-    def __init__(self, menu_filepath: str = '/app/src/assets/menu_data.json'):
+    def __init__(self, menu_filepath: str = '/app/src/assets/menu_data.json', db_sess: Session | None = None):
         with open(menu_filepath, "r", encoding="utf-8") as f:
             self.data = json.load(f)
 
-        SessionLocal = sessionmaker(db_settings.sync_engine, expire_on_commit=False)
-        self.db_sess = SessionLocal()
+        if db_sess is None:
+            SessionLocal = sessionmaker(db_settings.sync_engine, expire_on_commit=False)
+            db_sess = SessionLocal()
+        self.db_sess = db_sess
 
     def _drop_everything(self):
         """Clear all existing data"""
@@ -180,16 +197,198 @@ class MenuJsonLoader:
         self.db_sess.commit()
         print("Food types and foods loaded successfully.")
 
-    def load(self, clear_all=False):
+    def _collect(self) -> dict[str, dict]:
+        """Flattens the JSON into rows keyed by natural key; the first occurrence of a key wins"""
+        rows = {name: dict() for name in ("food_types", "foods", "menu", "sizes", "categories", "options", "links")}
+        priority_counter = 1
+
+        for food_type_data in self.data['food_types']:
+            type_name = food_type_data['name']
+            rows["food_types"].setdefault(type_name, None)
+
+            for food_data in food_type_data['foods']:
+                food_key = (type_name, food_data['name'])
+
+                if food_key not in rows["foods"]:
+                    rows["foods"][food_key] = food_data['description']
+                    rows["menu"][food_key] = food_data.get('priority', priority_counter)
+                    priority_counter += 1
+
+                for size_data in food_data['sizes']:
+                    rows["sizes"].setdefault((*food_key, size_data['name']), (size_data['price'], size_data['is_new']))
+
+                for category_data in food_data['modifier_categories']:
+                    rows["categories"].setdefault(category_data['name'], None)
+
+                    for option_data in category_data['options']:
+                        option_key = (category_data['name'], option_data['name'])
+                        rows["options"].setdefault(option_key, option_data['price'])
+                        rows["links"].setdefault((food_key, option_key), None)
+
+        return rows
+
+    def _upsert(self, model, rows: list[dict], *, index_elements: list[str], update_columns: list[str],
+                returning: tuple = ()) -> list:
+        """INSERT ... ON CONFLICT DO UPDATE in batches; returns the RETURNING rows.
+
+        Updating the key itself when there is nothing else to update still
+        makes Postgres return the row, so ids of rows inserted concurrently
+        are not lost.
+        """
+        out = []
+
+        for start in range(0, len(rows), BULK_BATCH_SIZE):
+            stmt = pg_insert(model).values(rows[start:start + BULK_BATCH_SIZE])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=index_elements,
+                set_={column: stmt.excluded[column] for column in update_columns},
+            )
+            if returning:
+                stmt = stmt.returning(*returning)
+
+            res = self.db_sess.execute(stmt)
+            if returning:
+                out += res.all()
+
+        return out
+
+    def _bulk_upsert(self) -> dict[MenuEntity, set[int]]:
+        """Loads the menu with one prefetch per table and batched upserts, in the caller's transaction.
+
+        Existing rows are diffed in memory, so only new or changed rows are
+        written. Nothing is deleted. Returns the changed ids for the change log.
+        """
+        rows = self._collect()
+        changed: dict[MenuEntity, set[int]] = {entity: set() for entity in MenuEntity}
+
+        # food types
+        type_ids = dict(self.db_sess.execute(select(FoodType.name, FoodType.id)).tuples().all())
+        new_types = [{"name": name} for name in rows["food_types"] if name not in type_ids]
+        for name, id_ in self._upsert(FoodType, new_types, index_elements=["name"], update_columns=["name"],
+                                      returning=(FoodType.name, FoodType.id)):
+            type_ids[name] = id_
+            changed[MenuEntity.FOOD_TYPE].add(id_)
+
+        # foods
+        existing = {(type_id, name): (id_, description) for id_, type_id, name, description
+                    in self.db_sess.execute(select(Food.id, Food.type_id, Food.name, Food.description)).tuples()}
+        food_ids = {key: existing[(type_ids[key[0]], key[1])][0] for key in rows["foods"]
+                    if (type_ids[key[0]], key[1]) in existing}
+        food_rows = [
+            {"type_id": type_ids[type_name], "name": name, "description": description}
+            for (type_name, name), description in rows["foods"].items()
+            if existing.get((type_ids[type_name], name), _MISSING)[1:] != (description,)
+        ]
+        type_names = {id_: name for name, id_ in type_ids.items()}
+        for id_, type_id, name in self._upsert(Food, food_rows, index_elements=["type_id", "name"],
+                                               update_columns=["description"],
+                                               returning=(Food.id, Food.type_id, Food.name)):
+            food_ids[(type_names[type_id], name)] = id_
+            changed[MenuEntity.FOOD].add(id_)
+
+        # menu entries
+        existing = {food_id: (id_, priority) for id_, food_id, priority
+                    in self.db_sess.execute(select(Menu.id, Menu.food_id, Menu.priority_level)).tuples()}
+        menu_rows = [
+            {"food_id": food_ids[key], "priority_level": priority}
+            for key, priority in rows["menu"].items()
+            if existing.get(food_ids[key], _MISSING)[1:] != (priority,)
+        ]
+        for (id_,) in self._upsert(Menu, menu_rows, index_elements=["food_id"], update_columns=["priority_level"],
+                                   returning=(Menu.id,)):
+            changed[MenuEntity.MENU].add(id_)
+
+        # food sizes, a change shows up as a change of their food
+        existing = {(parent_id, name): (price, is_new) for parent_id, name, price, is_new
+                    in self.db_sess.execute(select(FoodSize.parent_id, FoodSize.name, FoodSize.price, FoodSize.is_new)).tuples()}
+        size_rows = [
+            {"parent_id": food_ids[(type_name, food_name)], "name": name, "price": price, "is_new": is_new}
+            for (type_name, food_name, name), (price, is_new) in rows["sizes"].items()
+            if existing.get((food_ids[(type_name, food_name)], name)) != (price, is_new)
+        ]
+        for (parent_id,) in self._upsert(FoodSize, size_rows, index_elements=["parent_id", "name"],
+                                         update_columns=["price", "is_new"], returning=(FoodSize.parent_id,)):
+            changed[MenuEntity.FOOD].add(parent_id)
+
+        # modifier categories
+        category_ids = dict(self.db_sess.execute(select(ModifierCategory.name, ModifierCategory.id)).tuples().all())
+        new_categories = [{"name": name} for name in rows["categories"] if name not in category_ids]
+        for name, id_ in self._upsert(ModifierCategory, new_categories, index_elements=["name"], update_columns=["name"],
+                                      returning=(ModifierCategory.name, ModifierCategory.id)):
+            category_ids[name] = id_
+            changed[MenuEntity.MODIFIER_CATEGORY].add(id_)
+
+        # modifier options
+        existing = {(category_id, name): (id_, price) for id_, category_id, name, price
+                    in self.db_sess.execute(select(ModifierOption.id, ModifierOption.modifier_category_id,
+                                                   ModifierOption.name, ModifierOption.price)).tuples()}
+        option_ids = {key: existing[(category_ids[key[0]], key[1])][0] for key in rows["options"]
+                      if (category_ids[key[0]], key[1]) in existing}
+        option_rows = [
+            {"modifier_category_id": category_ids[category_name], "name": name, "price": price}
+            for (category_name, name), price in rows["options"].items()
+            if existing.get((category_ids[category_name], name), _MISSING)[1:] != (price,)
+        ]
+        category_names = {id_: name for name, id_ in category_ids.items()}
+        for id_, category_id, name in self._upsert(ModifierOption, option_rows,
+                                                   index_elements=["modifier_category_id", "name"],
+                                                   update_columns=["price"],
+                                                   returning=(ModifierOption.id, ModifierOption.modifier_category_id,
+                                                              ModifierOption.name)):
+            option_ids[(category_names[category_id], name)] = id_
+            changed[MenuEntity.MODIFIER_OPTION].add(id_)
+
+        # food <-> modifier option links, a new link shows up as a change of its food
+        existing = set(self.db_sess.execute(
+            select(FoodModifierOption.food_id, FoodModifierOption.modifier_option_id)
+        ).tuples())
+        link_rows = [
+            {"food_id": food_ids[food_key], "modifier_option_id": option_ids[option_key]}
+            for food_key, option_key in rows["links"]
+            if (food_ids[food_key], option_ids[option_key]) not in existing
+        ]
+        for food_id, _ in self._upsert(FoodModifierOption, link_rows, index_elements=["food_id", "modifier_option_id"],
+                                       update_columns=["food_id"],
+                                       returning=(FoodModifierOption.food_id, FoodModifierOption.modifier_option_id)):
+            changed[MenuEntity.FOOD].add(food_id)
+
+        return changed
+
+    def _log_changes(self, changed: dict[MenuEntity, set[int]]) -> None:
+        """Sync counterpart of commit_menu_changes: change log rows and a menu_changed NOTIFY, sent on commit"""
+        if not any(changed.values()):
+            return
+
+        self.db_sess.execute(select(func.pg_advisory_xact_lock(MENU_CHANGES_LOCK_KEY)))
+        self.db_sess.execute(pg_insert(MenuChange), [
+            {"entity": entity.value, "entity_id": entity_id, "is_deleted": False}
+            for entity, entity_ids in changed.items() for entity_id in sorted(entity_ids)
+        ])
+        notify_sync(db_sess=self.db_sess, channel=menu_cache.channel,
+                    payload={"pid": os.getpid(), "changed_at": time.time()})
+
+    def load(self, clear_all=False, bulk=False):
         """Main loading method
         
         Args:
             clear_all (bool): If True, clears all data including modifiers. 
                             If False, preserves existing modifiers.
+            bulk (bool): If True, upserts the menu in one transaction without clearing anything
+                            (clear_all is ignored) and reports the time it took.
         """
         try:
             print("Starting menu data loading...")
-            
+
+            if bulk:
+                started = time.perf_counter()
+                changed = self._bulk_upsert()
+                self._log_changes(changed)
+                self.db_sess.commit()
+
+                print(f"Bulk upsert finished in {time.perf_counter() - started:.2f}s: "
+                      + ", ".join(f"{len(ids)} {entity.value}" for entity, ids in changed.items()) + " changed")
+                return changed
+
             if clear_all:
                 self._drop_everything()
             else:
@@ -208,4 +407,4 @@ class MenuJsonLoader:
 
 if __name__ == '__main__':
     loader = MenuJsonLoader()
-    loader.load()
\ No newline at end of file
+    loader.load(bulk='--bulk' in sys.argv)
\ No newline at end of file
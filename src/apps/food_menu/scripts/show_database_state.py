@@ -1,127 +1,184 @@
 #!/usr/bin/env python3
 """
 Script to show the current state of the database and identify duplicates
+
+Every section is one grouped query, so the number of queries does not grow
+with the catalogue. With --json the state is printed as JSON keyed by names
+instead of ids and sorted by them, to diff two environments:
+
+    diff <(ssh stage python show_database_state.py --json) <(python show_database_state.py --json)
 """
 
+import json
 import sys
-import os
 sys.path.append('/app/src')
 
 from apps.food_menu.models import FoodType, Food, FoodSize, ModifierCategory, ModifierOption, Menu, FoodModifierOption
 from config import db_settings
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy import func
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy import func, select
 
 
-def show_database_state():
-    """Display the current state of the database"""
+def _rows(session: Session, stmt) -> list[dict]:
+    return [dict(row) for row in session.execute(stmt).mappings()]
+
+
+def collect_database_state(session: Session) -> dict[str, list[dict]]:
+    """Every table of the menu schema with its related names and counts, in a constant number of queries"""
+    foods_per_type = select(Food.type_id, func.count().label("foods")).group_by(Food.type_id).subquery()
+    sizes_per_food = select(FoodSize.parent_id, func.count().label("sizes")).group_by(FoodSize.parent_id).subquery()
+    modifiers_per_food = (
+        select(FoodModifierOption.food_id, func.count().label("modifiers"))
+        .group_by(FoodModifierOption.food_id).subquery()
+    )
+    options_per_category = (
+        select(ModifierOption.modifier_category_id, func.count().label("options"))
+        .group_by(ModifierOption.modifier_category_id).subquery()
+    )
+    food_count = func.count(Food.id)
+    option_count = func.count(ModifierOption.id)
+
+    return {
+        "food_types": _rows(session, select(
+            FoodType.id, FoodType.name, func.coalesce(foods_per_type.c.foods, 0).label("foods"),
+        ).outerjoin(foods_per_type, foods_per_type.c.type_id == FoodType.id).order_by(FoodType.id)),
+
+        "foods": _rows(session, select(
+            Food.id, Food.name, FoodType.name.label("food_type"),
+            func.coalesce(sizes_per_food.c.sizes, 0).label("sizes"),
+            func.coalesce(modifiers_per_food.c.modifiers, 0).label("modifiers"),
+        ).join(FoodType, FoodType.id == Food.type_id)
+         .outerjoin(sizes_per_food, sizes_per_food.c.parent_id == Food.id)
+         .outerjoin(modifiers_per_food, modifiers_per_food.c.food_id == Food.id)
+         .order_by(Food.id)),
+
+        "food_sizes": _rows(session, select(
+            FoodSize.id, FoodSize.name, Food.name.label("food"), FoodType.name.label("food_type"),
+            FoodSize.price, FoodSize.is_new,
+        ).join(Food, Food.id == FoodSize.parent_id).join(FoodType, FoodType.id == Food.type_id).order_by(FoodSize.id)),
+
+        "modifier_categories": _rows(session, select(
+            ModifierCategory.id, ModifierCategory.name, func.coalesce(options_per_category.c.options, 0).label("options"),
+        ).outerjoin(options_per_category, options_per_category.c.modifier_category_id == ModifierCategory.id)
+         .order_by(ModifierCategory.id)),
+
+        "modifier_options": _rows(session, select(
+            ModifierOption.id, ModifierOption.name, ModifierCategory.name.label("modifier_category"), ModifierOption.price,
+        ).join(ModifierCategory, ModifierCategory.id == ModifierOption.modifier_category_id).order_by(ModifierOption.id)),
+
+        "menu": _rows(session, select(
+            Menu.food_id, Menu.priority_level, Food.name.label("food"), FoodType.name.label("food_type"),
+        ).join(Food, Food.id == Menu.food_id).join(FoodType, FoodType.id == Food.type_id)
+         .order_by(Menu.priority_level, Menu.id)),
+
+        "duplicate_food_types": _rows(session, select(
+            FoodType.name, func.count(FoodType.id).label("count"),
+        ).group_by(FoodType.name).having(func.count(FoodType.id) > 1).order_by(FoodType.name)),
+
+        "duplicate_foods": _rows(session, select(
+            Food.name, FoodType.name.label("food_type"), food_count.label("count"),
+        ).join(FoodType, FoodType.id == Food.type_id)
+         .group_by(Food.name, FoodType.id, FoodType.name).having(food_count > 1).order_by(FoodType.name, Food.name)),
+
+        "duplicate_modifier_categories": _rows(session, select(
+            ModifierCategory.name, func.count(ModifierCategory.id).label("count"),
+        ).group_by(ModifierCategory.name).having(func.count(ModifierCategory.id) > 1).order_by(ModifierCategory.name)),
+
+        "duplicate_modifier_options": _rows(session, select(
+            ModifierOption.name, ModifierCategory.name.label("modifier_category"), option_count.label("count"),
+        ).join(ModifierCategory, ModifierCategory.id == ModifierOption.modifier_category_id)
+         .group_by(ModifierOption.name, ModifierCategory.id, ModifierCategory.name).having(option_count > 1)
+         .order_by(ModifierCategory.name, ModifierOption.name)),
+    }
+
+
+def to_comparable(state: dict[str, list[dict]]) -> dict:
+    """Drops ids and sorts by names, ids differ between environments holding the same data"""
+    comparable = {
+        section: sorted(
+            ({key: value for key, value in row.items() if key not in ("id", "food_id")} for row in rows),
+            key=lambda row: json.dumps(row, ensure_ascii=False, sort_keys=True),
+        )
+        for section, rows in state.items()
+    }
+    comparable["summary"] = {section: len(state[section]) for section in
+                             ("food_types", "foods", "food_sizes", "modifier_categories", "modifier_options", "menu")}
+    return comparable
+
+
+def print_database_state(state: dict[str, list[dict]]) -> None:
     print("🗄️  DATABASE STATE ANALYSIS")
     print("=" * 60)
-    
+
+    print(f"\n📋 FOOD TYPES ({len(state['food_types'])}):")
+    for ft in state["food_types"]:
+        print(f"  • {ft['name']} (ID: {ft['id']}) - {ft['foods']} foods")
+
+    print(f"\n🍽️  FOODS ({len(state['foods'])}):")
+    for food in state["foods"]:
+        print(f"  • {food['name']} (ID: {food['id']}) - {food['food_type']} - {food['sizes']} sizes, {food['modifiers']} modifiers")
+
+    print(f"\n📏 FOOD SIZES ({len(state['food_sizes'])}):")
+    for size in state["food_sizes"]:
+        print(f"  • {size['name']} (ID: {size['id']}) - {size['food']} - {size['price']}₸")
+
+    print(f"\n🏷️  MODIFIER CATEGORIES ({len(state['modifier_categories'])}):")
+    for category in state["modifier_categories"]:
+        print(f"  • {category['name']} (ID: {category['id']}) - {category['options']} options")
+
+    print(f"\n⚙️  MODIFIER OPTIONS ({len(state['modifier_options'])}):")
+    for option in state["modifier_options"]:
+        print(f"  • {option['name']} (ID: {option['id']}) - {option['modifier_category']} - {option['price']}₸")
+
+    print(f"\n📋 MENU ENTRIES ({len(state['menu'])}):")
+    for menu_entry in state["menu"]:
+        print(f"  • Priority {menu_entry['priority_level']}: {menu_entry['food']} (Food ID: {menu_entry['food_id']})")
+
+    print("\n🔍 DUPLICATE ANALYSIS:")
+    duplicates = (
+        ("duplicate_food_types", "Food Types", None),
+        ("duplicate_foods", "Foods", "food_type"),
+        ("duplicate_modifier_categories", "Modifier Categories", None),
+        ("duplicate_modifier_options", "Modifier Options", "modifier_category"),
+    )
+    for section, title, parent in duplicates:
+        if state[section]:
+            print(f"  ⚠️  Duplicate {title}: {len(state[section])}")
+            for row in state[section]:
+                where = f" in {row[parent]}" if parent else ""
+                print(f"    • {row['name']}{where}: {row['count']} instances")
+        else:
+            print(f"  ✅ No duplicate {title}")
+
+    print("\n" + "=" * 60)
+    print("📊 SUMMARY:")
+    print(f"  • Food Types: {len(state['food_types'])}")
+    print(f"  • Foods: {len(state['foods'])}")
+    print(f"  • Food Sizes: {len(state['food_sizes'])}")
+    print(f"  • Modifier Categories: {len(state['modifier_categories'])}")
+    print(f"  • Modifier Options: {len(state['modifier_options'])}")
+    print(f"  • Menu Entries: {len(state['menu'])}")
+
+
+def show_database_state(as_json: bool = False):
+    """Display the current state of the database"""
     SessionLocal = sessionmaker(db_settings.sync_engine, expire_on_commit=False)
     session = SessionLocal()
-    
+
     try:
-        # Food Types
-        food_types = session.query(FoodType).all()
-        print(f"\n📋 FOOD TYPES ({len(food_types)}):")
-        for ft in food_types:
-            foods_count = session.query(Food).filter(Food.type_id == ft.id).count()
-            print(f"  • {ft.name} (ID: {ft.id}) - {foods_count} foods")
-        
-        # Foods
-        foods = session.query(Food).all()
-        print(f"\n🍽️  FOODS ({len(foods)}):")
-        for food in foods:
-            food_type = session.query(FoodType).filter(FoodType.id == food.type_id).first()
-            sizes_count = session.query(FoodSize).filter(FoodSize.parent_id == food.id).count()
-            modifiers_count = session.query(FoodModifierOption).filter(FoodModifierOption.food_id == food.id).count()
-            print(f"  • {food.name} (ID: {food.id}) - {food_type.name} - {sizes_count} sizes, {modifiers_count} modifiers")
-        
-        # Food Sizes
-        food_sizes = session.query(FoodSize).all()
-        print(f"\n📏 FOOD SIZES ({len(food_sizes)}):")
-        for size in food_sizes:
-            food = session.query(Food).filter(Food.id == size.parent_id).first()
-            print(f"  • {size.name} (ID: {size.id}) - {food.name} - {size.price}₸")
-        
-        # Modifier Categories
-        modifier_categories = session.query(ModifierCategory).all()
-        print(f"\n🏷️  MODIFIER CATEGORIES ({len(modifier_categories)}):")
-        for category in modifier_categories:
-            options_count = session.query(ModifierOption).filter(ModifierOption.modifier_category_id == category.id).count()
-            print(f"  • {category.name} (ID: {category.id}) - {options_count} options")
-        
-        # Modifier Options
-        modifier_options = session.query(ModifierOption).all()
-        print(f"\n⚙️  MODIFIER OPTIONS ({len(modifier_options)}):")
-        for option in modifier_options:
-            category = session.query(ModifierCategory).filter(ModifierCategory.id == option.modifier_category_id).first()
-            print(f"  • {option.name} (ID: {option.id}) - {category.name} - {option.price}₸")
-        
-        # Menu Entries
-        menu_entries = session.query(Menu).order_by(Menu.priority_level).all()
-        print(f"\n📋 MENU ENTRIES ({len(menu_entries)}):")
-        for menu_entry in menu_entries:
-            food = session.query(Food).filter(Food.id == menu_entry.food_id).first()
-            print(f"  • Priority {menu_entry.priority_level}: {food.name} (Food ID: {menu_entry.food_id})")
-        
-        # Check for duplicates
-        print(f"\n🔍 DUPLICATE ANALYSIS:")
-        
-        # Check for duplicate food types
-        duplicate_food_types = session.query(FoodType.name, func.count(FoodType.id)).group_by(FoodType.name).having(func.count(FoodType.id) > 1).all()
-        if duplicate_food_types:
-            print(f"  ⚠️  Duplicate Food Types: {len(duplicate_food_types)}")
-            for name, count in duplicate_food_types:
-                print(f"    • {name}: {count} instances")
-        else:
-            print("  ✅ No duplicate Food Types")
-        
-        # Check for duplicate foods within same type
-        duplicate_foods = session.query(Food.name, Food.type_id, func.count(Food.id)).group_by(Food.name, Food.type_id).having(func.count(Food.id) > 1).all()
-        if duplicate_foods:
-            print(f"  ⚠️  Duplicate Foods: {len(duplicate_foods)}")
-            for name, type_id, count in duplicate_foods:
-                food_type = session.query(FoodType).filter(FoodType.id == type_id).first()
-                print(f"    • {name} in {food_type.name}: {count} instances")
-        else:
-            print("  ✅ No duplicate Foods")
-        
-        # Check for duplicate modifier categories
-        duplicate_categories = session.query(ModifierCategory.name, func.count(ModifierCategory.id)).group_by(ModifierCategory.name).having(func.count(ModifierCategory.id) > 1).all()
-        if duplicate_categories:
-            print(f"  ⚠️  Duplicate Modifier Categories: {len(duplicate_categories)}")
-            for name, count in duplicate_categories:
-                print(f"    • {name}: {count} instances")
-        else:
-            print("  ✅ No duplicate Modifier Categories")
-        
-        # Check for duplicate modifier options within same category
-        duplicate_options = session.query(ModifierOption.name, ModifierOption.modifier_category_id, func.count(ModifierOption.id)).group_by(ModifierOption.name, ModifierOption.modifier_category_id).having(func.count(ModifierOption.id) > 1).all()
-        if duplicate_options:
-            print(f"  ⚠️  Duplicate Modifier Options: {len(duplicate_options)}")
-            for name, category_id, count in duplicate_options:
-                category = session.query(ModifierCategory).filter(ModifierCategory.id == category_id).first()
-                print(f"    • {name} in {category.name}: {count} instances")
+        state = collect_database_state(session)
+
+        if as_json:
+            print(json.dumps(to_comparable(state), ensure_ascii=False, indent=2))
         else:
-            print("  ✅ No duplicate Modifier Options")
-        
-        print(f"\n" + "=" * 60)
-        print(f"📊 SUMMARY:")
-        print(f"  • Food Types: {len(food_types)}")
-        print(f"  • Foods: {len(foods)}")
-        print(f"  • Food Sizes: {len(food_sizes)}")
-        print(f"  • Modifier Categories: {len(modifier_categories)}")
-        print(f"  • Modifier Options: {len(modifier_options)}")
-        print(f"  • Menu Entries: {len(menu_entries)}")
-        
+            print_database_state(state)
+
     except Exception as e:
-        print(f"❌ Error analyzing database: {e}")
+        print(f"❌ Error analyzing database: {e}", file=sys.stderr if as_json else sys.stdout)
         raise
     finally:
         session.close()
 
 
 if __name__ == '__main__':
-    show_database_state()
+    show_database_state(as_json='--json' in sys.argv)
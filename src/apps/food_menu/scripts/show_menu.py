@@ -1,85 +1,131 @@
 #!/usr/bin/env python3
 """
 Script to display the menu in priority order
+
+The whole menu is read with four queries whatever its size. With --json it
+is printed as JSON (without ids, which differ between environments) to diff
+two databases.
 """
 
+import json
 import sys
-import os
+from collections import defaultdict
 sys.path.append('/app/src')
 
-from apps.food_menu.models import Menu, Food, FoodType, FoodSize, ModifierCategory, ModifierOption
+from apps.food_menu.models import Menu, Food, FoodType, FoodSize, ModifierCategory, ModifierOption, FoodModifierOption
 from config import db_settings
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy import select
 
 
-def show_menu():
-    """Display the menu in priority order"""
+def collect_menu(session: Session) -> list[dict]:
+    """Menu entries in priority order with their sizes and modifier categories"""
+    entries = session.execute(
+        select(Menu.food_id, Menu.priority_level, Food.name, Food.description, FoodType.name.label("food_type"))
+        .join(Food, Food.id == Menu.food_id)
+        .join(FoodType, FoodType.id == Food.type_id)
+        .order_by(Menu.priority_level, Menu.id)
+    ).mappings().all()
+
+    sizes = defaultdict(list)
+    for parent_id, name, price, is_new in session.execute(
+        select(FoodSize.parent_id, FoodSize.name, FoodSize.price, FoodSize.is_new)
+        .join(Menu, Menu.food_id == FoodSize.parent_id)
+        .order_by(FoodSize.parent_id, FoodSize.id)
+    ):
+        sizes[parent_id].append({"name": name, "price": price, "is_new": is_new})
+
+    # a food offers every option of each category it has at least one option of
+    category_ids = defaultdict(list)
+    for food_id, category_id in session.execute(
+        select(FoodModifierOption.food_id, ModifierOption.modifier_category_id)
+        .join(ModifierOption, ModifierOption.id == FoodModifierOption.modifier_option_id)
+        .join(Menu, Menu.food_id == FoodModifierOption.food_id)
+        .distinct()
+        .order_by(FoodModifierOption.food_id, ModifierOption.modifier_category_id)
+    ):
+        category_ids[food_id].append(category_id)
+
+    categories = {}
+    for category_id, category_name, name, price in session.execute(
+        select(ModifierCategory.id, ModifierCategory.name, ModifierOption.name, ModifierOption.price)
+        .join(ModifierOption, ModifierOption.modifier_category_id == ModifierCategory.id)
+        .order_by(ModifierCategory.id, ModifierOption.id)
+    ):
+        categories.setdefault(category_id, {"name": category_name, "options": []})
+        categories[category_id]["options"].append({"name": name, "price": price})
+
+    return [
+        {
+            "food_type": entry["food_type"],
+            "name": entry["name"],
+            "description": entry["description"],
+            "priority_level": entry["priority_level"],
+            "sizes": sizes[entry["food_id"]],
+            "modifier_categories": [categories[category_id] for category_id in category_ids[entry["food_id"]]],
+        }
+        for entry in entries
+    ]
+
+
+def print_menu(menu: list[dict]) -> None:
     print("🍽️  APPETIT MENU")
     print("=" * 50)
-    
+
+    current_food_type = None
+
+    for food in menu:
+        # Print food type header if it's new
+        if current_food_type != food["food_type"]:
+            current_food_type = food["food_type"]
+            print(f"\n📋 {current_food_type.upper()}")
+            print("-" * 30)
+
+        # Print food item
+        print(f"\n🍽️  {food['name']}")
+        print(f"   📝 {food['description']}")
+
+        # Print sizes and prices
+        if food["sizes"]:
+            print("   📏 Размеры:")
+            for size in food["sizes"]:
+                new_badge = " 🆕" if size["is_new"] else ""
+                print(f"      • {size['name']}: {size['price']}₸{new_badge}")
+
+        # Print modifier categories
+        if food["modifier_categories"]:
+            print("   🧂 Дополнительно:")
+            for category in food["modifier_categories"]:
+                print(f"      📌 {category['name']}:")
+                for option in category["options"]:
+                    price_text = f" +{option['price']}₸" if option["price"] > 0 else " (бесплатно)"
+                    print(f"         • {option['name']}{price_text}")
+
+        print(f"   🏷️  Приоритет: {food['priority_level']}")
+
+    print("\n" + "=" * 50)
+    print(f"📊 Всего блюд в меню: {len(menu)}")
+
+
+def show_menu(as_json: bool = False):
+    """Display the menu in priority order"""
     SessionLocal = sessionmaker(db_settings.sync_engine, expire_on_commit=False)
     session = SessionLocal()
-    
+
     try:
-        # Get menu entries ordered by priority
-        menu_entries = session.query(Menu).order_by(Menu.priority_level).all()
-        
-        current_food_type = None
-        
-        for menu_entry in menu_entries:
-            # Get food and food type
-            food = session.query(Food).filter(Food.id == menu_entry.food_id).first()
-            food_type = session.query(FoodType).filter(FoodType.id == food.type_id).first()
-            
-            # Print food type header if it's new
-            if current_food_type != food_type.name:
-                current_food_type = food_type.name
-                print(f"\n📋 {food_type.name.upper()}")
-                print("-" * 30)
-            
-            # Print food item
-            print(f"\n🍽️  {food.name}")
-            print(f"   📝 {food.description}")
-            
-            # Print sizes and prices
-            sizes = session.query(FoodSize).filter(FoodSize.parent_id == food.id).all()
-            if sizes:
-                print("   📏 Размеры:")
-                for size in sizes:
-                    new_badge = " 🆕" if size.is_new else ""
-                    print(f"      • {size.name}: {size.price}₸{new_badge}")
-            
-            # Print modifier categories
-            modifier_categories = session.query(ModifierCategory).join(
-                ModifierOption, ModifierCategory.id == ModifierOption.modifier_category_id
-            ).join(
-                FoodModifierOption, ModifierOption.id == FoodModifierOption.modifier_option_id
-            ).filter(
-                FoodModifierOption.food_id == food.id
-            ).distinct().all()
-            
-            if modifier_categories:
-                print("   🧂 Дополнительно:")
-                for category in modifier_categories:
-                    print(f"      📌 {category.name}:")
-                    options = session.query(ModifierOption).filter(
-                        ModifierOption.modifier_category_id == category.id
-                    ).all()
-                    for option in options:
-                        price_text = f" +{option.price}₸" if option.price > 0 else " (бесплатно)"
-                        print(f"         • {option.name}{price_text}")
-            
-            print(f"   🏷️  Приоритет: {menu_entry.priority_level}")
-        
-        print("\n" + "=" * 50)
-        print(f"📊 Всего блюд в меню: {len(menu_entries)}")
-        
+        menu = collect_menu(session)
+
+        if as_json:
+            print(json.dumps(menu, ensure_ascii=False, indent=2))
+        else:
+            print_menu(menu)
+
     except Exception as e:
-        print(f"❌ Error displaying menu: {e}")
+        print(f"❌ Error displaying menu: {e}", file=sys.stderr if as_json else sys.stdout)
         raise
     finally:
         session.close()
 
 
 if __name__ == '__main__':
-    show_menu()
+    show_menu(as_json='--json' in sys.argv)
@@ -3,151 +3,90 @@ import os
 import shutil
 
 from fastapi import HTTPException, UploadFile
+from pydantic import TypeAdapter
 from typing import Any
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
 from config import get_module_logger, UPLOAD_DIR
 from apps.contrib import InternalError
 from .schemas import WriteSingleFoodSchema, WriteModifierCategorySchema, ReadModifierCategoryOptionSchema, \
     ReadSingleModifierOptionSchema, WriteModifierOptionSchema, WriteFoodTypeSchema, WriteSingleMenuSchema, \
-    ReadSingleFoodSchema, ReadSingleFoodSizeSchema, ReadAllMenu
+    ReadSingleFoodSchema, ReadAllMenu, ReadFoodTypeSchema, ReadModifierCategorySchema, \
+    ReadModifierOptionSchema, ReadSingleMenuSchema, ReadMenuChangesSchema
 from .models import Food, FoodSize, FoodType, FoodModifierOption, ModifierCategory, ModifierOption, Menu
+from .queries import get_food_details_by_food_ids, get_menu_food_ids, get_menu_version_range, \
+    get_latest_menu_changes, get_food_ids_affected_by
+from .loaders import FoodDetailLoader
+from .cache import commit_menu_changes
+from .enums import MenuEntity
 
 
 logger: logging.Logger = get_module_logger(__name__)
 
-
-async def _create(*, db_sess: AsyncSession, model_dump_data: dict[str, Any], model: Any) -> Any:
-    new_obj = model(**model_dump_data)
-
-    db_sess.add(new_obj)
-    await db_sess.commit()
-    await db_sess.flush()
-
-    return new_obj
-
-async def _get_food_detail_by_food_id(*, db_sess: AsyncSession, food_id: int) -> ReadSingleFoodSchema:
-
-    try:
-
-
-        food = await db_sess.execute(select(Food).where(Food.id == food_id))
-        food = food.scalars().one_or_none()
-
-        food_sizes = await db_sess.execute(
-            select(FoodSize).where(FoodSize.parent_id == food.id)
-        )
-
-        food_sizes = food_sizes.scalars().all()
-
-        food_sizes = [ReadSingleFoodSizeSchema(
-            id=food_size.id,
-            name=food_size.name,
-            is_new=food_size.is_new,
-            price=food_size.price
-        ) for food_size in food_sizes]
-
-        food_modifier_options = await db_sess.execute(
-            select(FoodModifierOption)
-            .where(FoodModifierOption.food_id == food.id)
-            .options(selectinload(FoodModifierOption.option).selectinload(ModifierOption.modifier_category))
-        )
-
-        food_modifier_options = food_modifier_options.scalars().all()
-
-        output_food_modifiers = list()
-
-        for food_modifier_option in food_modifier_options:
-            modifier_option = ReadSingleModifierOptionSchema(
-                id=food_modifier_option.option.id,
-                name=food_modifier_option.option.name,
-                price=food_modifier_option.option.price
-
-            )
-
-            if food_modifier_option.option.modifier_category_id not in [item["modifier_cat_id"] for item in output_food_modifiers]:
-                output_food_modifiers.append(
-                    {
-                        "modifier_cat_id": food_modifier_option.option.modifier_category_id,
-                        "modifier_cat_name": food_modifier_option.option.modifier_category.name,
-                        "modifier_options": [modifier_option]
-                    }
-                )
-            else:
-
-                output_food_modifier_item = next((_ for _ in output_food_modifiers if _["modifier_cat_id"]  == food_modifier_option.option.modifier_category_id), None)
-
-                assert output_food_modifier_item
-
-                output_food_modifier_item["modifier_options"].append(
-                    modifier_option
-                )
-
-        resp = ReadSingleFoodSchema(
-            id=food_id,
-            name=food.name,
-            description=food.description,
-            food_sizes=food_sizes,
-            food_modifiers=output_food_modifiers,
-            food_type_id=food.food_type.id,
-            food_type_name=food.food_type.name,
-        )
-
-        return resp
-
-    except Exception as e:
-        raise InternalError(e, module_name=__name__)
-
-
-
-
-async def create_food_service(*, db_sess: AsyncSession, food_data: WriteSingleFoodSchema):
+menu_adapter = TypeAdapter(list[ReadAllMenu])
+menu_changes_adapter = TypeAdapter(ReadMenuChangesSchema)
+food_type_adapter = TypeAdapter(list[ReadFoodTypeSchema])
+modifier_category_adapter = TypeAdapter(list[ReadModifierCategorySchema])
+modifier_options_adapter = TypeAdapter(list[ReadModifierCategoryOptionSchema])
 
 
+async def create_foods_service(*, db_sess: AsyncSession, foods_data: list[WriteSingleFoodSchema],
+                               loader: FoodDetailLoader | None = None) -> list[ReadSingleFoodSchema]:
     try:
-        new_food_obj = Food(**food_data.model_dump(exclude=['possible_food_modifiers', 'food_sizes']))
-        db_sess.add(new_food_obj)
+        new_food_objs = [
+            Food(**food_data.model_dump(exclude=['possible_food_modifiers', 'food_sizes']))
+            for food_data in foods_data
+        ]
+        db_sess.add_all(new_food_objs)
         await db_sess.flush()
 
-        for food_size_data in food_data.food_sizes:
-            new_food_size_obj = FoodSize(
-                name=food_size_data.name,
-                parent_id=new_food_obj.id,
-                is_new=food_size_data.is_new,
-                price=food_size_data.price
+        for new_food_obj, food_data in zip(new_food_objs, foods_data):
+            db_sess.add_all(
+                FoodSize(
+                    name=food_size_data.name,
+                    parent_id=new_food_obj.id,
+                    is_new=food_size_data.is_new,
+                    price=food_size_data.price
+                ) for food_size_data in food_data.food_sizes
             )
 
-            db_sess.add(new_food_size_obj)
-
-
-        for food_modifier_id in food_data.possible_food_modifiers:
-            new_food_modifier_option_obj = FoodModifierOption(
-                food_id=new_food_obj.id,
-                modifier_option_id=food_modifier_id
+            db_sess.add_all(
+                FoodModifierOption(
+                    food_id=new_food_obj.id,
+                    modifier_option_id=food_modifier_id
+                ) for food_modifier_id in food_data.possible_food_modifiers
             )
 
-            db_sess.add(new_food_modifier_option_obj)
-
         await db_sess.flush()
 
-        resp = await _get_food_detail_by_food_id(db_sess=db_sess, food_id=new_food_obj.id)
+        loader = loader or FoodDetailLoader(db_sess=db_sess)
+        food_details = await loader.load_many(new_food_obj.id for new_food_obj in new_food_objs)
+
+        await commit_menu_changes(db_sess=db_sess, entity=MenuEntity.FOOD,
+                                  entity_ids=[new_food_obj.id for new_food_obj in new_food_objs])
 
-        return resp
+        return [food_details[new_food_obj.id] for new_food_obj in new_food_objs]
 
     except Exception as e:
         raise InternalError(e, module_name=__name__)
 
 
+async def create_food_service(*, db_sess: AsyncSession, food_data: WriteSingleFoodSchema,
+                              loader: FoodDetailLoader | None = None) -> ReadSingleFoodSchema:
+    foods = await create_foods_service(db_sess=db_sess, foods_data=[food_data], loader=loader)
+    return foods[0]
+
+
 
 async def create_modifier_category_service(*, db_sess: AsyncSession, modifier_cat_data: WriteModifierCategorySchema):
     try:
         modifier_category = ModifierCategory(**modifier_cat_data.model_dump())
 
         db_sess.add(modifier_category)
-        await db_sess.commit()
+        await db_sess.flush()
+        await commit_menu_changes(db_sess=db_sess, entity=MenuEntity.MODIFIER_CATEGORY, entity_ids=[modifier_category.id])
 
         return modifier_category
 
@@ -165,57 +104,62 @@ async def get_modifier_category_service(*, db_sess: AsyncSession):
     except Exception as e:
         raise InternalError(e, module_name=__name__)
 
-async def get_modifier_options_service(*, db_sess: AsyncSession):
-
-    modifier_cats = set()
-
-    output: list[ReadModifierCategoryOptionSchema] = list()
+async def get_modifier_category_json_service(*, db_sess: AsyncSession) -> bytes:
+    modifier_categories = await get_modifier_category_service(db_sess=db_sess)
+    return modifier_category_adapter.dump_json(
+        modifier_category_adapter.validate_python(modifier_categories, from_attributes=True)
+    )
 
+async def get_modifier_options_service(*, db_sess: AsyncSession) -> list[ReadModifierCategoryOptionSchema]:
     try:
-        stmt = select(ModifierOption)
+        stmt = (
+            select(
+                ModifierOption.id,
+                ModifierOption.name,
+                ModifierOption.price,
+                ModifierCategory.id.label("modifier_cat_id"),
+                ModifierCategory.name.label("modifier_cat_name"),
+            )
+            .join(ModifierCategory, ModifierCategory.id == ModifierOption.modifier_category_id)
+            .order_by(ModifierOption.id)
+        )
         res = await db_sess.execute(stmt)
-        modifier_options = res.scalars().all()
-        if len(modifier_options) > 0:
-
-            for modifier_option in modifier_options:
 
-                if modifier_option.modifier_category_id not in modifier_cats:
-                    res = await db_sess.execute(select(ModifierCategory).where(ModifierCategory.id == modifier_option.modifier_category_id))
-                    modifier_cat = res.scalars().one_or_none()
+        output: dict[int, ReadModifierCategoryOptionSchema] = dict()
 
-                    modifier_cats.add(modifier_cat)
-                    output.append(
-                        ReadModifierCategoryOptionSchema(
-                            modifier_cat_id=modifier_cat.id,
-                            modifier_cat_name=modifier_cat.name,
-                        )
-                    )
+        for row in res:
+            modifier_cat = output.get(row.modifier_cat_id)
 
-                for _ in output:
-                    if _.modifier_cat_id == modifier_option.modifier_category_id:
-                        _.modifier_options.append(
-                            ReadSingleModifierOptionSchema(
-                                id=modifier_option.id,
-                                name=modifier_option.name,
-                                price=modifier_option.price
-                            )
-                        )
+            if modifier_cat is None:
+                modifier_cat = ReadModifierCategoryOptionSchema(
+                    modifier_cat_id=row.modifier_cat_id,
+                    modifier_cat_name=row.modifier_cat_name,
+                    modifier_options=[],
+                )
+                output[row.modifier_cat_id] = modifier_cat
 
+            modifier_cat.modifier_options.append(
+                ReadSingleModifierOptionSchema(id=row.id, name=row.name, price=row.price)
+            )
 
-        return output
+        return list(output.values())
 
     except Exception as e:
         raise InternalError(e, module_name=__name__)
 
+async def get_modifier_options_json_service(*, db_sess: AsyncSession) -> bytes:
+    modifier_options = await get_modifier_options_service(db_sess=db_sess)
+    return modifier_options_adapter.dump_json(modifier_options)
+
 async def create_modifier_option_service(*, db_sess: AsyncSession, modifier_option_data: WriteModifierOptionSchema):
     try:
         modifier_option = ModifierOption(**modifier_option_data.model_dump())
 
         db_sess.add(modifier_option)
-
-        await db_sess.commit()
         await db_sess.flush()
 
+        await commit_menu_changes(db_sess=db_sess, entity=MenuEntity.MODIFIER_OPTION, entity_ids=[modifier_option.id])
+
         return modifier_option
 
     except Exception as e:
@@ -224,7 +168,12 @@ async def create_modifier_option_service(*, db_sess: AsyncSession, modifier_opti
 
 async def create_food_type_service(*, db_sess: AsyncSession, food_type_data: WriteFoodTypeSchema):
     try:
-        food_type = await _create(db_sess=db_sess, model_dump_data=food_type_data.model_dump(), model=FoodType)
+        food_type = FoodType(**food_type_data.model_dump())
+
+        db_sess.add(food_type)
+        await db_sess.flush()
+        await commit_menu_changes(db_sess=db_sess, entity=MenuEntity.FOOD_TYPE, entity_ids=[food_type.id])
+
         return food_type
 
     except Exception as e:
@@ -243,56 +192,140 @@ async def get_food_type_service(*, db_sess: AsyncSession):
     except Exception as e:
         raise InternalError(e, module_name=__name__)
 
+async def get_food_type_json_service(*, db_sess: AsyncSession) -> bytes:
+    food_types = await get_food_type_service(db_sess=db_sess)
+    return food_type_adapter.dump_json(food_type_adapter.validate_python(food_types, from_attributes=True))
+
 async def create_menu_service(*, db_sess: AsyncSession, menu_data: WriteSingleMenuSchema):
     try:
         menu = Menu(**menu_data.model_dump())
 
         db_sess.add(menu)
-        await db_sess.commit()
-
         await db_sess.flush()
 
+        await commit_menu_changes(db_sess=db_sess, entity=MenuEntity.MENU, entity_ids=[menu.id])
+
         return menu
     except Exception as e:
         raise InternalError(e, module_name=__name__)
 
 
-async def get_menu_service(*, db_sess: AsyncSession):
+async def get_menu_service(*, db_sess: AsyncSession, loader: FoodDetailLoader | None = None):
     try:
-        menu = await db_sess.execute(select(Menu))
-        menu = menu.scalars().all()
+        menu_food_ids = await get_menu_food_ids(db_sess=db_sess)
+
+        loader = loader or FoodDetailLoader(db_sess=db_sess)
+        food_details = await loader.load_many(menu_food_ids)
 
-        output = list()
+        output: dict[int, ReadAllMenu] = dict()
 
-        for _menu in menu:
-            food_id = _menu.food_id
+        for food_id in menu_food_ids:
+            food_detail = food_details.get(food_id)
 
-            food_detail = await _get_food_detail_by_food_id(db_sess=db_sess, food_id=food_id)
+            if food_detail is None:  # food deleted under the menu entry
+                continue
 
-            if food_detail.food_type_id not in [item["food_type_id"] for item in output]:
-                output.append(
-                    {
-                        "food_type_id": food_detail.food_type_id,
-                        "food_type_name": food_detail.food_type_name,
-                        "foods": [food_detail]
-                    }
+            output_item = output.get(food_detail.food_type_id)
+
+            if output_item is None:
+                output_item = ReadAllMenu(
+                    food_type_id=food_detail.food_type_id,
+                    food_type_name=food_detail.food_type_name,
+                    foods=[]
                 )
-            else:
+                output[food_detail.food_type_id] = output_item
+
+            output_item.foods.append(food_detail)
+
+        return list(output.values())
+
+    except Exception as e:
+        raise InternalError(e, module_name=__name__)
 
-                output_item = next((_ for _ in output if _["food_type_id"]  == food_detail.food_type_id), None)
-                output_item["foods"].append(food_detail)
+async def get_menu_json_service(*, db_sess: AsyncSession) -> bytes:
+    """Menu serialized to JSON bytes, ready to be cached and served as is"""
+    menu = await get_menu_service(db_sess=db_sess)
+    return menu_adapter.dump_json(menu)
 
-        output = [ReadAllMenu(
-            food_type_name=item["food_type_name"],
-            food_type_id=item["food_type_id"],
-            foods=item["foods"]
-            ) for item in output]
+async def _get_changed_rows(*, db_sess: AsyncSession, model: Any, ids: list[int] | None) -> list[Any]:
+    """All rows when ``ids`` is None (full resync), otherwise the rows that still exist"""
+    if ids is not None and not ids:
+        return []
 
-        return output
+    stmt = select(model).order_by(model.id)
+    if ids is not None:
+        stmt = stmt.where(model.id.in_(ids))
+
+    res = await db_sess.execute(stmt)
+    return list(res.scalars().all())
+
+async def get_menu_changes_service(*, db_sess: AsyncSession, since: int) -> ReadMenuChangesSchema:
+    try:
+        oldest, version = await get_menu_version_range(db_sess=db_sess)
+
+        # unknown or pruned history: hand out the whole catalogue instead of a delta
+        full_resync = since <= 0 or since > version or since < oldest - 1
+
+        if full_resync:
+            upserted: dict[MenuEntity, list[int] | None] = {entity: None for entity in MenuEntity}
+            deleted: dict[MenuEntity, set[int]] = {entity: set() for entity in MenuEntity}
+        else:
+            changes = await get_latest_menu_changes(db_sess=db_sess, since=since, version=version)
+            upserted = {entity: [_id for _id, is_deleted in rows.items() if not is_deleted]
+                        for entity, rows in changes.items()}
+            deleted = {entity: {_id for _id, is_deleted in rows.items() if is_deleted}
+                       for entity, rows in changes.items()}
+
+        def _validate(schema, entity, rows):
+            ids = upserted[entity]
+            if ids is not None:  # logged as changed but gone by now
+                deleted[entity].update(set(ids) - {row.id for row in rows})
+            return [schema.model_validate(row, from_attributes=True) for row in rows]
+
+        food_types = _validate(ReadFoodTypeSchema, MenuEntity.FOOD_TYPE, await _get_changed_rows(
+            db_sess=db_sess, model=FoodType, ids=upserted[MenuEntity.FOOD_TYPE]))
+        modifier_categories = _validate(ReadModifierCategorySchema, MenuEntity.MODIFIER_CATEGORY, await _get_changed_rows(
+            db_sess=db_sess, model=ModifierCategory, ids=upserted[MenuEntity.MODIFIER_CATEGORY]))
+        modifier_options = _validate(ReadModifierOptionSchema, MenuEntity.MODIFIER_OPTION, await _get_changed_rows(
+            db_sess=db_sess, model=ModifierOption, ids=upserted[MenuEntity.MODIFIER_OPTION]))
+        menu = _validate(ReadSingleMenuSchema, MenuEntity.MENU, await _get_changed_rows(
+            db_sess=db_sess, model=Menu, ids=upserted[MenuEntity.MENU]))
+
+        if full_resync:
+            foods = await get_food_details_by_food_ids(db_sess=db_sess, food_ids=select(Food.id))
+        else:
+            # foods embed type, category and option names, so those changes resend the food too
+            food_ids = set(upserted[MenuEntity.FOOD]) | await get_food_ids_affected_by(
+                db_sess=db_sess,
+                food_type_ids=upserted[MenuEntity.FOOD_TYPE],
+                modifier_category_ids=upserted[MenuEntity.MODIFIER_CATEGORY],
+                modifier_option_ids=upserted[MenuEntity.MODIFIER_OPTION],
+            )
+            foods = await get_food_details_by_food_ids(db_sess=db_sess, food_ids=list(food_ids)) if food_ids else dict()
+            deleted[MenuEntity.FOOD].update(set(upserted[MenuEntity.FOOD]) - foods.keys())
+
+        return ReadMenuChangesSchema(
+            version=version,
+            full_resync=full_resync,
+            food_types=food_types,
+            deleted_food_type_ids=sorted(deleted[MenuEntity.FOOD_TYPE]),
+            foods=[foods[food_id] for food_id in sorted(foods)],
+            deleted_food_ids=sorted(deleted[MenuEntity.FOOD]),
+            modifier_categories=modifier_categories,
+            deleted_modifier_category_ids=sorted(deleted[MenuEntity.MODIFIER_CATEGORY]),
+            modifier_options=modifier_options,
+            deleted_modifier_option_ids=sorted(deleted[MenuEntity.MODIFIER_OPTION]),
+            menu=menu,
+            deleted_menu_ids=sorted(deleted[MenuEntity.MENU]),
+        )
 
     except Exception as e:
         raise InternalError(e, module_name=__name__)
 
+async def get_menu_changes_json_service(*, db_sess: AsyncSession, since: int) -> bytes:
+    changes = await get_menu_changes_service(db_sess=db_sess, since=since)
+    return menu_changes_adapter.dump_json(changes)
+
 async def upload_file_by_id_service(*, db_sess: AsyncSession, model: Any, id: int, ext: str,
                                     upload_file: UploadFile, filepath_prefix: str,
                                     model_filepath_attr_name: str):
@@ -316,7 +349,7 @@ async def upload_file_by_id_service(*, db_sess: AsyncSession, model: Any, id: in
 
     setattr(model_obj, model_filepath_attr_name, filename)
 
-    await db_sess.commit()
+    await commit_menu_changes(db_sess=db_sess, entity=MenuEntity(model.__tablename__), entity_ids=[model_obj.id])
     await db_sess.refresh(model_obj)
 
     return {"id": model_obj.id, "image_url": getattr(model_obj, model_filepath_attr_name)}
@@ -0,0 +1,17 @@
+from enum import Enum
+
+class OrderStatusName(Enum):
+    """Statuses seeded by scripts/load/load_order_status.py"""
+    PENDING = "pending"
+    COOKING = "cooking"
+    DELIVERY = "delivery"
+    FINISHED = "finished"
+
+
+# allowed next statuses of an order
+ORDER_STATUS_TRANSITIONS: dict[OrderStatusName, frozenset[OrderStatusName]] = {
+    OrderStatusName.PENDING: frozenset({OrderStatusName.COOKING}),
+    OrderStatusName.COOKING: frozenset({OrderStatusName.DELIVERY}),
+    OrderStatusName.DELIVERY: frozenset({OrderStatusName.FINISHED}),
+    OrderStatusName.FINISHED: frozenset(),
+}
\ No newline at end of file
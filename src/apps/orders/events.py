@@ -0,0 +1,92 @@
+import asyncio
+import json
+from collections import defaultdict
+from typing import Any, AsyncIterator
+
+from fastapi import Request
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from apps.contrib import notify, pg_listener
+from config import env_float
+
+
+ORDER_EVENTS_CHANNEL = "order_status"
+SSE_HEARTBEAT_INTERVAL = env_float("ORDER_EVENTS_HEARTBEAT_INTERVAL", 15)
+SSE_QUEUE_SIZE = 64
+
+# sent when the worker's LISTEN connection dropped: events may be lost, clients should refetch
+RESYNC_FRAME = b"event: resync\ndata: {}\n\n"
+HEARTBEAT_FRAME = b": ping\n\n"
+
+
+async def publish_order_status(*, db_sess: AsyncSession, order_id: int, user_id: int,
+                               restaurant_id: int, status: str) -> None:
+    """Queues an order status event in the session's transaction, delivered to every worker on commit"""
+    await notify(db_sess=db_sess, channel=ORDER_EVENTS_CHANNEL, payload={
+        "order_id": order_id, "user_id": user_id, "restaurant_id": restaurant_id, "status": status,
+    })
+
+
+class OrderEventHub:
+    """Per-worker fan-out of order status events to open SSE streams.
+
+    The worker's single LISTEN connection feeds ``_on_notify``; each event is
+    encoded once and handed to the subscribers of its user and of its
+    restaurant, so idle streams cost a queue each and nothing per event of
+    other users. A slow client drops its oldest frames instead of growing
+    memory without bound.
+    """
+
+    def __init__(self):
+        self._users: dict[int, set[asyncio.Queue]] = defaultdict(set)
+        self._restaurants: dict[int, set[asyncio.Queue]] = defaultdict(set)
+
+        pg_listener.subscribe(ORDER_EVENTS_CHANNEL, self._on_notify)
+
+    @property
+    def subscriber_count(self) -> int:
+        return sum(map(len, self._users.values())) + sum(map(len, self._restaurants.values()))
+
+    @staticmethod
+    def _put(queue: asyncio.Queue, frame: bytes) -> None:
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(frame)
+
+    def _on_notify(self, payload: dict[str, Any] | None) -> None:
+        if payload is None:
+            for queues in (*self._users.values(), *self._restaurants.values()):
+                for queue in queues:
+                    self._put(queue, RESYNC_FRAME)
+            return
+
+        frame = f"event: order_status\ndata: {json.dumps(payload)}\n\n".encode()
+
+        for queue in self._users.get(payload.get("user_id"), ()):
+            self._put(queue, frame)
+        for queue in self._restaurants.get(payload.get("restaurant_id"), ()):
+            self._put(queue, frame)
+
+    async def stream(self, *, req: Request, user_id: int | None = None,
+                     restaurant_id: int | None = None) -> AsyncIterator[bytes]:
+        """SSE frames for one user's orders or one restaurant's kitchen feed, until the client leaves"""
+        subscribers, key = (self._users, user_id) if user_id is not None else (self._restaurants, restaurant_id)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SSE_QUEUE_SIZE)
+        subscribers[key].add(queue)
+
+        try:
+            yield b"retry: 3000\n\n"
+
+            while not await req.is_disconnected():
+                try:
+                    yield await asyncio.wait_for(queue.get(), timeout=SSE_HEARTBEAT_INTERVAL)
+                except asyncio.TimeoutError:
+                    yield HEARTBEAT_FRAME  # keeps proxies from closing idle streams
+
+        finally:
+            subscribers[key].discard(queue)
+            if not subscribers[key]:
+                del subscribers[key]
+
+
+order_event_hub = OrderEventHub()
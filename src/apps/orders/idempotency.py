@@ -0,0 +1,74 @@
+import hashlib
+from datetime import timedelta
+from typing import Any
+
+from fastapi import HTTPException
+from pydantic import BaseModel
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import env_int
+from .models import OrderIdempotencyKey
+
+
+IDEMPOTENCY_KEY_TTL = timedelta(seconds=env_int("ORDER_IDEMPOTENCY_KEY_TTL", 24 * 60 * 60))
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+
+def request_hash(data: BaseModel) -> str:
+    return hashlib.sha256(data.model_dump_json().encode()).hexdigest()
+
+
+async def claim_idempotency_key(*, db_sess: AsyncSession, user_id: int, key: str,
+                                data: BaseModel) -> dict[str, Any] | None:
+    """Claims ``key`` for this request in the current transaction.
+
+    Returns None when the caller owns the key and must do the work, or the
+    stored response of the first request to replay. A concurrent duplicate
+    blocks on the claimer's uncommitted row until it commits (then it replays)
+    or rolls back (then it claims the key itself), so only one does the work.
+    """
+    if not key or len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+        raise HTTPException(status_code=400, detail=f"Idempotency-Key must be 1-{IDEMPOTENCY_KEY_MAX_LENGTH} characters")
+
+    hashed = request_hash(data)
+    expired_before = func.now() - IDEMPOTENCY_KEY_TTL
+
+    # keeps the table bounded without a cleanup job
+    await db_sess.execute(
+        delete(OrderIdempotencyKey)
+        .where(OrderIdempotencyKey.user_id == user_id, OrderIdempotencyKey.key != key,
+               OrderIdempotencyKey.created_at < expired_before)
+    )
+
+    stmt = insert(OrderIdempotencyKey).values(user_id=user_id, key=key, request_hash=hashed)
+    stmt = stmt.on_conflict_do_update(
+        constraint="uq_idempotency_key_user_id_key",
+        # an expired key is reused as if it were new
+        set_={"request_hash": hashed, "order_id": None, "response": None, "created_at": func.now()},
+        where=OrderIdempotencyKey.created_at < expired_before,
+    ).returning(OrderIdempotencyKey.id)
+
+    if (await db_sess.execute(stmt)).scalar_one_or_none() is not None:
+        return None
+
+    stored_hash, response = (await db_sess.execute(
+        select(OrderIdempotencyKey.request_hash, OrderIdempotencyKey.response)
+        .where(OrderIdempotencyKey.user_id == user_id, OrderIdempotencyKey.key == key)
+    )).one()
+
+    if stored_hash != hashed:
+        raise HTTPException(status_code=422, detail="Idempotency-Key was already used with another request body")
+
+    return response
+
+
+async def store_idempotent_response(*, db_sess: AsyncSession, user_id: int, key: str,
+                                    order_id: int, response: BaseModel) -> None:
+    """Saves the response next to the claim; committed together with the order"""
+    await db_sess.execute(
+        update(OrderIdempotencyKey)
+        .where(OrderIdempotencyKey.user_id == user_id, OrderIdempotencyKey.key == key)
+        .values(order_id=order_id, response=response.model_dump(mode="json"))
+    )
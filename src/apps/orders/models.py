@@ -1,4 +1,8 @@
-from sqlalchemy import ForeignKey
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import DateTime, ForeignKey, Index, String, UniqueConstraint, func
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from config import Base, BaseModelFieldTypes
@@ -18,31 +22,54 @@ class OrderStatus(BaseOrderModel):
 
 class Order(BaseOrderModel):
     __tablename__ = 'orders'
+    __table_args__ = (
+        # order history: filter column, then the (created_at, id) keyset; the leading column also serves its FK
+        Index("ix_orders_orders_user_id_created_at_id", "user_id", "created_at", "id"),
+        Index("ix_orders_orders_restaurant_id_created_at_id", "restaurant_id", "created_at", "id"),
+        Index("ix_orders_orders_status_id_created_at_id", "status_id", "created_at", "id"),
+        Index("ix_orders_orders_created_at_id", "created_at", "id"),
+        {'schema': 'orders'},
+    )
 
     user_id: Mapped[int] = mapped_column(ForeignKey("users.user.id"))
     status_id: Mapped[int] = mapped_column(ForeignKey("orders.order_status.id"))
     total_sum: Mapped[float] = mapped_column(nullable=True, default=0)
     is_payed: Mapped[bool]
     restaurant_id: Mapped[int] = mapped_column(ForeignKey("restaurant.restaurant.id"))
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
 
 
 
 class OrderFood(BaseOrderModel):
     __tablename__ = "orders_food"
 
-    order_id: Mapped[int] = mapped_column(ForeignKey("orders.orders.id"))
+    order_id: Mapped[int] = mapped_column(ForeignKey("orders.orders.id"), index=True)
     food_id: Mapped[int] = mapped_column(ForeignKey("menu.food.id"))
 
 class OrderFoodSize(BaseOrderModel):
     __tablename__ = "orders_food_size"
 
-    order_id: Mapped[int] = mapped_column(ForeignKey("orders.orders.id"))
+    order_id: Mapped[int] = mapped_column(ForeignKey("orders.orders.id"), index=True)
     food_size_id: Mapped[int] = mapped_column(ForeignKey("menu.food_size.id"))
 
 class OrderModifierOption(BaseOrderModel):
     __tablename__ = "orders_modifier_option"
 
-    order_id: Mapped[int] = mapped_column(ForeignKey("orders.orders.id"))
+    order_id: Mapped[int] = mapped_column(ForeignKey("orders.orders.id"), index=True)
     modifier_option_id: Mapped[int] = mapped_column(ForeignKey("menu.modifier_option.id"))
 
 
+class OrderIdempotencyKey(BaseOrderModel):
+    """First response of POST /orders per (user, Idempotency-Key), replayed to retries"""
+    __tablename__ = "idempotency_key"
+    __table_args__ = (
+        UniqueConstraint("user_id", "key", name="uq_idempotency_key_user_id_key"),  # also serves user_id lookups
+        {'schema': 'orders'},
+    )
+
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.user.id"))
+    key: Mapped[str] = mapped_column(String(255))
+    request_hash: Mapped[str] = mapped_column(String(64))
+    order_id: Mapped[int | None] = mapped_column(ForeignKey("orders.orders.id"), index=True, nullable=True)
+    response: Mapped[dict[str, Any] | None] = mapped_column(JSONB, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
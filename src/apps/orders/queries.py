@@ -0,0 +1,60 @@
+"""Set-based read queries for orders.
+
+Line helpers take the ids of a page of orders and answer them with a single
+statement grouped into dicts keyed by ``orders.id``, so a page costs the same
+number of round-trips however many lines its orders have.
+"""
+from datetime import datetime
+
+from sqlalchemy import Select, literal, select, tuple_, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import Order, OrderFood, OrderFoodSize, OrderModifierOption
+
+
+OrderLines = dict[str, list[int]]
+
+
+def filter_orders_stmt(*, user_id: int | None = None, restaurant_id: int | None = None, status_id: int | None = None,
+                       created_from: datetime | None = None, created_to: datetime | None = None,
+                       after: tuple[datetime, int] | None = None, limit: int) -> Select:
+    """Newest first; ``after`` is the (created_at, id) keyset of the previous page's last order"""
+    stmt = select(Order)
+
+    if user_id is not None:
+        stmt = stmt.where(Order.user_id == user_id)
+    if restaurant_id is not None:
+        stmt = stmt.where(Order.restaurant_id == restaurant_id)
+    if status_id is not None:
+        stmt = stmt.where(Order.status_id == status_id)
+    if created_from is not None:
+        stmt = stmt.where(Order.created_at >= created_from)
+    if created_to is not None:
+        stmt = stmt.where(Order.created_at < created_to)
+    if after is not None:
+        stmt = stmt.where(tuple_(Order.created_at, Order.id) < tuple_(*after))
+
+    return stmt.order_by(Order.created_at.desc(), Order.id.desc()).limit(limit)
+
+
+async def get_order_lines_by_order_ids(*, db_sess: AsyncSession, order_ids: list[int]) -> dict[int, OrderLines]:
+    """Food, food size and modifier option ids of every order, in line order"""
+    stmt = union_all(
+        select(literal("food_ids").label("kind"), OrderFood.order_id, OrderFood.food_id.label("item_id"), OrderFood.id)
+        .where(OrderFood.order_id.in_(order_ids)),
+        select(literal("food_size_ids"), OrderFoodSize.order_id, OrderFoodSize.food_size_id, OrderFoodSize.id)
+        .where(OrderFoodSize.order_id.in_(order_ids)),
+        select(literal("modifier_option_ids"), OrderModifierOption.order_id, OrderModifierOption.modifier_option_id,
+               OrderModifierOption.id)
+        .where(OrderModifierOption.order_id.in_(order_ids)),
+    )
+
+    lines: dict[int, OrderLines] = {
+        order_id: {"food_ids": [], "food_size_ids": [], "modifier_option_ids": []} for order_id in order_ids
+    }
+
+    rows = (await db_sess.execute(stmt)).all()
+    for kind, order_id, item_id, _ in sorted(rows, key=lambda row: row[3]):
+        lines[order_id][kind].append(item_id)
+
+    return lines
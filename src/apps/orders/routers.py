@@ -1,13 +1,75 @@
-from fastapi import APIRouter, Request
+from datetime import datetime
 
-from config import SessionDep
-from .schemas import WriteSingleOrderSchema
-from .service import create
+from fastapi import APIRouter, Depends, Header, Query, Request, Response
+from fastapi.responses import StreamingResponse
+
+from config import SessionDep, ReadSessionDep
+from apps.users.depends import CurrentUserDep, admin_role_required
+from .events import order_event_hub
+from .enums import OrderStatusName
+from .schemas import WriteSingleOrderSchema, ReadSingleOrderSchema, ReadOrderQuoteSchema, WriteOrderStatusSchema, \
+    ReadOrderStatusSchema, ReadOrderPageSchema
+from .service import create, quote, change_status, list_orders
 
 common_router = APIRouter(tags=["Orders"])
-admin_router = APIRouter(tags=["Orders - admin"])
+admin_router = APIRouter(tags=["Orders - admin"], dependencies=[Depends(admin_role_required)])
+
+@common_router.post("", description="Создать новый заказ", response_model=ReadSingleOrderSchema)
+async def create_order(db_sess: SessionDep, order_data: WriteSingleOrderSchema, req: Request, res: Response,
+                       idempotency_key: str | None = Header(default=None)):
+    order, replayed = await create(db_sess=db_sess, order_data=order_data, req=req, idempotency_key=idempotency_key)
+
+    if replayed:
+        res.headers["Idempotent-Replayed"] = "true"
 
-@common_router.post("", description="Создать новый заказ")
-async def create_order(db_sess: SessionDep, order_data: WriteSingleOrderSchema, req: Request):
-    order = await create(db_sess=db_sess, order_data=order_data, req=req)
     return order
+
+@common_router.get("", description="История заказов текущего пользователя, от новых к старым",
+                   response_model=ReadOrderPageSchema)
+async def list_my_orders(db_sess: SessionDep, user: CurrentUserDep,
+                         cursor: str | None = None, limit: int = Query(20, ge=1, le=100),
+                         restaurant_id: int | None = None, status: OrderStatusName | None = None,
+                         created_from: datetime | None = None, created_to: datetime | None = None):
+    # primary session: an order the user has just placed may not have reached the replica yet
+    return await list_orders(db_sess=db_sess, cursor=cursor, limit=limit, user_id=user.id,
+                             restaurant_id=restaurant_id, status=status,
+                             created_from=created_from, created_to=created_to)
+
+@admin_router.get("/all", description="Все заказы с фильтрами, от новых к старым", response_model=ReadOrderPageSchema)
+async def list_all_orders(db_sess: ReadSessionDep,
+                          cursor: str | None = None, limit: int = Query(20, ge=1, le=100),
+                          user_id: int | None = None, restaurant_id: int | None = None,
+                          status: OrderStatusName | None = None,
+                          created_from: datetime | None = None, created_to: datetime | None = None):
+    return await list_orders(db_sess=db_sess, cursor=cursor, limit=limit, user_id=user_id,
+                             restaurant_id=restaurant_id, status=status,
+                             created_from=created_from, created_to=created_to)
+
+@common_router.post("/quote", description="Рассчитать стоимость корзины без создания заказа",
+                    response_model=ReadOrderQuoteSchema)
+async def quote_order(db_sess: SessionDep, order_data: WriteSingleOrderSchema):
+    # primary session: a price index rebuilt from a lagging replica would be kept until the next menu write
+    return await quote(db_sess=db_sess, order_data=order_data)
+
+@admin_router.patch("/{order_id}/status", description="Перевести заказ в следующий статус",
+                    response_model=ReadOrderStatusSchema)
+async def change_order_status(order_id: int, db_sess: SessionDep, status_data: WriteOrderStatusSchema):
+    return await change_status(db_sess=db_sess, order_id=order_id, status=status_data.status)
+
+# Server-Sent Events: "order_status" events, "resync" when some may have been missed
+
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+@common_router.get("/events", description="Поток изменений статусов заказов текущего пользователя (SSE)")
+async def order_events(req: Request, db_sess: SessionDep, user: CurrentUserDep):
+    await db_sess.close()  # don't hold a pooled connection for the life of the stream
+
+    return StreamingResponse(order_event_hub.stream(req=req, user_id=user.id),
+                             media_type="text/event-stream", headers=SSE_HEADERS)
+
+@admin_router.get("/restaurant/{restaurant_id}/events", description="Поток заказов ресторана для кухни (SSE)")
+async def restaurant_order_events(restaurant_id: int, req: Request, db_sess: SessionDep):
+    await db_sess.close()  # the admin check's session, not needed for the life of the stream
+
+    return StreamingResponse(order_event_hub.stream(req=req, restaurant_id=restaurant_id),
+                             media_type="text/event-stream", headers=SSE_HEADERS)
@@ -1,5 +1,10 @@
+from datetime import datetime
+from typing import Literal
+
 from pydantic import BaseModel
 
+from .enums import OrderStatusName
+
 class WriteSingleOrderSchema(BaseModel):
     food_ids: list[int]
     food_size_ids: list[int]
@@ -10,5 +15,39 @@ class WriteSingleOrderSchema(BaseModel):
 
 class ReadSingleOrderSchema(BaseModel):
     id: int
-    foods: list
+    status_id: int
+    restaurant_id: int
+    is_payed: bool
+    total_sum: float
+    food_ids: list[int]
+    food_size_ids: list[int]
+    modifier_option_ids: list[int]
+    created_at: datetime | None = None
+
+
+class ReadOrderPageSchema(BaseModel):
+    items: list[ReadSingleOrderSchema]
+    next_cursor: str | None = None
+
 
+class ReadOrderQuoteLineSchema(BaseModel):
+    kind: Literal["food_size", "modifier_option"]
+    id: int
+    food_id: int | None = None
+    quantity: int
+    unit_price: float
+    price: float
+
+
+class ReadOrderQuoteSchema(BaseModel):
+    lines: list[ReadOrderQuoteLineSchema]
+    total_sum: float
+
+
+class WriteOrderStatusSchema(BaseModel):
+    status: OrderStatusName
+
+
+class ReadOrderStatusSchema(BaseModel):
+    id: int
+    status: OrderStatusName
\ No newline at end of file
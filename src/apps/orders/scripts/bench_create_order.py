@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark for order creation: the old commit-per-step path vs create_order.
+
+Uses the first user, restaurant, food sizes and modifier options found in the
+database. Everything runs inside an outer transaction that is rolled back at
+the end (service commits become savepoint releases), so no order is kept.
+"""
+
+import asyncio
+import sys
+import time
+sys.path.append('/app/src')
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from apps.contrib import QueryCounter
+from apps.food_menu.models import FoodSize, ModifierOption
+from apps.orders.models import Order, OrderStatus, OrderFood, OrderFoodSize
+from apps.orders.schemas import WriteSingleOrderSchema
+from apps.orders.service import create_order
+from apps.restaurant.models import Restaurant
+from apps.users.models import User
+from config import db_settings
+
+
+ORDERS = 200
+LINES = 5
+
+
+async def create_order_legacy(*, db_sess: AsyncSession, order_data: WriteSingleOrderSchema, user_id: int):
+    """The previous orders.service.create, minus the request handling"""
+    status_id = (await db_sess.execute(select(OrderStatus.id).where(OrderStatus.name == "pending"))).scalar_one()
+    order = Order(status_id=status_id, is_payed=order_data.is_payed, user_id=user_id, restaurant_id=order_data.restaurant_id)
+    db_sess.add(order)
+    await db_sess.commit()
+
+    for food_id in order_data.food_ids:
+        db_sess.add(OrderFood(order_id=order.id, food_id=food_id))
+    for food_size_id in order_data.food_size_ids:
+        db_sess.add(OrderFoodSize(order_id=order.id, food_size_id=food_size_id))
+
+    total_sum = 0
+    for model, ids in ((FoodSize, order_data.food_size_ids), (ModifierOption, order_data.modifier_option_ids)):
+        for row in (await db_sess.execute(select(model).where(model.id.in_(ids)))).scalars():
+            total_sum += row.price
+
+    order.total_sum = total_sum
+    await db_sess.commit()
+
+
+async def build_order_data(db_sess: AsyncSession) -> tuple[WriteSingleOrderSchema, int]:
+    user_id = (await db_sess.execute(select(User.id).limit(1))).scalar_one()
+    restaurant_id = (await db_sess.execute(select(Restaurant.id).limit(1))).scalar_one()
+    sizes = (await db_sess.execute(select(FoodSize.id, FoodSize.parent_id).limit(LINES))).all()
+    option_ids = (await db_sess.execute(select(ModifierOption.id).limit(LINES))).scalars().all()
+
+    order_data = WriteSingleOrderSchema(
+        food_ids=[parent_id for _, parent_id in sizes],
+        food_size_ids=[size_id for size_id, _ in sizes],
+        modifier_option_ids=list(option_ids),
+        restaurant_id=restaurant_id,
+    )
+    return order_data, user_id
+
+
+async def bench(name, create, baseline=None):
+    async with db_settings.async_engine.connect() as conn:
+        await conn.begin()
+        db_sess = AsyncSession(bind=conn, expire_on_commit=False, join_transaction_mode="create_savepoint")
+
+        try:
+            order_data, user_id = await build_order_data(db_sess)
+
+            with QueryCounter(db_settings.async_engine) as counter:
+                started = time.perf_counter()
+                for _ in range(ORDERS):
+                    await create(db_sess=db_sess, order_data=order_data, user_id=user_id)
+                elapsed = time.perf_counter() - started
+        finally:
+            await db_sess.close()
+            await conn.rollback()
+
+    throughput = ORDERS / elapsed
+    speedup = f"{throughput / baseline:>7.1f}x" if baseline else f"{'-':>8}"
+    print(f"  {name:<16} {throughput:>10.1f} {counter.count / ORDERS:>13.1f} {speedup}")
+    return throughput
+
+
+async def bench_create_order():
+    print(f"🧾 ORDER CREATION BENCHMARK ({ORDERS} orders, up to {LINES} lines of each kind)")
+    print("=" * 60)
+    print(f"  {'path':<16} {'orders/s':>10} {'queries/order':>13}")
+
+    baseline = await bench("commit per step", create_order_legacy)
+    await bench("create_order", create_order, baseline)
+
+    print("=" * 60)
+    print("Queries include SAVEPOINT/RELEASE for every service commit.")
+
+
+if __name__ == '__main__':
+    asyncio.run(bench_create_order())
@@ -1,7 +1,11 @@
+from sqlalchemy import select
 from sqlalchemy.orm import sessionmaker
 
 from config import db_settings
+from apps.contrib import notify_sync
+from apps.orders.enums import OrderStatusName
 from apps.orders.models import OrderStatus
+from apps.orders.status_registry import ORDER_STATUS_CHANGED_CHANNEL
 
 
 def load():
@@ -9,14 +13,15 @@ def load():
     SessionLocal = sessionmaker(db_settings.sync_engine, expire_on_commit=False)
     db_sess = SessionLocal()
 
-    names = (
-        "pending", "cooking", "delivery", "finished"
-    )
+    existing = set(db_sess.execute(select(OrderStatus.name)).scalars())
 
-    for name in names:
-        new_order_status_obj = OrderStatus(name=name)
-        db_sess.add(new_order_status_obj)
+    for status in OrderStatusName:
+        if status.value not in existing:
+            new_order_status_obj = OrderStatus(name=status.value)
+            db_sess.add(new_order_status_obj)
 
+    # running workers reload their status registry
+    notify_sync(db_sess=db_sess, channel=ORDER_STATUS_CHANGED_CHANNEL, payload={})
     db_sess.commit()
 
 if __name__ == '__main__':
@@ -1,66 +1,249 @@
-from typing import Iterable, Any
+import base64
+from collections import Counter
+from datetime import datetime, timezone
 
 from fastapi import HTTPException, Request
-from sqlalchemy import select, Sequence
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from .models import Order, OrderStatus, OrderFood, OrderFoodSize, OrderModifierOption
-from apps.food_menu.models import ModifierOption, FoodSize
-from apps.users.enums import UserLookupField
-from apps.users.service import get_user_by
-from .schemas import WriteSingleOrderSchema, ReadSingleOrderSchema
+from .models import Order, OrderFood, OrderFoodSize, OrderModifierOption
+from apps.contrib import InternalError
+from apps.food_menu.price_index import price_index, MenuPrices
+from apps.users.service import get_request_user
+from .enums import OrderStatusName
+from .status_registry import order_status_registry
+from .events import publish_order_status
+from .idempotency import claim_idempotency_key, store_idempotent_response
+from .queries import filter_orders_stmt, get_order_lines_by_order_ids
+from .schemas import WriteSingleOrderSchema, ReadSingleOrderSchema, ReadOrderQuoteSchema, ReadOrderQuoteLineSchema, \
+    ReadOrderStatusSchema, ReadOrderPageSchema
+
+
+# Postgres' default name, the constraint was created unnamed
+ORDER_RESTAURANT_FK = "orders_restaurant_id_fkey"
+
+
+def _constraint_name(e: IntegrityError) -> str | None:
+    """Name of the violated constraint, from psycopg's diagnostics or the asyncpg error behind the adapter"""
+    diag = getattr(e.orig, "diag", None)
+    if diag is not None:
+        return diag.constraint_name
+
+    return getattr(e.orig, "constraint_name", None) or getattr(e.orig.__cause__, "constraint_name", None)
+
+
+def _quote_order(*, prices: MenuPrices, order_data: WriteSingleOrderSchema) -> ReadOrderQuoteSchema:
+    """Validates the cart against the price index and prices it line by line.
+
+    Shared by quotes and order creation. Every size must belong to one of the
+    ordered foods and every modifier option must be offered for one of them.
+    Repeated ids are repeated lines, priced once each.
+    """
+    food_ids = set(order_data.food_ids)
+
+    _check_ids(kind="food", ids=[food_id for food_id in food_ids if not prices.has_food(food_id)])
+
+    size_prices = {food_size_id: prices.food_size_price(food_size_id) for food_size_id in set(order_data.food_size_ids)}
+    _check_ids(kind="food_size", ids=[id_ for id_, price in size_prices.items() if price is None])
+    _check_ids(kind="food_size", reason="do not belong to the ordered foods",
+               ids=[id_ for id_ in size_prices if prices.food_size_food_id(id_) not in food_ids])
+
+    option_prices = {option_id: prices.modifier_option_price(option_id) for option_id in set(order_data.modifier_option_ids)}
+    _check_ids(kind="modifier_option", ids=[id_ for id_, price in option_prices.items() if price is None])
+
+    offered_option_ids = set()
+    for food_id in food_ids:
+        offered_option_ids |= prices.food_modifier_option_ids(food_id)
+    _check_ids(kind="modifier_option", reason="are not offered for the ordered foods",
+               ids=[id_ for id_ in option_prices if id_ not in offered_option_ids])
+
+    lines = [
+        ReadOrderQuoteLineSchema(kind="food_size", id=id_, food_id=prices.food_size_food_id(id_),
+                                 quantity=quantity, unit_price=size_prices[id_], price=size_prices[id_] * quantity)
+        for id_, quantity in Counter(order_data.food_size_ids).items()
+    ] + [
+        ReadOrderQuoteLineSchema(kind="modifier_option", id=id_,
+                                 quantity=quantity, unit_price=option_prices[id_], price=option_prices[id_] * quantity)
+        for id_, quantity in Counter(order_data.modifier_option_ids).items()
+    ]
+
+    return ReadOrderQuoteSchema(lines=lines, total_sum=sum(line.price for line in lines))
+
+
+def _check_ids(*, kind: str, ids: list[int], reason: str = "are unknown") -> None:
+    if ids:
+        raise HTTPException(status_code=400, detail=f"{kind} ids {sorted(ids)} {reason}")
+
+
+async def create_order(*, db_sess: AsyncSession, order_data: WriteSingleOrderSchema, user_id: int,
+                       idempotency_key: str | None = None) -> tuple[ReadSingleOrderSchema, bool]:
+    """Creates an order with all its lines in a single transaction.
 
+    The cart is priced and validated against the in-memory price index, then
+    there is one INSERT ... RETURNING per table: the order and each kind of
+    line, however many lines the order has.
 
-async def _count_total_sum(*, db_sess: AsyncSession, total_sum: int, model: Any, ids: list) -> int:
+    With ``idempotency_key`` the key is claimed in the same transaction and the
+    response stored with the order; a retry gets that response back without
+    touching the order tables. Returns the order and whether it was replayed.
+    """
+    if idempotency_key is not None:
+        stored = await claim_idempotency_key(db_sess=db_sess, user_id=user_id, key=idempotency_key, data=order_data)
+
+        if stored is not None:
+            await db_sess.commit()  # keeps the expired-key cleanup
+            return ReadSingleOrderSchema.model_validate(stored), True
 
+    status_id = order_status_registry.id_of(OrderStatusName.PENDING)
+    prices = await price_index.get(db_sess=db_sess)
+    total_sum = _quote_order(prices=prices, order_data=order_data).total_sum
 
-    stmt = select(model).where(model.id.in_(ids ))
-    res = await db_sess.execute(stmt)
-    res = res.scalars().all()
-
-    for _ in res:
-        total_sum += _.price
-
-    return total_sum
-
-
-async def _get_pending_status_id(*, db_sess: AsyncSession) -> int:
-    stmt = select(OrderStatus).where(OrderStatus.name == "pending")
-
-    res = await db_sess.execute(stmt)
-
-    res = res.scalar_one_or_none()
-
-    if not res:
-        raise HTTPException(status_code=500, detail="No pending status is created")
-    return res.id
-
-async def create(*, db_sess: AsyncSession, order_data: WriteSingleOrderSchema, req: Request):
-    status_id = await _get_pending_status_id(db_sess=db_sess)
-    total_sum = 0
-    user = await get_user_by(db_sess=db_sess, field=UserLookupField.REQUEST, value=req)
-    order = Order(status_id=status_id, is_payed=order_data.is_payed, user_id=user.id, restaurant_id=order_data.restaurant_id)
-    db_sess.add(order)
-    await db_sess.commit()
-
-    for food_id in order_data.food_ids:
-        new_order_food_obj = OrderFood(order_id=order.id, food_id=food_id)
-        db_sess.add(new_order_food_obj)
-
-    for food_size_id in order_data.food_size_ids:
-        new_order_food_size_obj = OrderFoodSize(order_id=order.id, food_size_id=food_size_id)
-        db_sess.add(new_order_food_size_obj)
-
-    total_sum = await _count_total_sum(db_sess=db_sess, total_sum=total_sum, model=FoodSize, ids=order_data.food_size_ids)
-    total_sum = await _count_total_sum(db_sess=db_sess, total_sum=total_sum, model=ModifierOption, ids=order_data.modifier_option_ids)
-
-    order.total_sum = total_sum
-
-    db_sess.add(order)
-    await db_sess.commit()
-
-    out = ReadSingleOrderSchema(
-        id=order.id,
+    try:
+        order_id, created_at = (await db_sess.execute(
+            insert(Order)
+            .values(status_id=status_id, is_payed=bool(order_data.is_payed), user_id=user_id,
+                    restaurant_id=order_data.restaurant_id, total_sum=total_sum)
+            .returning(Order.id, Order.created_at)
+        )).one()
+
+        lines = (
+            (OrderFood, "food_id", order_data.food_ids),
+            (OrderFoodSize, "food_size_id", order_data.food_size_ids),
+            (OrderModifierOption, "modifier_option_id", order_data.modifier_option_ids),
+        )
+
+        for model, column, ids in lines:
+            if ids:
+                await db_sess.execute(
+                    insert(model).returning(model.id),
+                    [{"order_id": order_id, column: id_} for id_ in ids],
+                )
+
+        out = ReadSingleOrderSchema(
+            id=order_id,
+            status_id=status_id,
+            restaurant_id=order_data.restaurant_id,
+            is_payed=bool(order_data.is_payed),
+            total_sum=total_sum,
+            food_ids=order_data.food_ids,
+            food_size_ids=order_data.food_size_ids,
+            modifier_option_ids=order_data.modifier_option_ids,
+            created_at=created_at,
+        )
+
+        await publish_order_status(db_sess=db_sess, order_id=order_id, user_id=user_id,
+                                   restaurant_id=order_data.restaurant_id, status=OrderStatusName.PENDING.value)
+
+        if idempotency_key is not None:
+            await store_idempotent_response(db_sess=db_sess, user_id=user_id, key=idempotency_key,
+                                            order_id=order_id, response=out)
+
+        await db_sess.commit()
+
+    except IntegrityError as e:
+        await db_sess.rollback()
+
+        # the only foreign key not checked against the price index, anything else is a real error
+        if _constraint_name(e) == ORDER_RESTAURANT_FK:
+            raise HTTPException(status_code=400, detail=f"restaurant id {order_data.restaurant_id} is unknown")
+        raise
+
+    except Exception as e:
+        raise InternalError(e, module_name=__name__)
+
+    return out, False
+
+async def quote(*, db_sess: AsyncSession, order_data: WriteSingleOrderSchema) -> ReadOrderQuoteSchema:
+    """Prices a cart like ``create_order`` would, without writing anything"""
+    prices = await price_index.get(db_sess=db_sess)
+
+    return _quote_order(prices=prices, order_data=order_data)
+
+async def create(*, db_sess: AsyncSession, order_data: WriteSingleOrderSchema, req: Request,
+                 idempotency_key: str | None = None) -> tuple[ReadSingleOrderSchema, bool]:
+    user = await get_request_user(db_sess=db_sess, req=req)
+
+    if not user:
+        raise HTTPException(status_code=404, detail="not found")
+
+    return await create_order(db_sess=db_sess, order_data=order_data, user_id=user.id,
+                              idempotency_key=idempotency_key)
+
+async def change_status(*, db_sess: AsyncSession, order_id: int, status: OrderStatusName) -> ReadOrderStatusSchema:
+    """Moves an order along the status transition table and pushes the change to its streams"""
+    order = (await db_sess.execute(select(Order).where(Order.id == order_id).with_for_update())).scalar_one_or_none()
+
+    if not order:
+        raise HTTPException(status_code=404, detail="not found")
+
+    status_id = order_status_registry.id_of(status)
+
+    if not order_status_registry.can_transition(order.status_id, status_id):
+        current = order_status_registry.name_of(order.status_id)
+        raise HTTPException(status_code=409,
+                            detail=f"order {order_id} can't go from {current.value if current else order.status_id} to {status.value}")
+
+    try:
+        order.status_id = status_id
+        await publish_order_status(db_sess=db_sess, order_id=order.id, user_id=order.user_id,
+                                   restaurant_id=order.restaurant_id, status=status.value)
+        await db_sess.commit()
+
+    except Exception as e:
+        raise InternalError(e, module_name=__name__)
+
+    return ReadOrderStatusSchema(id=order_id, status=status)
+
+def _to_naive_utc(value: datetime) -> datetime:
+    """``created_at`` is a naive UTC timestamp, an aware filter value is compared in UTC"""
+    return value.astimezone(timezone.utc).replace(tzinfo=None) if value.tzinfo is not None else value
+
+def _encode_cursor(order: Order) -> str:
+    return base64.urlsafe_b64encode(f"{order.created_at.isoformat()}|{order.id}".encode()).decode()
+
+def _decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        created_at, order_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return _to_naive_utc(datetime.fromisoformat(created_at)), int(order_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="invalid cursor")
+
+async def list_orders(*, db_sess: AsyncSession, cursor: str | None = None, limit: int = 20,
+                      user_id: int | None = None, restaurant_id: int | None = None, status: OrderStatusName | None = None,
+                      created_from: datetime | None = None, created_to: datetime | None = None) -> ReadOrderPageSchema:
+    """One keyset page of orders, newest first, with their lines: two queries whatever the page size"""
+    stmt = filter_orders_stmt(
+        user_id=user_id,
+        restaurant_id=restaurant_id,
+        status_id=order_status_registry.id_of(status) if status is not None else None,
+        created_from=_to_naive_utc(created_from) if created_from is not None else None,
+        created_to=_to_naive_utc(created_to) if created_to is not None else None,
+        after=_decode_cursor(cursor) if cursor else None,
+        limit=limit + 1,  # one extra row tells whether there is a next page
     )
 
-    return out
+    try:
+        orders = list((await db_sess.execute(stmt)).scalars())
+        page, has_next = orders[:limit], len(orders) > limit
+
+        lines = await get_order_lines_by_order_ids(db_sess=db_sess, order_ids=[order.id for order in page]) if page else {}
+
+    except Exception as e:
+        raise InternalError(e, module_name=__name__)
+
+    return ReadOrderPageSchema(
+        items=[
+            ReadSingleOrderSchema(
+                id=order.id,
+                status_id=order.status_id,
+                restaurant_id=order.restaurant_id,
+                is_payed=order.is_payed,
+                total_sum=order.total_sum or 0,
+                created_at=order.created_at,
+                **lines[order.id],
+            )
+            for order in page
+        ],
+        next_cursor=_encode_cursor(page[-1]) if has_next else None,
+    )
@@ -0,0 +1,80 @@
+import asyncio
+import logging
+from typing import Any
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import db_settings, get_module_logger
+from apps.contrib import pg_listener
+from .enums import OrderStatusName, ORDER_STATUS_TRANSITIONS
+from .models import OrderStatus
+
+
+logger: logging.Logger = get_module_logger(__name__)
+
+ORDER_STATUS_CHANGED_CHANNEL = "order_status_changed"
+
+
+class OrderStatusRegistry:
+    """Order status name <-> id mapping, loaded once per worker.
+
+    ``load`` runs in the app lifespan and raises when a status of
+    ``OrderStatusName`` is missing, so a badly seeded database fails at boot
+    rather than on every order. Changes to ``orders.order_status`` are
+    announced on ``order_status_changed`` and trigger a reload.
+    """
+
+    def __init__(self):
+        self._ids: dict[OrderStatusName, int] = dict()
+        self._names: dict[int, OrderStatusName] = dict()
+        self._reload_task: asyncio.Task | None = None
+
+        pg_listener.subscribe(ORDER_STATUS_CHANGED_CHANNEL, self._on_notify)
+
+    @property
+    def loaded(self) -> bool:
+        return bool(self._ids)
+
+    async def load(self, *, db_sess: AsyncSession) -> None:
+        rows = (await db_sess.execute(select(OrderStatus.id, OrderStatus.name))).all()
+        known = {row.name: row.id for row in rows}
+
+        missing = [status.value for status in OrderStatusName if status.value not in known]
+        if missing:
+            raise RuntimeError(f"order statuses {missing} are missing, run apps/orders/scripts/load/load_order_status.py")
+
+        self._ids = {status: known[status.value] for status in OrderStatusName}
+        self._names = {status_id: status for status, status_id in self._ids.items()}
+
+    async def _reload(self) -> None:
+        try:
+            async with db_settings.session() as db_sess:
+                await self.load(db_sess=db_sess)
+        except Exception as e:
+            # keep serving the previous mapping
+            logger.error(f"order status reload failed: {e}")
+        finally:
+            self._reload_task = None
+
+    def _on_notify(self, payload: dict[str, Any] | None) -> None:
+        if self.loaded and self._reload_task is None:
+            self._reload_task = asyncio.get_running_loop().create_task(self._reload())
+
+    def id_of(self, status: OrderStatusName) -> int:
+        return self._ids[status]
+
+    def name_of(self, status_id: int) -> OrderStatusName | None:
+        return self._names.get(status_id)
+
+    def can_transition(self, from_status_id: int, to_status_id: int) -> bool:
+        from_status = self.name_of(from_status_id)
+        to_status = self.name_of(to_status_id)
+
+        if from_status is None or to_status is None:
+            return False
+
+        return to_status in ORDER_STATUS_TRANSITIONS[from_status]
+
+
+order_status_registry = OrderStatusRegistry()
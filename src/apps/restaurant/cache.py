@@ -0,0 +1,7 @@
+from config import db_settings
+from apps.contrib import SnapshotCache
+
+# built from ReadSessionDep, so it may trail a write by the replica lag
+rstrnt_cache = SnapshotCache(name="restaurant", max_source_lag=db_settings.replica_max_lag)
+
+RSTRNTS_SNAPSHOT_KEY = "restaurants"
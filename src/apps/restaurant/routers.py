@@ -1,11 +1,11 @@
-from fastapi import APIRouter
-from sqlalchemy import select
+from fastapi import APIRouter, Query, Request
 
-from config import SessionDep
-from .models import Restaurant
-from .service import create
+from config import SessionDep, ReadSessionDep
+from apps.contrib import cached_json_response
+from .cache import rstrnt_cache, RSTRNTS_SNAPSHOT_KEY
+from .service import create, list_json, nearest
 from .schemas import WriteSingleRestaurantSchema
-from .schemas import ReadSingleRestaurantSchema
+from .schemas import ReadSingleRestaurantSchema, ReadNearestRestaurantSchema
 
 
 
@@ -20,9 +20,14 @@ async def create_rstrnt(db_sess: SessionDep, rstrnt_data: WriteSingleRestaurantS
     return rstrnt
 
 @common_router.get("", description="Получить список всех ресторанов", response_model=list[ReadSingleRestaurantSchema])
-async def lists_rstrnts(db_sess: SessionDep):
-    stmt = select(Restaurant)
-    rstrnts = await db_sess.execute(stmt)
-    rstrnts = rstrnts.scalars().all()
-
-    return rstrnts
+async def lists_rstrnts(db_sess: ReadSessionDep, req: Request):
+    return await cached_json_response(req=req, cache=rstrnt_cache, key=RSTRNTS_SNAPSHOT_KEY,
+                                      build=lambda: list_json(db_sess=db_sess))
+
+@common_router.get("/nearest", description="Ближайшие рестораны к точке, от ближнего к дальнему",
+                   response_model=list[ReadNearestRestaurantSchema])
+async def nearest_rstrnts(db_sess: SessionDep,
+                          lat: float = Query(ge=-90, le=90), lon: float = Query(ge=-180, le=180),
+                          k: int = Query(5, ge=1, le=50), radius_km: float | None = Query(None, gt=0)):
+    # primary session: the index is kept until the next restaurant write, a lagging replica could leave it stale
+    return await nearest(db_sess=db_sess, lat=lat, lon=lon, k=k, radius_km=radius_km)
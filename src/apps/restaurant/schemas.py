@@ -7,3 +7,6 @@ class WriteSingleRestaurantSchema(BaseModel):
 
 class ReadSingleRestaurantSchema(WriteSingleRestaurantSchema):
     id: int
+
+class ReadNearestRestaurantSchema(ReadSingleRestaurantSchema):
+    distance_km: float
\ No newline at end of file
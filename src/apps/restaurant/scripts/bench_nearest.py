@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Benchmark for GET /restaurant/nearest: k-d tree vs a brute-force haversine scan.
+
+Runs on synthetic restaurants spread over the globe, no database required.
+Every tree answer is checked against the brute-force one.
+"""
+
+import heapq
+import math
+import random
+import sys
+import time
+sys.path.append('/app/src')
+
+from apps.restaurant.spatial import SphereKDTree, EARTH_RADIUS_KM, chord_to_km
+
+
+POINT_COUNTS = (1_000, 10_000, 50_000)
+QUERIES = 200
+K = 5
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(h))
+
+
+def brute_force(points, lat: float, lon: float, k: int) -> list[tuple[float, int]]:
+    return heapq.nsmallest(k, ((haversine_km(lat, lon, p_lat, p_lon), i) for i, (p_lat, p_lon) in enumerate(points)))
+
+
+def random_point(rng: random.Random) -> tuple[float, float]:
+    # uniform on the sphere, not on the lat/lon rectangle
+    return math.degrees(math.asin(rng.uniform(-1, 1))), rng.uniform(-180, 180)
+
+
+def bench_nearest():
+    print(f"📍 NEAREST RESTAURANT BENCHMARK (k={K}, {QUERIES} queries each)")
+    print("=" * 60)
+    print(f"  {'points':>8} {'build ms':>10} {'tree µs':>10} {'scan µs':>12} {'speedup':>9}")
+
+    rng = random.Random(42)
+
+    for count in POINT_COUNTS:
+        points = [random_point(rng) for _ in range(count)]
+        queries = [random_point(rng) for _ in range(QUERIES)]
+
+        started = time.perf_counter()
+        tree = SphereKDTree(points)
+        build = time.perf_counter() - started
+
+        started = time.perf_counter()
+        tree_answers = [tree.nearest(lat, lon, k=K) for lat, lon in queries]
+        tree_time = (time.perf_counter() - started) / QUERIES
+
+        started = time.perf_counter()
+        scan_answers = [brute_force(points, lat, lon, K) for lat, lon in queries]
+        scan_time = (time.perf_counter() - started) / QUERIES
+
+        for tree_answer, scan_answer in zip(tree_answers, scan_answers):
+            assert [i for _, i in tree_answer] == [i for _, i in scan_answer], "tree and scan disagree"
+            assert all(abs(chord_to_km(chord) - km) < 1e-6 for (chord, _), (km, _) in zip(tree_answer, scan_answer))
+
+        print(f"  {count:>8} {build * 1000:>10.1f} {tree_time * 1e6:>10.1f} {scan_time * 1e6:>12.1f} "
+              f"{scan_time / tree_time:>8.0f}x")
+
+    print("=" * 60)
+    print("The tree is rebuilt off the event loop after every restaurant write.")
+
+
+if __name__ == '__main__':
+    bench_nearest()
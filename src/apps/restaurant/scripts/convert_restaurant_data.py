@@ -1,24 +1,59 @@
 #!/usr/bin/env python3
 """
 Script to convert restaurant data from various formats to our JSON structure
+
+Input is a bare array or {"restaurants": [...]}, parsed incrementally and
+written as it is converted, so memory stays flat for multi-gigabyte dumps.
+With --workers N items are converted in a process pool. Without an input the
+built-in example is converted.
+
+    python convert_restaurant_data.py [input] [output] [--ndjson] [--workers N]
 """
 
+import argparse
 import json
 import re
-from typing import Dict, Any, List
+import sys
+import time
+from contextlib import nullcontext
+from typing import Dict, Any, Iterable, Iterator, List, Optional, TextIO
+sys.path.append('/app/src')
+
+from apps.contrib.json_stream import JsonStreamReader
+from apps.contrib.parallel import map_chunked
+
+
+# Common patterns for city extraction
+CITY_PATTERNS = tuple(re.compile(pattern) for pattern in (
+    r'([^,]+), [^,]+ городская администрация',
+    r'([^,]+), [^,]+ область',
+    r'([^,]+), [^,]+ район',
+))
+
+# Redundant city information at the end of a name
+NAME_SUFFIX_PATTERNS = tuple(re.compile(pattern) for pattern in (
+    r', [^,]+ городская администрация$',
+    r', [^,]+ область$',
+))
+
+EXAMPLE_DATA = [
+    {
+        "name": "Проспект Каныша Сатпаева, 8а, Усть-Каменогорск, Усть-Каменогорск городская администрация",
+        "lat": 49.899618,
+        "lon": 82.618951
+    },
+    {
+        "name": "Самарское шоссе, 5/1, Усть-Каменогорск, Усть-Каменогорск городская администрация",
+        "lat": 49.898639,
+        "lon": 82.634596
+    }
+]
 
 
 def extract_city_from_address(address: str) -> str:
     """Extract city name from address"""
-    # Common patterns for city extraction
-    patterns = [
-        r'([^,]+), [^,]+ городская администрация',
-        r'([^,]+), [^,]+ область',
-        r'([^,]+), [^,]+ район',
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, address)
+    for pattern in CITY_PATTERNS:
+        match = pattern.search(address)
         if match:
             return match.group(1).strip()
     
@@ -48,8 +83,8 @@ def extract_region_from_address(address: str) -> str:
 def clean_restaurant_name(name: str) -> str:
     """Clean restaurant name for display"""
     # Remove redundant city information
-    name = re.sub(r', [^,]+ городская администрация$', '', name)
-    name = re.sub(r', [^,]+ область$', '', name)
+    for pattern in NAME_SUFFIX_PATTERNS:
+        name = pattern.sub('', name)
     
     # Limit length
     if len(name) > 100:
@@ -58,33 +93,40 @@ def clean_restaurant_name(name: str) -> str:
     return name.strip()
 
 
+def convert_restaurant(item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Convert one restaurant item to our format, None for an unknown format"""
+    # Handle different input formats
+    if 'name' in item and 'lat' in item and 'lon' in item:
+        # Already in our format
+        return {
+            "name": clean_restaurant_name(item['name']),
+            "address": item.get('address', item['name']),
+            "lat": float(item['lat']),
+            "lon": float(item['lon']),
+            "city": item.get('city', extract_city_from_address(item['name'])),
+            "region": item.get('region', extract_region_from_address(item['name']))
+        }
+    elif 'address' in item and 'lat' in item and 'lon' in item:
+        # Format with address field
+        return {
+            "name": clean_restaurant_name(item['address']),
+            "address": item['address'],
+            "lat": float(item['lat']),
+            "lon": float(item['lon']),
+            "city": item.get('city', extract_city_from_address(item['address'])),
+            "region": item.get('region', extract_region_from_address(item['address']))
+        }
+
+    return None
+
+
 def convert_restaurant_data(input_data: List[Dict[str, Any]]) -> Dict[str, Any]:
     """Convert restaurant data to our format"""
     restaurants = []
     
     for item in input_data:
-        # Handle different input formats
-        if 'name' in item and 'lat' in item and 'lon' in item:
-            # Already in our format
-            restaurant = {
-                "name": clean_restaurant_name(item['name']),
-                "address": item.get('address', item['name']),
-                "lat": float(item['lat']),
-                "lon": float(item['lon']),
-                "city": item.get('city', extract_city_from_address(item['name'])),
-                "region": item.get('region', extract_region_from_address(item['name']))
-            }
-        elif 'address' in item and 'lat' in item and 'lon' in item:
-            # Format with address field
-            restaurant = {
-                "name": clean_restaurant_name(item['address']),
-                "address": item['address'],
-                "lat": float(item['lat']),
-                "lon": float(item['lon']),
-                "city": item.get('city', extract_city_from_address(item['address'])),
-                "region": item.get('region', extract_region_from_address(item['address']))
-            }
-        else:
+        restaurant = convert_restaurant(item)
+        if restaurant is None:
             print(f"Warning: Skipping item with unknown format: {item}")
             continue
         
@@ -118,35 +160,73 @@ def convert_from_csv_format(csv_data: str) -> Dict[str, Any]:
     return {"restaurants": restaurants}
 
 
+def iter_restaurant_items(fp: TextIO) -> Iterator[Dict[str, Any]]:
+    """Stream the items of a bare array or of {"restaurants": [...]}"""
+    reader = JsonStreamReader(fp)
+
+    if reader.peek() == '[':
+        for _ in reader.elements():
+            yield reader.read()
+        return
+
+    for key in reader.keys():
+        if key == 'restaurants':
+            for _ in reader.elements():
+                yield reader.read()
+
+
+def convert_item(item: Dict[str, Any]) -> tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+    """(item, converted item or None), picklable for the process pool"""
+    return item, convert_restaurant(item)
+
+
+def write_restaurants(out: TextIO, items: Iterable[tuple[Dict[str, Any], Optional[Dict[str, Any]]]],
+                      *, ndjson: bool = False) -> Dict[str, int]:
+    """Write converted items as {"restaurants": [...]} or one per line; returns the counts"""
+    counts = {"restaurants": 0, "skipped": 0}
+
+    out.write('' if ndjson else '{\n  "restaurants": [')
+    for item, restaurant in items:
+        if restaurant is None:
+            print(f"Warning: Skipping item with unknown format: {item}")
+            counts["skipped"] += 1
+            continue
+
+        line = json.dumps(restaurant, ensure_ascii=False)
+        if ndjson:
+            out.write(line + '\n')
+        else:
+            out.write((',' if counts["restaurants"] else '') + '\n    ' + line)
+        counts["restaurants"] += 1
+
+    out.write('' if ndjson else '\n  ]\n}\n')
+    return counts
+
+
 def main():
     """Main conversion function"""
-    # Example: Convert from simple format
-    simple_data = [
-        {
-            "name": "Проспект Каныша Сатпаева, 8а, Усть-Каменогорск, Усть-Каменогорск городская администрация",
-            "lat": 49.899618,
-            "lon": 82.618951
-        },
-        {
-            "name": "Самарское шоссе, 5/1, Усть-Каменогорск, Усть-Каменогорск городская администрация",
-            "lat": 49.898639,
-            "lon": 82.634596
-        }
-    ]
-    
-    converted_data = convert_restaurant_data(simple_data)
-    
-    # Write the converted data
-    with open('/app/src/assets/rstrnts_data_converted.json', 'w', encoding='utf-8') as f:
-        json.dump(converted_data, f, ensure_ascii=False, indent=2)
-    
+    parser = argparse.ArgumentParser(description="Convert restaurant data to the rstrnts_data.json format")
+    parser.add_argument('input', nargs='?', help="defaults to the built-in example")
+    parser.add_argument('output', nargs='?', default='/app/src/assets/rstrnts_data_converted.json')
+    parser.add_argument('--ndjson', action='store_true', help="one restaurant per line instead of a JSON document")
+    parser.add_argument('--workers', type=int, default=1, help="processes converting items")
+    parser.add_argument('--chunk-size', type=int, default=1000, help="items per task sent to a worker")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+
+    source_file = open(args.input, 'r', encoding='utf-8') if args.input else nullcontext()
+
+    with source_file as f, open(args.output, 'w', encoding='utf-8') as out:
+        source = iter_restaurant_items(f) if f is not None else iter(EXAMPLE_DATA)
+        items = map_chunked(convert_item, source, workers=args.workers, chunk_size=args.chunk_size)
+        counts = write_restaurants(out, items, ndjson=args.ndjson)
+
+    elapsed = time.perf_counter() - started
+
     print("Conversion completed!")
-    print(f"Converted {len(converted_data['restaurants'])} restaurants")
-    
-    for restaurant in converted_data['restaurants']:
-        print(f"  - {restaurant['name']}")
-        print(f"    📍 {restaurant['lat']}, {restaurant['lon']}")
-        print(f"    🏙️  {restaurant['city']}, {restaurant['region']}")
+    print(f"Converted {counts['restaurants']} restaurants, skipped {counts['skipped']}")
+    print(f"Throughput: {counts['restaurants'] / max(elapsed, 1e-9):.0f} records/sec ({elapsed:.2f}s)")
 
 
 if __name__ == '__main__':
@@ -0,0 +1,94 @@
+import itertools
+import os
+import time
+from typing import Iterable, Iterator
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session, sessionmaker
+
+from apps.contrib import copy_rows, create_staging_table, notify_sync
+from apps.restaurant.cache import rstrnt_cache
+from apps.restaurant.scripts.convert_restaurant_data import convert_restaurant, iter_restaurant_items
+from config import db_settings
+
+
+STAGING_TABLE = "restaurant_import"
+STAGING_COLUMNS = ("name", "lat", "lon", "ord")
+
+# restaurants have no unique key: (name, lat, lon) is matched like RstrntJsonLoader does,
+# and the table lock (readers are not blocked) keeps two imports from inserting the same row
+LOCK_STATEMENT = "LOCK TABLE restaurant.restaurant IN SHARE ROW EXCLUSIVE MODE"
+MERGE_STATEMENT = """
+    INSERT INTO restaurant.restaurant (name, lat, lon)
+    SELECT s.name, s.lat, s.lon
+    FROM restaurant_import s
+    WHERE NOT EXISTS (
+        SELECT 1 FROM restaurant.restaurant r WHERE r.name = s.name AND r.lat = s.lat AND r.lon = s.lon
+    )
+    GROUP BY s.name, s.lat, s.lon
+    ORDER BY min(s.ord)
+"""
+
+
+class RstrntCopyImporter:
+    """Imports restaurant lists of any size: streamed through COPY into a staging table, then merged set-based.
+
+    Takes ``{"restaurants": [...]}`` or a bare array, every item goes through
+    ``convert_restaurant``. Restaurants already in the database are left as
+    they are, nothing is deleted.
+    """
+
+    def __init__(self, restaurant_filepath: str = '/app/src/assets/rstrnts_data.json', db_sess: Session | None = None):
+        self.restaurant_filepath = restaurant_filepath
+
+        if db_sess is None:
+            SessionLocal = sessionmaker(db_settings.sync_engine, expire_on_commit=False)
+            db_sess = SessionLocal()
+        self.db_sess = db_sess
+        self.skipped = 0
+
+    def _iter_rows(self, items: Iterable[dict]) -> Iterator[tuple]:
+        ord_ = itertools.count(1)
+
+        for item in items:
+            restaurant = convert_restaurant(item)
+            if restaurant is None:
+                self.skipped += 1
+                continue
+
+            yield restaurant['name'], restaurant['lat'], restaurant['lon'], next(ord_)
+
+    def load(self) -> int:
+        """Imports the file in one transaction; returns the number of restaurants created"""
+        try:
+            print(f"Importing restaurants from {self.restaurant_filepath}...")
+            started = time.perf_counter()
+
+            create_staging_table(db_sess=self.db_sess, table=STAGING_TABLE, columns="""
+                name text NOT NULL, lat double precision NOT NULL, lon double precision NOT NULL, ord bigint NOT NULL
+            """)
+
+            with open(self.restaurant_filepath, "r", encoding="utf-8") as f:
+                staged = copy_rows(db_sess=self.db_sess, table=STAGING_TABLE, columns=STAGING_COLUMNS,
+                                   rows=self._iter_rows(iter_restaurant_items(f)))
+            copied = time.perf_counter()
+            print(f"  Staged {staged} rows in {copied - started:.2f}s ({staged / max(copied - started, 1e-9):.0f} rows/s)"
+                  + (f", skipped {self.skipped} items with unknown format" if self.skipped else ""))
+
+            self.db_sess.execute(text(LOCK_STATEMENT))
+            created = self.db_sess.execute(text(MERGE_STATEMENT)).rowcount
+
+            if created:
+                notify_sync(db_sess=self.db_sess, channel=rstrnt_cache.channel,
+                            payload={"pid": os.getpid(), "changed_at": time.time()})
+            self.db_sess.commit()
+
+            print(f"  Merged in {time.perf_counter() - copied:.2f}s: {created} restaurants created")
+            return created
+
+        except Exception as e:
+            print(f"Error importing restaurants: {e}")
+            self.db_sess.rollback()
+            raise
+        finally:
+            self.db_sess.close()
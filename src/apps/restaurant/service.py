@@ -1,13 +1,31 @@
+from pydantic import TypeAdapter
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from .cache import rstrnt_cache
 from .models import Restaurant
-from .schemas import WriteSingleRestaurantSchema
+from .schemas import WriteSingleRestaurantSchema, ReadSingleRestaurantSchema, ReadNearestRestaurantSchema
+from .spatial import restaurant_index
+
+rstrnts_adapter = TypeAdapter(list[ReadSingleRestaurantSchema])
+
 
 async def create(*, db_sess: AsyncSession, rstrnt_data: WriteSingleRestaurantSchema) -> Restaurant:
     rstrnt = Restaurant(**rstrnt_data.model_dump())
 
     db_sess.add(rstrnt)
 
-    await db_sess.commit()
+    await rstrnt_cache.commit_changes(db_sess=db_sess)
     return rstrnt
 
+async def list_json(*, db_sess: AsyncSession) -> bytes:
+    rstrnts = await db_sess.execute(select(Restaurant))
+    rstrnts = rstrnts.scalars().all()
+
+    return rstrnts_adapter.dump_json(rstrnts_adapter.validate_python(rstrnts, from_attributes=True))
+
+async def nearest(*, db_sess: AsyncSession, lat: float, lon: float, k: int,
+                  radius_km: float | None = None) -> list[ReadNearestRestaurantSchema]:
+    rstrnts = await restaurant_index.nearest(db_sess=db_sess, lat=lat, lon=lon, k=k, radius_km=radius_km)
+
+    return [ReadNearestRestaurantSchema(**rstrnt) for rstrnt in rstrnts]
@@ -0,0 +1,168 @@
+import asyncio
+import heapq
+import math
+import time
+from array import array
+from typing import Any, Sequence
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .cache import rstrnt_cache
+from .models import Restaurant
+
+
+EARTH_RADIUS_KM = 6371.0088
+
+# subtrees this small are scanned instead of split further
+LEAF_SIZE = 8
+
+
+def to_unit_xyz(lat: float, lon: float) -> tuple[float, float, float]:
+    lat, lon = math.radians(lat), math.radians(lon)
+    cos_lat = math.cos(lat)
+    return cos_lat * math.cos(lon), cos_lat * math.sin(lon), math.sin(lat)
+
+
+def chord_to_km(chord: float) -> float:
+    """Great-circle distance of two points ``chord`` apart on the unit sphere (same as haversine)"""
+    return 2 * EARTH_RADIUS_KM * math.asin(min(chord / 2, 1.0))
+
+
+def km_to_chord(km: float) -> float:
+    return 2 * math.sin(min(km / EARTH_RADIUS_KM, math.pi) / 2)
+
+
+class SphereKDTree:
+    """Static 3-d k-d tree over points on the unit sphere.
+
+    Straight-line (chord) distance between unit vectors grows monotonically
+    with great-circle distance, so nearest neighbours in xyz are the nearest
+    on the globe without any special casing of poles or the antimeridian.
+    The tree is implicit: points are reordered so the median of every range
+    is its root, and only the split axis per node is stored.
+    """
+
+    def __init__(self, points: Sequence[tuple[float, float]]):
+        coords = [to_unit_xyz(lat, lon) for lat, lon in points]
+        order = list(range(len(coords)))
+        self.axes = array("b", [0]) * len(coords)
+
+        stack = [(0, len(order))]
+        while stack:
+            lo, hi = stack.pop()
+            if hi - lo <= LEAF_SIZE:
+                continue
+
+            # split on the widest dimension of the range
+            spreads = [max(coords[i][axis] for i in order[lo:hi]) - min(coords[i][axis] for i in order[lo:hi])
+                       for axis in range(3)]
+            axis = spreads.index(max(spreads))
+
+            order[lo:hi] = sorted(order[lo:hi], key=lambda i: coords[i][axis])
+            mid = (lo + hi) >> 1
+            self.axes[mid] = axis
+
+            stack.append((lo, mid))
+            stack.append((mid + 1, hi))
+
+        # tree position -> index into ``points``
+        self.order = array("q", order)
+        self.coords = tuple(array("d", (coords[i][axis] for i in order)) for axis in range(3))
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def nearest(self, lat: float, lon: float, *, k: int, max_chord: float = 2.0) -> list[tuple[float, int]]:
+        """Up to ``k`` (chord, point index) pairs within ``max_chord``, nearest first"""
+        query = to_unit_xyz(lat, lon)
+        qx, qy, qz = query
+        xs, ys, zs = self.coords
+        axes, order = self.axes, self.order
+
+        heap: list[tuple[float, int]] = []  # max-heap of (-squared chord, position)
+        bound = max_chord * max_chord
+
+        def visit(position: int) -> None:
+            nonlocal bound
+            dx, dy, dz = xs[position] - qx, ys[position] - qy, zs[position] - qz
+            dist = dx * dx + dy * dy + dz * dz
+
+            if dist <= bound:
+                if len(heap) < k:
+                    heapq.heappush(heap, (-dist, position))
+                else:
+                    heapq.heapreplace(heap, (-dist, position))
+                if len(heap) == k:
+                    bound = min(bound, -heap[0][0])
+
+        def search(lo: int, hi: int) -> None:
+            if hi - lo <= LEAF_SIZE:
+                for position in range(lo, hi):
+                    visit(position)
+                return
+
+            mid = (lo + hi) >> 1
+            visit(mid)
+
+            axis = axes[mid]
+            diff = query[axis] - self.coords[axis][mid]
+            near, far = ((lo, mid), (mid + 1, hi)) if diff < 0 else ((mid + 1, hi), (lo, mid))
+
+            search(*near)
+            if diff * diff <= bound:
+                search(*far)
+
+        if k > 0 and len(order):
+            search(0, len(order))
+
+        return [(math.sqrt(-dist), order[position]) for dist, position in sorted(heap, reverse=True)]
+
+
+class RestaurantIndex:
+    """Per-worker k-d tree of restaurants, versioned together with ``rstrnt_cache``.
+
+    Restaurant writes (local or seen through NOTIFY) bump the cache version;
+    the next query reloads the rows and rebuilds the tree off the event loop.
+    Rebuilds are single-flight, queries in between touch no database.
+    """
+
+    def __init__(self):
+        self._tree: SphereKDTree | None = None
+        self._rows: list[dict[str, Any]] = []
+        self._version = -1
+        self.built_at: float | None = None
+        self._lock = asyncio.Lock()
+
+    async def _ensure_built(self, *, db_sess: AsyncSession) -> None:
+        if self._version == rstrnt_cache.version:
+            return
+
+        async with self._lock:
+            if self._version == rstrnt_cache.version:
+                return
+
+            version = rstrnt_cache.version
+            res = await db_sess.execute(select(Restaurant.id, Restaurant.name, Restaurant.lat, Restaurant.lon))
+            rows = [row._asdict() for row in res]
+            tree = await asyncio.to_thread(SphereKDTree, [(row["lat"], row["lon"]) for row in rows])
+
+            self._tree, self._rows, self.built_at = tree, rows, time.time()
+            # a write committed while we were building: use this tree once, rebuild next time
+            self._version = version if version == rstrnt_cache.version else -1
+
+    async def nearest(self, *, db_sess: AsyncSession, lat: float, lon: float, k: int,
+                      radius_km: float | None = None) -> list[dict[str, Any]]:
+        """Up to ``k`` restaurants within ``radius_km``, nearest first, with ``distance_km``"""
+        await self._ensure_built(db_sess=db_sess)
+
+        tree, rows = self._tree, self._rows
+        max_chord = km_to_chord(radius_km) if radius_km is not None else 2.0
+
+        return [
+            {**rows[index], "distance_km": chord_to_km(chord)}
+            for chord, index in tree.nearest(lat, lon, k=k, max_chord=max_chord)
+        ]
+
+
+restaurant_index = RestaurantIndex()
@@ -1,10 +1,53 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+
 from argon2 import PasswordHasher
+from argon2.exceptions import VerificationError, InvalidHashError
+
+from config import env_int
+
+# argon2 cost, changing it makes existing hashes get upgraded on the next login
+ARGON2_TIME_COST = env_int("ARGON2_TIME_COST", 3)
+ARGON2_MEMORY_COST = env_int("ARGON2_MEMORY_COST", 65536)  # KiB
+ARGON2_PARALLELISM = env_int("ARGON2_PARALLELISM", 4)
+
+# argon2-cffi releases the GIL, so threads hash in parallel; the pool bounds how many at once per worker
+PASSWORD_HASH_WORKERS = env_int("PASSWORD_HASH_WORKERS", min(4, os.cpu_count() or 1))
+
+hasher = PasswordHasher(
+    time_cost=ARGON2_TIME_COST,
+    memory_cost=ARGON2_MEMORY_COST,
+    parallelism=ARGON2_PARALLELISM,
+)
 
-hasher = PasswordHasher()
+# threads start on first use, i.e. inside the worker after gunicorn's fork
+_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="argon2")
 
-def hash_password(password: str) -> bytes:
+
+def hash_password(password: str | bytes) -> bytes:
     """Hashes a password using argon2 algorithm"""
-    password = bytes(password)
+    if isinstance(password, str):
+        password = password.encode("utf-8")
 
     hashed = hasher.hash(password).encode("utf-8")
-    return hashed
\ No newline at end of file
+    return hashed
+
+def verify_password(hashed: bytes, password: str | bytes) -> bool:
+    """Checks ``password`` against an argon2 hash, False on mismatch or a malformed hash"""
+    try:
+        return hasher.verify(hashed, password)
+    except (VerificationError, InvalidHashError):
+        return False
+
+def password_needs_rehash(hashed: bytes) -> bool:
+    """Whether ``hashed`` was made with other cost parameters than the current ones"""
+    return hasher.check_needs_rehash(hashed.decode("utf-8"))
+
+async def hash_password_async(password: str | bytes) -> bytes:
+    """``hash_password`` on the hashing pool, keeps the event loop free"""
+    return await asyncio.get_running_loop().run_in_executor(_executor, hash_password, password)
+
+async def verify_password_async(hashed: bytes, password: str | bytes) -> bool:
+    """``verify_password`` on the hashing pool, keeps the event loop free"""
+    return await asyncio.get_running_loop().run_in_executor(_executor, verify_password, hashed, password)
@@ -0,0 +1,32 @@
+from typing import Any
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from apps.contrib import TTLCache, notify, pg_listener
+from config import env_float, env_int
+
+
+USER_CACHE_TTL = env_float("USER_CACHE_TTL", 30)
+USER_CACHE_SIZE = env_int("USER_CACHE_SIZE", 1024)
+USER_CHANGED_CHANNEL = "user_changed"
+
+# user id -> UserReadSchema of token-bearing requests, per worker
+user_cache = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+
+
+async def commit_user_changes(*, db_sess: AsyncSession, user_id: int) -> None:
+    """Commits an update of ``user_id`` and drops its cached copy on every worker"""
+    await notify(db_sess=db_sess, channel=USER_CHANGED_CHANNEL, payload={"id": user_id})
+    await db_sess.commit()
+    user_cache.pop(user_id)
+
+
+def _on_user_changed(payload: dict[str, Any] | None) -> None:
+    if payload is None:  # listener reconnected, updates may have been missed
+        user_cache.clear()
+        return
+
+    user_cache.pop(payload.get("id"))
+
+
+pg_listener.subscribe(USER_CHANGED_CHANNEL, _on_user_changed)
@@ -1,18 +1,34 @@
+from typing import Annotated
+
+from authx.exceptions import AuthXException
 from fastapi import Depends, Request, HTTPException
-from sqlalchemy import select
 
 from config import SessionDep
-from .models import User
-from .service import get_user_by
-from .auth_config import authx
-from .enums import UserLookupField
+from .schemas import UserReadSchema
+from .service import get_request_user
+
 
-async def admin_role_required(req: Request, db_sess: SessionDep, token=Depends(authx.access_token_required)):
-    user_id = token.sub
-    user = await get_user_by(db_sess=db_sess, field=UserLookupField.ID, value=user_id)
+async def current_user_required(req: Request, db_sess: SessionDep) -> UserReadSchema:
+    user = await get_request_user(db_sess=db_sess, req=req)
 
     if not user:
         raise HTTPException(status_code=404, detail="not found")
 
     return user
 
+CurrentUserDep = Annotated[UserReadSchema, Depends(current_user_required)]
+
+async def admin_role_required(req: Request, db_sess: SessionDep) -> UserReadSchema:
+    """Admins only: 401 without a valid access token, 403 for every other user"""
+    try:
+        user = await get_request_user(db_sess=db_sess, req=req)
+    except AuthXException:
+        user = None
+
+    if not user:
+        raise HTTPException(status_code=401, detail="not authenticated")
+
+    if not user.is_admin:
+        raise HTTPException(status_code=403, detail="admin role required")
+
+    return user
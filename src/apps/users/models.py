@@ -1,15 +1,15 @@
 from datetime import datetime
 
 
-from sqlalchemy import DateTime, func
+from sqlalchemy import DateTime, UniqueConstraint, func
 from sqlalchemy.orm import mapped_column, Mapped
 from sqlalchemy.sql.sqltypes import LargeBinary
-from argon2.exceptions import VerifyMismatchError
 
 from config import Base, BaseModelFieldTypes
 from config import get_module_logger
 
-from .auth_utils import hash_password, hasher
+from .auth_utils import hash_password, verify_password, password_needs_rehash, \
+    hash_password_async, verify_password_async
 
 logger = get_module_logger('auth')
 
@@ -19,6 +19,10 @@ class BaseUserModel(Base):
 
 class User(BaseUserModel):
     __tablename__ = 'user'
+    __table_args__ = (
+        UniqueConstraint("email", name="uq_user_email"),
+        {'schema': 'users'},
+    )
     id: Mapped[BaseModelFieldTypes.intpk]
     email: Mapped[BaseModelFieldTypes.str_255]
     first_name: Mapped[BaseModelFieldTypes.str_255]
@@ -43,15 +47,26 @@ class User(BaseUserModel):
         """Set a new password for the user."""
         if not password:
             raise ValueError("Password cannot be empty")
-        password = bytes(password, encoding='utf-8')
         self.password = hash_password(password)
 
     def verify_password(self, password: str) -> bool:
         """Verifies inputted password with user's password."""
         if not password:
             return False
-        try:
-            verify: bool = hasher.verify(self.password, password)
-            return verify
-        except VerifyMismatchError:
-            return False
\ No newline at end of file
+        return verify_password(self.password, password)
+
+    async def set_password_async(self, password: str) -> None:
+        """``set_password`` without blocking the event loop."""
+        if not password:
+            raise ValueError("Password cannot be empty")
+        self.password = await hash_password_async(password)
+
+    async def verify_password_async(self, password: str) -> bool:
+        """``verify_password`` without blocking the event loop."""
+        if not password:
+            return False
+        return await verify_password_async(self.password, password)
+
+    def password_needs_rehash(self) -> bool:
+        """Whether the stored hash uses outdated argon2 parameters."""
+        return password_needs_rehash(self.password)
\ No newline at end of file
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, Request
 from sqlalchemy import select
 
-from config import SessionDep
+from config import SessionDep, ReadSessionDep
 from .models import User
 from .schemas import UserWriteSchema, UserReadSchema, AccessTokenLoginSchema
 from .service import create, authorize, me
@@ -10,7 +10,7 @@ from .depends import admin_role_required
 router = APIRouter(prefix="/users")
 
 @router.get("", response_model=list[UserReadSchema], dependencies=[Depends(admin_role_required)])
-async def list_users(db_sess: SessionDep):
+async def list_users(db_sess: ReadSessionDep):
     stmt = select(User)
     res = await db_sess.execute(stmt)
     users = res.scalars().all()
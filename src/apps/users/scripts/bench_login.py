@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark for login throughput under concurrency: argon2 verification inline on
+the event loop vs on the hashing pool.
+
+Next to logins/sec it reports the worst event-loop stall seen by a 1 ms ticker,
+i.e. how long every other request on the worker waits. No database required,
+cost parameters come from the ARGON2_* env variables.
+"""
+
+import asyncio
+import sys
+import time
+sys.path.append('/app/src')
+
+from apps.users.auth_utils import hash_password, verify_password, verify_password_async, \
+    ARGON2_TIME_COST, ARGON2_MEMORY_COST, ARGON2_PARALLELISM, PASSWORD_HASH_WORKERS
+
+
+CONCURRENCY = (1, 8, 32)
+LOGINS = 64
+PASSWORD = "correct horse battery staple"
+
+
+async def login_inline(hashed: bytes) -> bool:
+    """What authorize did before: verify right in the coroutine"""
+    return verify_password(hashed, PASSWORD)
+
+
+async def login_offloaded(hashed: bytes) -> bool:
+    return await verify_password_async(hashed, PASSWORD)
+
+
+async def run(login, hashed: bytes, concurrency: int) -> tuple[float, float]:
+    """Runs LOGINS logins, ``concurrency`` at a time; returns (logins/sec, max loop stall in ms)"""
+    semaphore = asyncio.Semaphore(concurrency)
+    max_stall = 0.0
+    done = False
+
+    async def ticker():
+        nonlocal max_stall
+        while not done:
+            started = time.perf_counter()
+            await asyncio.sleep(0.001)
+            max_stall = max(max_stall, time.perf_counter() - started - 0.001)
+
+    async def one():
+        async with semaphore:
+            assert await login(hashed)
+
+    ticker_task = asyncio.create_task(ticker())
+    await asyncio.sleep(0.01)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(LOGINS)))
+    elapsed = time.perf_counter() - started
+
+    done = True
+    await ticker_task
+
+    return LOGINS / elapsed, max_stall * 1000
+
+
+async def bench_login():
+    print(f"🔐 LOGIN BENCHMARK ({LOGINS} logins per run)")
+    print(f"argon2: time_cost={ARGON2_TIME_COST}, memory_cost={ARGON2_MEMORY_COST} KiB, "
+          f"parallelism={ARGON2_PARALLELISM}; pool: {PASSWORD_HASH_WORKERS} threads")
+    print("=" * 60)
+
+    hashed = hash_password(PASSWORD)
+    await login_offloaded(hashed)  # start the pool threads
+
+    print(f"  {'mode':<10} {'concurrency':>11} {'logins/s':>10} {'max stall':>12}")
+    for concurrency in CONCURRENCY:
+        for name, login in (("inline", login_inline), ("pool", login_offloaded)):
+            throughput, stall = await run(login, hashed, concurrency)
+            print(f"  {name:<10} {concurrency:>11} {throughput:>10.1f} {stall:>9.1f} ms")
+
+    print("=" * 60)
+    print("Max stall is the latency every other request on the worker pays meanwhile.")
+
+
+if __name__ == '__main__':
+    asyncio.run(bench_login())
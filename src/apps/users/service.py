@@ -2,11 +2,16 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from fastapi import HTTPException, Request
 
+from config import get_module_logger
+
 from .auth_config import authx
-from .schemas import UserWriteSchema, AccessTokenLoginSchema
+from .cache import user_cache, commit_user_changes
+from .schemas import UserWriteSchema, UserReadSchema, AccessTokenLoginSchema
 from .models import User
 from .enums import UserLookupField
 
+logger = get_module_logger('auth')
+
 async def get_user_by(
         *,
         db_sess: AsyncSession,
@@ -50,7 +55,7 @@ async def create(*, db_sess: AsyncSession, user_data: UserWriteSchema) -> tuple[
 
     try:
         new_user = User(**user_data.model_dump(exclude={"password", "password_2"}))
-        new_user.set_password(user_data.password)
+        await new_user.set_password_async(user_data.password)
 
         db_sess.add(new_user)
         await db_sess.commit()
@@ -65,14 +70,53 @@ async def authorize(*, db_sess: AsyncSession, login_data: AccessTokenLoginSchema
     """Authorizes user"""
     user = await get_user_by(db_sess=db_sess, field=UserLookupField.EMAIL, value=login_data.email)
 
-    if user and user.verify_password(login_data.password):
+    if user and await user.verify_password_async(login_data.password):
         access_token = authx.create_access_token(uid=str(user.id))
+
+        if user.password_needs_rehash():
+            await _rehash_password(db_sess=db_sess, user=user, password=login_data.password)
+
         return {'access_token': access_token}
 
     raise HTTPException(status_code=401, detail="wrong credentials")
 
-async def me(*, db_sess: AsyncSession, req: Request) -> User | HTTPException:
-    user = await get_user_by(db_sess=db_sess, field=UserLookupField.REQUEST, value=req)
+async def _rehash_password(*, db_sess: AsyncSession, user: User, password: str) -> None:
+    """Upgrades the stored hash to the current argon2 parameters; the login goes on if this fails"""
+    user_id = user.id  # rollback expires the instance
+
+    try:
+        await user.set_password_async(password)
+        await commit_user_changes(db_sess=db_sess, user_id=user_id)
+    except Exception as e:
+        await db_sess.rollback()
+        logger.warning(f"password rehash failed for user {user_id}: {e}")
+
+async def get_request_user(*, db_sess: AsyncSession, req: Request) -> UserReadSchema | None:
+    """User of the request's access token, resolved once per request.
+
+    The result is kept on ``req.state`` for every later dependency and service,
+    and in ``user_cache`` for the following requests of the same user.
+    """
+    if hasattr(req.state, "user"):
+        return req.state.user
+
+    token = await authx.get_access_token_from_request(req)
+    user_id = int(authx.verify_token(token).sub)
+
+    user = user_cache.get(user_id)
+
+    if user is None:
+        user_row = await get_user_by(db_sess=db_sess, field=UserLookupField.ID, value=user_id)
+
+        if user_row is not None:
+            user = UserReadSchema.model_validate(user_row, from_attributes=True)
+            user_cache.set(user_id, user)
+
+    req.state.user = user
+    return user
+
+async def me(*, db_sess: AsyncSession, req: Request) -> UserReadSchema | HTTPException:
+    user = await get_request_user(db_sess=db_sess, req=req)
 
     if not user:
         raise HTTPException(status_code=404, detail="not found")
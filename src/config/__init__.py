@@ -1,3 +1,4 @@
-from .database import db_settings, SessionDep, Base, BaseModelFieldTypes, create_schemas
+from .database import db_settings, SessionDep, ReadSessionDep, Base, BaseModelFieldTypes, create_schemas
+from .env import env_bool, env_float, env_int
 from .logger import get_module_logger
 UPLOAD_DIR = "/app/media"
@@ -1,25 +1,57 @@
 import os
+from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, Request
+from fastapi import Depends, FastAPI, Request
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.utils import get_openapi
 from fastapi.responses import JSONResponse
+from sqlalchemy import text
 
 
 from authx.exceptions import MissingTokenError
 
 from apps import api_router
+from apps.contrib import pg_listener, default_response_class
+from apps.orders.status_registry import order_status_registry
+from apps.users.depends import admin_role_required
+from config import db_settings, SessionDep
 
 UPLOAD_DIR = "/app/media"
 
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # runs inside each worker, after gunicorn forked it
+    async with db_settings.session() as db_sess:
+        await order_status_registry.load(db_sess=db_sess)  # fails the boot on a badly seeded database
+
+    await pg_listener.start(db_settings.DATABASE_URI)
+    yield
+    await pg_listener.stop()
+
+
+app = FastAPI(lifespan=lifespan, default_response_class=default_response_class())
 app.include_router(api_router)
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 app.mount("/media", StaticFiles(directory="/app/media"), name="media")
 
+
+@app.get("/api/v1/db/pool-stats", tags=["Database - admin"], dependencies=[Depends(admin_role_required)],
+         description="Использование пула соединений текущего воркера и лимит соединений Postgres")
+async def get_pool_stats(db_sess: SessionDep):
+    max_connections = (await db_sess.execute(text("SHOW max_connections"))).scalar_one()
+    connections = (await db_sess.execute(
+        text("SELECT count(*) FROM pg_stat_activity WHERE datname = current_database()")
+    )).scalar_one()
+
+    return {
+        **db_settings.pool_stats(),
+        "server_max_connections": int(max_connections),
+        "server_connections": connections,
+    }
+
 def custom_openapi():
     if app.openapi_schema:
         return app.openapi_schema
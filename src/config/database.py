@@ -1,19 +1,43 @@
 import os
-from typing import Annotated
+import time
+from typing import Annotated, Any
 
-from sqlalchemy import String, Text, create_engine
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
-from sqlalchemy.orm import DeclarativeBase, mapped_column
+from sqlalchemy import Engine, String, Text, create_engine, text
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncEngine, AsyncSession
+from sqlalchemy.orm import DeclarativeBase, mapped_column, sessionmaker
 from fastapi import Depends
 
+from .env import env_bool, env_float, env_int
+
+
 class DatabaseSettings:
+    """Connection settings and the process-wide engines.
+
+    Engines are created lazily and cached per process. With gunicorn's
+    ``preload_app = True`` the app is imported in the master before forking,
+    so an engine built there is dropped (without closing the parent's
+    connections) and rebuilt the first time a worker touches it.
+
+    When ``POSTGRES_REPLICA_HOST`` is set, ``get_read_session`` hands out
+    sessions on the replica as long as its replay lag stays under
+    ``DB_REPLICA_MAX_LAG`` seconds, and falls back to the primary otherwise.
+    """
+
     def __init__(self):
 
         self._read_env()
 
-        engine = self.async_engine  # async engine by default
+        self._pid: int | None = None
+        self._async_engine: AsyncEngine | None = None
+        self._sync_engine: Engine | None = None
+        self._session: async_sessionmaker | None = None
+        self._sync_session: sessionmaker | None = None
+        self._replica_engine: AsyncEngine | None = None
+        self._replica_session: async_sessionmaker | None = None
 
-        self.session = async_sessionmaker(engine, expire_on_commit=False)
+        self.replica_lag: float | None = None
+        self._replica_checked_at = 0.0
+        self._replica_usable = False
 
     def _read_env(self):
         """Reads ../.envs/.postgres file"""
@@ -25,6 +49,23 @@ class DatabaseSettings:
             self.PORT = os.getenv('POSTGRES_PORT')
             self.DB = os.getenv('POSTGRES_DB')
 
+            # optional streaming replica for read-only endpoints
+            self.REPLICA_HOST = os.getenv('POSTGRES_REPLICA_HOST') or None
+            self.REPLICA_PORT = os.getenv('POSTGRES_REPLICA_PORT') or self.PORT
+            self.REPLICA_MAX_LAG = env_float('DB_REPLICA_MAX_LAG', 5)
+            self.REPLICA_LAG_CHECK_INTERVAL = env_float('DB_REPLICA_LAG_CHECK_INTERVAL', 1)
+
+            # pool sizing, per engine and per process
+            self.POOL_SIZE = env_int('DB_POOL_SIZE', 5)
+            self.MAX_OVERFLOW = env_int('DB_MAX_OVERFLOW', 10)
+            self.POOL_TIMEOUT = env_float('DB_POOL_TIMEOUT', 30)
+            self.POOL_RECYCLE = env_int('DB_POOL_RECYCLE', 1800)
+            self.POOL_PRE_PING = env_bool('DB_POOL_PRE_PING', True)
+
+            # SQLAlchemy's and asyncpg's prepared statement caches; set both to 0 behind pgbouncer
+            self.PREPARED_STATEMENT_CACHE_SIZE = env_int('DB_PREPARED_STATEMENT_CACHE_SIZE', 100)
+            self.STATEMENT_CACHE_SIZE = env_int('DB_STATEMENT_CACHE_SIZE', 100)
+
         except Exception as e:
             raise e
 
@@ -34,36 +75,209 @@ class DatabaseSettings:
 
         return psql_uri
 
+    @property
+    def DATABASE_URI(self):
+        """Plain libpq DSN for drivers used outside SQLAlchemy"""
+        psql_uri = f"postgresql://{self.USERNAME}:{self.PASSWORD}@{self.HOST}:{self.PORT}/{self.DB}"
+
+        return psql_uri
+
     @property
     def DATABASE_URI_asyncpg(self):
         psql_uri = f"postgresql+asyncpg://{self.USERNAME}:{self.PASSWORD}@{self.HOST}:{self.PORT}/{self.DB}"
-        print(psql_uri)
+
         return psql_uri
 
     @property
-    def sync_engine(self):
-        engine = create_engine(self.DATABASE_URI_psycopg)
+    def DATABASE_URI_replica_asyncpg(self):
+        psql_uri = f"postgresql+asyncpg://{self.USERNAME}:{self.PASSWORD}@{self.REPLICA_HOST}:{self.REPLICA_PORT}/{self.DB}"
+
+        return psql_uri
+
+    def _pool_kwargs(self) -> dict[str, Any]:
+        return {
+            "pool_size": self.POOL_SIZE,
+            "max_overflow": self.MAX_OVERFLOW,
+            "pool_timeout": self.POOL_TIMEOUT,
+            "pool_recycle": self.POOL_RECYCLE,
+            "pool_pre_ping": self.POOL_PRE_PING,
+        }
+
+    def _check_pid(self):
+        """Forgets engines inherited from the parent process"""
+        pid = os.getpid()
+
+        if self._pid == pid:
+            return
+
+        for engine in (self._async_engine, self._sync_engine, self._replica_engine):
+            if engine is not None:
+                # close=False: the sockets belong to the parent, just drop our references
+                (engine.sync_engine if isinstance(engine, AsyncEngine) else engine).dispose(close=False)
+
+        self._pid = pid
+        self._async_engine = None
+        self._sync_engine = None
+        self._session = None
+        self._sync_session = None
+        self._replica_engine = None
+        self._replica_session = None
+        self._replica_checked_at = 0.0
+        self._replica_usable = False
+
+    @property
+    def sync_engine(self) -> Engine:
+        self._check_pid()
+
+        if self._sync_engine is None:
+            self._sync_engine = create_engine(self.DATABASE_URI_psycopg, **self._pool_kwargs())
+
+        return self._sync_engine
+
+    @property
+    def async_engine(self) -> AsyncEngine:
+        self._check_pid()
+
+        if self._async_engine is None:
+            self._async_engine = create_async_engine(
+                f"{self.DATABASE_URI_asyncpg}?prepared_statement_cache_size={self.PREPARED_STATEMENT_CACHE_SIZE}",
+                **self._pool_kwargs(),
+                connect_args={"statement_cache_size": self.STATEMENT_CACHE_SIZE},
+            )
+
+        return self._async_engine
+
+    @property
+    def replica_engine(self) -> AsyncEngine | None:
+        self._check_pid()
+
+        if self.REPLICA_HOST is None:
+            return None
+
+        if self._replica_engine is None:
+            self._replica_engine = create_async_engine(
+                f"{self.DATABASE_URI_replica_asyncpg}?prepared_statement_cache_size={self.PREPARED_STATEMENT_CACHE_SIZE}",
+                **self._pool_kwargs(),
+                connect_args={"statement_cache_size": self.STATEMENT_CACHE_SIZE},
+            )
+
+        return self._replica_engine
 
-        return engine
+    @property
+    def replica_max_lag(self) -> float:
+        """How far behind the primary a read session may be, 0 without a replica"""
+        return self.REPLICA_MAX_LAG if self.REPLICA_HOST is not None else 0.0
 
     @property
-    def async_engine(self):
+    def session(self) -> async_sessionmaker:
+        engine = self.async_engine
+
+        if self._session is None:
+            self._session = async_sessionmaker(engine, expire_on_commit=False)
+
+        return self._session
+
+    @property
+    def sync_session(self) -> sessionmaker:
+        engine = self.sync_engine
+
+        if self._sync_session is None:
+            self._sync_session = sessionmaker(engine, expire_on_commit=False)
+
+        return self._sync_session
+
+    @property
+    def replica_session(self) -> async_sessionmaker | None:
+        engine = self.replica_engine
+
+        if engine is None:
+            return None
+
+        if self._replica_session is None:
+            self._replica_session = async_sessionmaker(engine, expire_on_commit=False)
 
-        engine = create_async_engine(self.DATABASE_URI_asyncpg)
+        return self._replica_session
 
-        return engine
+    async def _check_replica(self) -> bool:
+        """Whether the replica is reachable and within ``REPLICA_MAX_LAG``, re-checked every interval"""
+        now = time.monotonic()
+
+        if now - self._replica_checked_at < self.REPLICA_LAG_CHECK_INTERVAL:
+            return self._replica_usable
+
+        # claim the check before awaiting so concurrent requests keep the previous answer
+        self._replica_checked_at = now
+
+        try:
+            async with self.replica_engine.connect() as conn:
+                lag = (await conn.execute(text("""
+                    SELECT CASE
+                        WHEN NOT pg_is_in_recovery() THEN 0
+                        -- idle primary: everything received is replayed, the replay timestamp just ages
+                        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+                        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+                    END
+                """))).scalar_one()
+        except Exception:
+            self.replica_lag = None
+            self._replica_usable = False
+        else:
+            self.replica_lag = float(lag)
+            self._replica_usable = self.replica_lag <= self.REPLICA_MAX_LAG
+
+        return self._replica_usable
+
+    def pool_stats(self) -> dict[str, Any]:
+        """Pool usage of the engines created in this process"""
+        self._check_pid()
+
+        stats = {
+            "pid": self._pid,
+            # worst case per process; times workers (and replicas) must stay below max_connections
+            "max_connections_per_engine": self.POOL_SIZE + self.MAX_OVERFLOW,
+        }
+
+        if self.REPLICA_HOST is not None:
+            stats["replica_lag_s"] = self.replica_lag
+            stats["replica_in_use"] = self._replica_usable
+
+        for name, engine in (("async", self._async_engine), ("sync", self._sync_engine),
+                             ("replica", self._replica_engine)):
+            if engine is None:
+                continue
+
+            pool = (engine.sync_engine if isinstance(engine, AsyncEngine) else engine).pool
+            stats[name] = {
+                "size": pool.size(),
+                "checked_in": pool.checkedin(),
+                "checked_out": pool.checkedout(),
+                "overflow": pool.overflow(),
+            }
+
+        return stats
 
     async def get_async_session(self):
         async with self.session() as session:
             yield session
 
+    async def get_read_session(self):
+        """Session for read-only endpoints: the replica when it is fresh enough, the primary otherwise"""
+        session = self.session
+
+        if self.REPLICA_HOST is not None and await self._check_replica():
+            session = self.replica_session
+
+        async with session() as sess:
+            yield sess
+
     def get_sync_session(self):
-        with self.session() as session:
+        with self.sync_session() as session:
             yield session
 
 db_settings = DatabaseSettings()
 
 SessionDep = Annotated[AsyncSession, Depends(db_settings.get_async_session)]
+ReadSessionDep = Annotated[AsyncSession, Depends(db_settings.get_read_session)]
 
 class BaseModelFieldTypes:
     intpk = Annotated[int, mapped_column(primary_key=True)]
@@ -0,0 +1,21 @@
+"""Typed environment settings.
+
+An empty value counts as unset, so keys copied blank from ``.env.example``
+(and passed through by docker-compose as ``""``) fall back to the default.
+"""
+import os
+
+
+def env_int(name: str, default: int) -> int:
+    value = os.getenv(name, "").strip()
+    return int(value) if value else default
+
+
+def env_float(name: str, default: float) -> float:
+    value = os.getenv(name, "").strip()
+    return float(value) if value else default
+
+
+def env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name, "").strip()
+    return value.lower() in ("1", "true", "yes") if value else default
@@ -24,7 +24,8 @@ loglevel = "info"
 # Graceful timeout for worker shutdown
 timeout = 30
 
-# Preload the application to reduce memory usage
+# Preload the application to reduce memory usage.
+# Database engines are created lazily, so every worker builds its own pool after the fork
 preload_app = True
 
 # Enable keep-alive connections
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Regression check: the hot lookups of the menu, orders and users schemas must be
+able to use an index.
+
+Every query is EXPLAINed with sequential scans disabled. On a small dev database
+the planner would happily seq-scan anyway, so this checks that an index *can*
+serve the predicate, not what the planner picks for the current row counts.
+Exits with status 1 when a query still falls back to a sequential scan.
+"""
+
+import json
+import sys
+from datetime import datetime
+sys.path.append('/app/src')
+
+from sqlalchemy import select, text
+from sqlalchemy.dialects import postgresql
+
+from apps.food_menu.models import Food, FoodSize, FoodModifierOption, ModifierOption, Menu
+from apps.orders.models import Order, OrderFood, OrderFoodSize, OrderModifierOption
+from apps.orders.queries import filter_orders_stmt
+from apps.users.models import User
+from config import db_settings
+
+
+HOT_QUERIES = {
+    "food sizes by food": select(FoodSize).where(FoodSize.parent_id.in_([1, 2, 3])),
+    "food modifier options by food": select(FoodModifierOption).where(FoodModifierOption.food_id.in_([1, 2, 3])),
+    "food modifier options by option (FK check on delete)": select(FoodModifierOption).where(FoodModifierOption.modifier_option_id == 1),
+    "foods by type (FK check on delete)": select(Food).where(Food.type_id == 1),
+    "menu entries by food (FK check on delete)": select(Menu).where(Menu.food_id == 1),
+    "modifier options by category": select(ModifierOption).where(ModifierOption.modifier_category_id == 1),
+    "orders by user": select(Order).where(Order.user_id == 1),
+    "orders by restaurant": select(Order).where(Order.restaurant_id == 1),
+    "orders by status": select(Order).where(Order.status_id == 1),
+    "order history page of a user": filter_orders_stmt(user_id=1, after=(datetime(2030, 1, 1), 1000), limit=21),
+    "order history page of a restaurant by date": filter_orders_stmt(
+        restaurant_id=1, created_from=datetime(2025, 1, 1), created_to=datetime(2026, 1, 1), limit=21),
+    "order history page, all orders": filter_orders_stmt(after=(datetime(2030, 1, 1), 1000), limit=21),
+    "order foods by order": select(OrderFood).where(OrderFood.order_id == 1),
+    "order food sizes by order": select(OrderFoodSize).where(OrderFoodSize.order_id == 1),
+    "order modifier options by order": select(OrderModifierOption).where(OrderModifierOption.order_id == 1),
+    "user by email": select(User).where(User.email == "user@example.com"),
+}
+
+
+def _seq_scans(plan: dict) -> list[str]:
+    found = [plan["Relation Name"]] if plan.get("Node Type") == "Seq Scan" else []
+
+    for child in plan.get("Plans", []):
+        found += _seq_scans(child)
+
+    return found
+
+
+def check_query_plans() -> bool:
+    print("🔎 QUERY PLAN CHECK")
+    print("=" * 60)
+
+    failed = 0
+
+    with db_settings.sync_engine.connect() as conn:
+        conn.execute(text("SET enable_seqscan = off"))
+
+        for name, stmt in HOT_QUERIES.items():
+            sql = stmt.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})
+            raw_plan = conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar_one()
+            plan = (json.loads(raw_plan) if isinstance(raw_plan, str) else raw_plan)[0]["Plan"]
+
+            seq_scans = _seq_scans(plan)
+            if seq_scans:
+                failed += 1
+                print(f"  ❌ {name}: sequential scan on {', '.join(seq_scans)}")
+            else:
+                print(f"  ✅ {name}: {plan['Node Type']}")
+
+    print("=" * 60)
+    print(f"📊 {len(HOT_QUERIES) - failed}/{len(HOT_QUERIES)} queries can use an index")
+
+    return failed == 0
+
+
+if __name__ == '__main__':
+    sys.exit(0 if check_query_plans() else 1)
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Fast import of large menu and restaurant files for chain-wide onboarding.
+
+Each file is streamed, converted item by item with the convert_data.py /
+convert_restaurant_data.py logic, COPYed into a temp staging table and merged
+into menu.* / restaurant.restaurant with set-based upserts, each in its own
+transaction. Memory stays flat whatever the file size. Caches of running
+workers are invalidated through NOTIFY when something changed.
+
+    python scripts/import_catalogue.py --menu dump.json --restaurants rstrnts.json
+"""
+
+import argparse
+import sys
+import time
+sys.path.append('/app/src')
+
+from apps.food_menu.scripts.load.import_menu import MenuCopyImporter
+from apps.restaurant.scripts.load.import_rstrnts import RstrntCopyImporter
+
+
+def import_catalogue(*, menu_filepath: str | None, restaurant_filepath: str | None) -> None:
+    print("📦 CATALOGUE IMPORT")
+    print("=" * 60)
+    started = time.perf_counter()
+
+    if restaurant_filepath:
+        print("\n🏪 Restaurants")
+        RstrntCopyImporter(restaurant_filepath).load()
+
+    if menu_filepath:
+        print("\n🍽️  Menu")
+        MenuCopyImporter(menu_filepath).load()
+
+    print(f"\n✅ Import finished in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--menu", help="scraper dump (sections/products) or converted menu (food_types)")
+    parser.add_argument("--restaurants", help='{"restaurants": [...]} or a bare array of restaurants')
+    args = parser.parse_args()
+
+    if not args.menu and not args.restaurants:
+        parser.error("nothing to import, pass --menu and/or --restaurants")
+
+    import_catalogue(menu_filepath=args.menu, restaurant_filepath=args.restaurants)
@@ -0,0 +1,65 @@
+import asyncio
+
+from apps.food_menu import loaders
+from apps.food_menu.loaders import FoodDetailLoader
+
+
+def test_overlapping_loads_never_query_the_session_concurrently(monkeypatch):
+    calls: list[list[int]] = []
+    in_flight = 0
+    max_in_flight = 0
+
+    async def scenario():
+        started, release = asyncio.Event(), asyncio.Event()
+
+        async def get_food_details_by_food_ids(*, db_sess, food_ids):
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            calls.append(sorted(food_ids))
+
+            started.set()
+            await release.wait()
+
+            in_flight -= 1
+            return {food_id: f"food {food_id}" for food_id in food_ids if food_id != 404}
+
+        monkeypatch.setattr(loaders, "get_food_details_by_food_ids", get_food_details_by_food_ids)
+        loader = FoodDetailLoader(db_sess=object())
+
+        first = asyncio.ensure_future(loader.load_many([1, 2]))
+        await started.wait()  # the first batch is on the session now
+
+        second = asyncio.ensure_future(asyncio.gather(loader.load_many([2, 3, 404]), loader.load(3)))
+        for _ in range(10):
+            await asyncio.sleep(0)
+
+        release.set()
+        return await asyncio.gather(first, second)
+
+    first, (second, third) = asyncio.run(scenario())
+
+    assert max_in_flight == 1
+    assert calls == [[1, 2], [3, 404]]
+    assert first == {1: "food 1", 2: "food 2"}
+    assert second == {2: "food 2", 3: "food 3"}
+    assert third == "food 3"
+
+
+def test_failed_batch_does_not_block_the_next_one(monkeypatch):
+    async def scenario():
+        async def get_food_details_by_food_ids(*, db_sess, food_ids):
+            if 1 in food_ids:
+                raise RuntimeError("boom")
+            return {food_id: f"food {food_id}" for food_id in food_ids}
+
+        monkeypatch.setattr(loaders, "get_food_details_by_food_ids", get_food_details_by_food_ids)
+        loader = FoodDetailLoader(db_sess=object())
+
+        failed = await asyncio.gather(loader.load(1), return_exceptions=True)
+        return failed, await loader.load(2)
+
+    (failed,), loaded = asyncio.run(scenario())
+
+    assert isinstance(failed, RuntimeError)
+    assert loaded == "food 2"
@@ -0,0 +1,92 @@
+import io
+import json
+import random
+
+import pytest
+
+from apps.contrib.json_stream import JsonStreamReader, iter_json_array
+
+
+class TricklingFile(io.StringIO):
+    """Hands out at most ``limit`` characters per read, so values are cut at every possible place"""
+
+    def __init__(self, text: str, limit: int):
+        super().__init__(text)
+        self.limit = limit
+        self.served = 0
+
+    def read(self, size: int = -1) -> str:
+        chunk = super().read(self.limit if size < 0 else min(size, self.limit))
+        self.served += len(chunk)
+        return chunk
+
+
+def random_document(rnd: random.Random, depth: int = 0) -> str:
+    """Random JSON text, numbers in every notation and whitespace anywhere between tokens"""
+    space = lambda: rnd.choice(["", "", " ", "\n  "])
+    kind = rnd.randrange(7 if depth < 3 else 4)
+
+    if kind == 0:
+        return rnd.choice(["", "-"]) + str(rnd.randrange(10 ** rnd.randrange(1, 20)))
+    if kind == 1:
+        return (rnd.choice(["", "-"]) + str(rnd.randrange(1000)) + rnd.choice(["", f".{rnd.randrange(1000)}"])
+                + rnd.choice(["e", "E"]) + rnd.choice(["", "+", "-"]) + str(rnd.randrange(30)))
+    if kind == 2:
+        text = "".join(rnd.choice('ab "\\/\n\té€😀') for _ in range(rnd.randrange(8)))
+        return json.dumps(text, ensure_ascii=rnd.random() < 0.5)
+    if kind == 3:
+        return rnd.choice(["true", "false", "null"])
+    if kind == 4:
+        items = [random_document(rnd, depth + 1) for _ in range(rnd.randrange(4))]
+        return "[" + space() + ("," + space()).join(items) + space() + "]"
+    members = [f'"k{i}"{space()}:{space()}{random_document(rnd, depth + 1)}' for i in range(rnd.randrange(4))]
+    return "{" + space() + ("," + space()).join(members) + space() + "}"
+
+
+@pytest.mark.parametrize("limit", range(1, 8))
+def test_random_documents_survive_any_chunk_boundary(limit):
+    rnd = random.Random(limit)
+
+    for _ in range(300):
+        text = "[" + ", ".join(random_document(rnd) for _ in range(rnd.randrange(1, 6))) + "]"
+
+        assert list(iter_json_array(TricklingFile(text, limit))) == json.loads(text)
+        assert JsonStreamReader(TricklingFile(text, limit), chunk_size=1).read() == json.loads(text)
+
+
+@pytest.mark.parametrize("number", ["0", "-0", "7", "-12", "1.5", "-1.5e+10", "2E-3", "6.02e23", "1e5", "-0.0E-0",
+                                    "12345678901234567890"])
+def test_number_split_at_every_character(number):
+    text = f"[{number}, {number},{number}]"
+
+    assert list(iter_json_array(TricklingFile(text, 1))) == [json.loads(number)] * 3
+    assert JsonStreamReader(TricklingFile(number, 1), chunk_size=1).read() == json.loads(number)
+
+
+def test_literals_and_escapes_split_at_every_character():
+    text = '{"a": true, "b": false, "c": null, "d": "\\u00e9\\ud83d\\ude00\\n", "e": [NaN, -Infinity]}'
+    reader = JsonStreamReader(TricklingFile(text, 1), chunk_size=1)
+
+    assert {key: reader.read() for key in reader.keys() if key != "e"} == {
+        "a": True, "b": False, "c": None, "d": "é😀\n",
+    }
+
+
+def test_unread_values_are_skipped_across_chunk_boundaries():
+    text = '{"skip": [1.25e-2, {"x": -3}], "restaurants": [{"id": 1}, {"id": 2}], "tail": 10e1}'
+    reader = JsonStreamReader(TricklingFile(text, 1), chunk_size=1)
+
+    assert [[reader.read() for _ in reader.elements()] for key in reader.keys() if key == "restaurants"] == [
+        [{"id": 1}, {"id": 2}],
+    ]
+    assert reader.peek() == ""
+
+
+@pytest.mark.parametrize("bad", ["x", "tx", "1.2.3", '"a\\x"', '"\\u12zz"', "[1 2]", '{"a" 1}'])
+def test_malformed_input_fails_at_the_bad_token(bad):
+    fp = TricklingFile(f"[1, {bad}, " + "0, " * 100_000 + "0]", 16)
+
+    with pytest.raises(ValueError):
+        list(iter_json_array(fp))
+
+    assert fp.served < 1000
@@ -0,0 +1,158 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from apps.food_menu import queries, service
+from apps.food_menu.enums import MenuEntity
+from apps.food_menu.schemas import ReadSingleFoodSchema
+
+
+def sql(stmt) -> str:
+    return " ".join(str(stmt.compile(dialect=postgresql.dialect())).split())
+
+
+class RecordingSession:
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.statements = []
+
+    async def execute(self, stmt, *args, **kwargs):
+        self.statements.append(stmt)
+        return iter(self.rows)
+
+
+def test_latest_changes_keep_the_newest_change_of_each_row_in_the_window():
+    db_sess = RecordingSession([
+        SimpleNamespace(entity="food", entity_id=2, is_deleted=False),
+        SimpleNamespace(entity="food", entity_id=3, is_deleted=True),
+        SimpleNamespace(entity="modifier_option", entity_id=1, is_deleted=False),
+    ])
+
+    changes = asyncio.run(queries.get_latest_menu_changes(db_sess=db_sess, since=10, version=20))
+
+    assert changes[MenuEntity.FOOD] == {2: False, 3: True}
+    assert changes[MenuEntity.MODIFIER_OPTION] == {1: False}
+    assert changes[MenuEntity.MENU] == {}
+
+    # a row deleted and re-created in the window comes back as its last change, the re-creation
+    stmt = sql(db_sess.statements[0])
+    assert stmt.startswith("SELECT DISTINCT ON (menu.menu_change.entity, menu.menu_change.entity_id)")
+    assert "WHERE menu.menu_change.id > %(id_1)s" in stmt and "AND menu.menu_change.id <= %(id_2)s" in stmt
+    assert stmt.endswith("ORDER BY menu.menu_change.entity, menu.menu_change.entity_id, menu.menu_change.id DESC")
+    assert db_sess.statements[0].compile(dialect=postgresql.dialect()).params == {"id_1": 10, "id_2": 20}
+
+
+def test_affected_foods_are_found_through_types_categories_and_options():
+    db_sess = RecordingSession()
+
+    assert asyncio.run(queries.get_food_ids_affected_by(
+        db_sess=db_sess, food_type_ids=[], modifier_category_ids=[], modifier_option_ids=[])) == set()
+    assert db_sess.statements == []
+
+    class Scalars(RecordingSession):
+        async def execute(self, stmt, *args, **kwargs):
+            self.statements.append(stmt)
+            return SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: [1, 3, 1]))
+
+    db_sess = Scalars()
+    assert asyncio.run(queries.get_food_ids_affected_by(
+        db_sess=db_sess, food_type_ids=[1], modifier_category_ids=[2], modifier_option_ids=[5])) == {1, 3}
+
+    stmt = sql(db_sess.statements[0])
+    assert "menu.food.type_id IN (__[POSTCOMPILE_type_id_1])" in stmt
+    assert "menu.modifier_option.id IN (__[POSTCOMPILE_id_1])" in stmt
+    assert "menu.modifier_option.modifier_category_id IN (__[POSTCOMPILE_modifier_category_id_1])" in stmt
+    assert " UNION " in stmt
+
+
+def food(food_id: int) -> ReadSingleFoodSchema:
+    return ReadSingleFoodSchema(id=food_id, name=f"food {food_id}", description="", food_type_id=1,
+                                food_type_name="Pizza", food_sizes=[], food_modifiers=[])
+
+
+class Catalogue:
+    """Change log and current rows behind get_menu_changes_service"""
+
+    def __init__(self, monkeypatch, *, oldest: int, version: int, changes=None, foods=(), affected=()):
+        self.latest_calls = []
+        self.affected_calls = []
+        self.foods = {food_id: food(food_id) for food_id in foods}
+
+        async def get_menu_version_range(*, db_sess):
+            return oldest, version
+
+        async def get_latest_menu_changes(*, db_sess, since, version):
+            self.latest_calls.append((since, version))
+            return {entity: dict((changes or {}).get(entity, {})) for entity in MenuEntity}
+
+        async def get_food_ids_affected_by(*, db_sess, **ids):
+            self.affected_calls.append(ids)
+            return set(affected)
+
+        async def _get_changed_rows(*, db_sess, model, ids):
+            # every type, category, option and menu entry logged as changed still exists
+            return [SimpleNamespace(id=id_, name=f"row {id_}", modifier_category_id=1, price=0.0, food_id=id_,
+                                    priority_level=1) for id_ in ids or ()]
+
+        async def get_food_details_by_food_ids(*, db_sess, food_ids):
+            if not isinstance(food_ids, list):  # full resync: select(Food.id)
+                return dict(self.foods)
+            return {food_id: self.foods[food_id] for food_id in food_ids if food_id in self.foods}
+
+        for fn in (get_menu_version_range, get_latest_menu_changes, get_food_ids_affected_by, _get_changed_rows,
+                   get_food_details_by_food_ids):
+            monkeypatch.setattr(service, fn.__name__, fn)
+
+    def changes_since(self, since: int):
+        return asyncio.run(service.get_menu_changes_service(db_sess=None, since=since))
+
+
+@pytest.mark.parametrize("since", [0, 5, 8, 31])
+def test_unknown_or_pruned_history_forces_a_full_resync(monkeypatch, since):
+    # changes 10..30 are retained: a client at 9 or later can still get a delta
+    catalogue = Catalogue(monkeypatch, oldest=10, version=30, foods=[1, 2])
+
+    changes = catalogue.changes_since(since)
+
+    assert changes.full_resync
+    assert changes.version == 30
+    assert [food.id for food in changes.foods] == [1, 2]
+    assert catalogue.latest_calls == []
+
+
+@pytest.mark.parametrize("since", [9, 20, 30])
+def test_retained_history_gives_a_delta(monkeypatch, since):
+    catalogue = Catalogue(monkeypatch, oldest=10, version=30, foods=[1, 2])
+
+    changes = catalogue.changes_since(since)
+
+    assert not changes.full_resync
+    assert catalogue.latest_calls == [(since, 30)]
+
+
+def test_row_deleted_then_recreated_is_sent_as_an_upsert(monkeypatch):
+    catalogue = Catalogue(monkeypatch, oldest=1, version=30, foods=[2, 7],
+                          changes={MenuEntity.FOOD: {2: False, 3: True, 4: False}})
+
+    changes = catalogue.changes_since(20)
+
+    assert [food.id for food in changes.foods] == [2]
+    # 3 is deleted by the log, 4 was logged as changed but is gone by now
+    assert changes.deleted_food_ids == [3, 4]
+
+
+def test_foods_are_resent_when_their_type_category_or_option_changes(monkeypatch):
+    catalogue = Catalogue(monkeypatch, oldest=1, version=30, foods=[1, 3, 5], affected=[1, 3], changes={
+        MenuEntity.FOOD_TYPE: {4: False},
+        MenuEntity.MODIFIER_CATEGORY: {6: False, 7: True},
+        MenuEntity.MODIFIER_OPTION: {8: False},
+    })
+
+    changes = catalogue.changes_since(20)
+
+    assert catalogue.affected_calls == [{"food_type_ids": [4], "modifier_category_ids": [6], "modifier_option_ids": [8]}]
+    assert [food.id for food in changes.foods] == [1, 3]
+    assert changes.deleted_modifier_category_ids == [7]
+    assert changes.deleted_food_ids == []
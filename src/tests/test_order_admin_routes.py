@@ -0,0 +1,66 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from apps.orders.routers import admin_router
+from apps.users import depends
+from apps.users.schemas import UserReadSchema
+from config import db_settings
+
+
+ADMIN_ROUTES = [
+    ("GET", "/orders/all", None),
+    ("PATCH", "/orders/1/status", {"status": "cooking"}),
+    ("GET", "/orders/restaurant/1/events", None),
+]
+
+
+class UnusedSession:
+    """Unauthorized requests must be turned away before any query"""
+
+    async def execute(self, *args, **kwargs):
+        raise AssertionError("unauthorized request reached the database")
+
+    async def close(self):
+        pass
+
+
+async def unused_session():
+    yield UnusedSession()
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(admin_router, prefix="/orders")
+    app.dependency_overrides[db_settings.get_async_session] = unused_session
+    app.dependency_overrides[db_settings.get_read_session] = unused_session
+
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.mark.parametrize("method, url, body", ADMIN_ROUTES)
+def test_anonymous_request_is_unauthorized(client, method, url, body):
+    response = client.request(method, url, json=body)
+
+    assert response.status_code == 401
+
+
+@pytest.mark.parametrize("method, url, body", ADMIN_ROUTES)
+def test_invalid_token_is_unauthorized(client, method, url, body):
+    response = client.request(method, url, json=body, headers={"Authorization": "Bearer not-a-jwt"})
+
+    assert response.status_code == 401
+
+
+@pytest.mark.parametrize("method, url, body", ADMIN_ROUTES)
+def test_non_admin_is_forbidden(client, monkeypatch, method, url, body):
+    async def get_request_user(*, db_sess, req):
+        return UserReadSchema(id=1, email="user@example.com", first_name="Ivan", last_name="Ivanov", is_admin=False)
+
+    monkeypatch.setattr(depends, "get_request_user", get_request_user)
+
+    response = client.request(method, url, json=body)
+
+    assert response.status_code == 403
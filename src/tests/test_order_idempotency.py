@@ -0,0 +1,121 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.dialects import postgresql
+
+from apps.orders import service
+from apps.orders.idempotency import IDEMPOTENCY_KEY_MAX_LENGTH, IDEMPOTENCY_KEY_TTL, claim_idempotency_key, \
+    request_hash
+from apps.orders.schemas import ReadSingleOrderSchema, WriteSingleOrderSchema
+
+
+ORDER = WriteSingleOrderSchema(food_ids=[1], food_size_ids=[10], modifier_option_ids=[], restaurant_id=3)
+STORED = ReadSingleOrderSchema(id=42, status_id=1, restaurant_id=3, is_payed=False, total_sum=2490.0,
+                               food_ids=[1], food_size_ids=[10], modifier_option_ids=[]).model_dump(mode="json")
+
+
+class Result:
+    def __init__(self, scalar=None, row=None):
+        self._scalar, self._row = scalar, row
+
+    def scalar_one_or_none(self):
+        return self._scalar
+
+    def one(self):
+        return self._row
+
+
+class ScriptedSession:
+    """Answers every execute with the next scripted result and records the statements"""
+
+    def __init__(self, *results: Result):
+        self.results = list(results)
+        self.statements = []
+        self.commits = 0
+
+    async def execute(self, stmt, *args, **kwargs):
+        self.statements.append(stmt)
+        return self.results.pop(0)
+
+    async def commit(self):
+        self.commits += 1
+
+    async def rollback(self):
+        pass
+
+
+def claim(db_sess, key="retry-1", data=ORDER):
+    return asyncio.run(claim_idempotency_key(db_sess=db_sess, user_id=7, key=key, data=data))
+
+
+def sql(stmt) -> str:
+    return " ".join(str(stmt.compile(dialect=postgresql.dialect())).split())
+
+
+def test_claim_takes_over_only_expired_keys():
+    db_sess = ScriptedSession(Result(), Result(scalar=1))
+
+    claim(db_sess)
+
+    cleanup, upsert = map(sql, db_sess.statements)
+    assert cleanup.startswith("DELETE FROM orders.idempotency_key")
+    assert "orders.idempotency_key.key != " in cleanup  # never the key being claimed
+
+    # a live key conflicts and returns no row; an expired one is reset and claimed like a new one
+    assert "ON CONFLICT ON CONSTRAINT uq_idempotency_key_user_id_key DO UPDATE SET" in upsert
+    for column in ("request_hash", "order_id", "response", "created_at"):
+        assert f"{column} = " in upsert
+    assert "WHERE orders.idempotency_key.created_at < now() - " in upsert
+    assert upsert.endswith("RETURNING orders.idempotency_key.id")
+    assert IDEMPOTENCY_KEY_TTL in db_sess.statements[1].compile(dialect=postgresql.dialect()).params.values()
+
+
+def test_new_key_is_claimed_by_the_caller():
+    db_sess = ScriptedSession(Result(), Result(scalar=1))
+
+    assert claim(db_sess) is None
+    assert len(db_sess.statements) == 2
+
+
+def test_completed_key_replays_the_stored_response():
+    db_sess = ScriptedSession(Result(), Result(scalar=None), Result(row=(request_hash(ORDER), STORED)))
+
+    assert claim(db_sess) == STORED
+
+
+def test_key_reused_with_another_body_is_rejected():
+    other = ORDER.model_copy(update={"restaurant_id": 4})
+    db_sess = ScriptedSession(Result(), Result(scalar=None), Result(row=(request_hash(ORDER), STORED)))
+
+    with pytest.raises(HTTPException) as e:
+        claim(db_sess, data=other)
+
+    assert e.value.status_code == 422
+
+
+@pytest.mark.parametrize("key", ["", "k" * (IDEMPOTENCY_KEY_MAX_LENGTH + 1)])
+def test_invalid_key_is_rejected_before_any_query(key):
+    db_sess = ScriptedSession()
+
+    with pytest.raises(HTTPException) as e:
+        claim(db_sess, key=key)
+
+    assert e.value.status_code == 400
+    assert db_sess.statements == []
+
+
+def test_replay_does_not_touch_the_order_tables(monkeypatch):
+    async def no_prices(**kwargs):
+        raise AssertionError("a replay must not price the cart")
+
+    monkeypatch.setattr(service.price_index, "get", no_prices)
+    db_sess = ScriptedSession(Result(), Result(scalar=None), Result(row=(request_hash(ORDER), STORED)))
+
+    order, replayed = asyncio.run(service.create_order(db_sess=db_sess, order_data=ORDER, user_id=7,
+                                                       idempotency_key="retry-1"))
+
+    assert replayed
+    assert order == ReadSingleOrderSchema.model_validate(STORED)
+    assert db_sess.commits == 1  # keeps the expired-key cleanup
+    assert all("orders.orders" not in sql(stmt) for stmt in db_sess.statements)
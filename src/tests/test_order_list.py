@@ -0,0 +1,82 @@
+from datetime import datetime
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from apps.orders.routers import admin_router, common_router
+from apps.users.depends import admin_role_required, current_user_required
+from apps.users.schemas import UserReadSchema
+from config import db_settings
+
+
+USER = UserReadSchema(id=7, email="user@example.com", first_name="Ivan", last_name="Ivanov", is_admin=True)
+
+
+class EmptyResult:
+    def scalars(self):
+        return iter(())
+
+
+class RecordingSession:
+    def __init__(self, name: str):
+        self.name = name
+        self.statements = []
+
+    async def execute(self, stmt, *args, **kwargs):
+        self.statements.append(stmt)
+        return EmptyResult()
+
+
+@pytest.fixture
+def sessions():
+    return {"primary": RecordingSession("primary"), "replica": RecordingSession("replica")}
+
+
+@pytest.fixture
+def client(sessions):
+    async def primary_session():
+        yield sessions["primary"]
+
+    async def read_session():
+        yield sessions["replica"]
+
+    app = FastAPI()
+    app.include_router(admin_router, prefix="/orders")
+    app.include_router(common_router, prefix="/orders")
+    app.dependency_overrides[db_settings.get_async_session] = primary_session
+    app.dependency_overrides[db_settings.get_read_session] = read_session
+    app.dependency_overrides[current_user_required] = lambda: USER
+    app.dependency_overrides[admin_role_required] = lambda: USER
+
+    with TestClient(app) as client:
+        yield client
+
+
+def created_at_bounds(stmt) -> list[datetime]:
+    return sorted(value for value in stmt.compile().params.values() if isinstance(value, datetime))
+
+
+def test_my_orders_read_the_primary(client, sessions):
+    response = client.get("/orders")
+
+    assert response.status_code == 200
+    assert len(sessions["primary"].statements) == 1
+    assert sessions["replica"].statements == []
+
+
+@pytest.mark.parametrize("url, session", [("/orders", "primary"), ("/orders/all", "replica")])
+def test_aware_bounds_are_compared_as_naive_utc(client, sessions, url, session):
+    response = client.get(url, params={"created_from": "2025-03-01T05:00:00+05:00", "created_to": "2025-03-02T00:00:00Z"})
+
+    assert response.status_code == 200
+    bounds = created_at_bounds(sessions[session].statements[0])
+    assert bounds == [datetime(2025, 3, 1, 0, 0), datetime(2025, 3, 2, 0, 0)]
+    assert all(bound.tzinfo is None for bound in bounds)
+
+
+def test_naive_bounds_are_kept(client, sessions):
+    response = client.get("/orders/all", params={"created_from": "2025-03-01T05:00:00"})
+
+    assert response.status_code == 200
+    assert created_at_bounds(sessions["replica"].statements[0]) == [datetime(2025, 3, 1, 5, 0)]
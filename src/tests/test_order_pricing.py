@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from apps.food_menu.price_index import MenuPrices
+from apps.orders import service
+from apps.orders.enums import OrderStatusName
+from apps.orders.schemas import WriteSingleOrderSchema
+
+
+# ids have gaps on purpose: the tables are arrays indexed by id
+PRICES = MenuPrices(
+    version=1,
+    food_ids=[1, 2, 5],
+    sizes=[(10, 1, 2490.0), (11, 1, 2990.0), (20, 2, 1500.0), (21, 5, 0.0)],
+    options=[(100, 300.0), (101, 0.0), (102, 150.0)],
+    food_options=[(1, 100), (1, 101), (2, 102)],
+)
+
+
+def cart(food_ids, food_size_ids, modifier_option_ids=()):
+    return WriteSingleOrderSchema(food_ids=list(food_ids), food_size_ids=list(food_size_ids),
+                                  modifier_option_ids=list(modifier_option_ids), restaurant_id=3)
+
+
+def test_lookups_treat_gaps_and_out_of_range_ids_as_missing():
+    assert [PRICES.has_food(food_id) for food_id in (1, 3, 5, 6, -1)] == [True, False, True, False, False]
+    assert [PRICES.food_size_price(size_id) for size_id in (10, 12, 21, 22, -1)] == [2490.0, None, 0.0, None, None]
+    assert [PRICES.food_size_food_id(size_id) for size_id in (20, 15, 99)] == [2, None, None]
+    assert [PRICES.modifier_option_price(option_id) for option_id in (101, 99, 103, -5)] == [0.0, None, None, None]
+    assert PRICES.food_modifier_option_ids(1) == {100, 101}
+    assert PRICES.food_modifier_option_ids(5) == frozenset()
+
+
+def test_repeated_ids_are_priced_as_quantities():
+    quote = service._quote_order(prices=PRICES, order_data=cart([1, 2], [10, 10, 20], [100, 100, 101, 102]))
+
+    assert [(line.kind, line.id, line.food_id, line.quantity, line.unit_price, line.price) for line in quote.lines] == [
+        ("food_size", 10, 1, 2, 2490.0, 4980.0),
+        ("food_size", 20, 2, 1, 1500.0, 1500.0),
+        ("modifier_option", 100, None, 2, 300.0, 600.0),
+        ("modifier_option", 101, None, 1, 0.0, 0.0),
+        ("modifier_option", 102, None, 1, 150.0, 150.0),
+    ]
+    assert quote.total_sum == 7230.0
+
+
+@pytest.mark.parametrize("order_data, detail", [
+    (cart([1, 3], [10]), "food ids [3] are unknown"),
+    (cart([1], [10, 12, 99]), "food_size ids [12, 99] are unknown"),
+    (cart([1], [10, 20]), "food_size ids [20] do not belong to the ordered foods"),
+    (cart([1], [10], [103]), "modifier_option ids [103] are unknown"),
+    (cart([1], [10], [100, 102]), "modifier_option ids [102] are not offered for the ordered foods"),
+])
+def test_invalid_carts_are_rejected(order_data, detail):
+    with pytest.raises(HTTPException) as e:
+        service._quote_order(prices=PRICES, order_data=order_data)
+
+    assert (e.value.status_code, e.value.detail) == (400, detail)
+
+
+class NoWritesSession:
+    async def execute(self, *args, **kwargs):
+        raise AssertionError("pricing must not query the database")
+
+    async def commit(self):
+        raise AssertionError("pricing must not write")
+
+
+@pytest.fixture
+def price_index(monkeypatch):
+    async def get(*, db_sess):
+        return PRICES
+
+    monkeypatch.setattr(service.price_index, "get", get)
+
+
+def test_quote_reads_only_the_price_index(price_index):
+    quote = asyncio.run(service.quote(db_sess=NoWritesSession(), order_data=cart([2], [20], [102])))
+
+    assert quote.total_sum == 1650.0
+
+
+def test_order_creation_shares_the_quote_validation(price_index, monkeypatch):
+    monkeypatch.setattr(service.order_status_registry, "_ids", {status: i for i, status in enumerate(OrderStatusName, 1)})
+
+    with pytest.raises(HTTPException) as e:
+        asyncio.run(service.create_order(db_sess=NoWritesSession(), order_data=cart([1], [20]), user_id=7))
+
+    assert e.value.detail == "food_size ids [20] do not belong to the ordered foods"
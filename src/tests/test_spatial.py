@@ -0,0 +1,120 @@
+import asyncio
+import heapq
+import math
+import random
+from types import SimpleNamespace
+
+import pytest
+
+from apps.restaurant.spatial import EARTH_RADIUS_KM, LEAF_SIZE, RestaurantIndex, SphereKDTree, chord_to_km, \
+    km_to_chord
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(h))
+
+
+def brute_force(points, lat: float, lon: float, k: int, radius_km: float = math.inf) -> list[tuple[float, int]]:
+    distances = ((haversine_km(lat, lon, p_lat, p_lon), i) for i, (p_lat, p_lon) in enumerate(points))
+    return heapq.nsmallest(k, ((km, i) for km, i in distances if km <= radius_km))
+
+
+def assert_same_answer(tree_answer, scan_answer):
+    assert [i for _, i in tree_answer] == [i for _, i in scan_answer]
+    assert all(abs(chord_to_km(chord) - km) < 1e-6 for (chord, _), (km, _) in zip(tree_answer, scan_answer))
+
+
+def random_point(rng: random.Random) -> tuple[float, float]:
+    # uniform on the sphere, not on the lat/lon rectangle
+    return math.degrees(math.asin(rng.uniform(-1, 1))), rng.uniform(-180, 180)
+
+
+def test_matches_brute_force_on_random_points():
+    rng = random.Random(42)
+    points = [random_point(rng) for _ in range(2_000)]
+    tree = SphereKDTree(points)
+
+    for _ in range(100):
+        lat, lon = random_point(rng)
+        assert_same_answer(tree.nearest(lat, lon, k=5), brute_force(points, lat, lon, 5))
+
+
+def test_neighbours_across_the_antimeridian():
+    # a ring of points around the date line, plus distractors further away on the same side
+    points = [(0.0, 179.9), (0.05, -179.8), (0.5, 179.5), (-0.7, -179.4), (0.0, 178.0), (0.0, -178.0)]
+    points += [(lat, lon) for lat in (-10, 10) for lon in range(-170, 171, 20)]
+    tree = SphereKDTree(points)
+
+    for lat, lon in [(0.0, 180.0), (0.0, -180.0), (0.1, 179.99), (-0.1, -179.99)]:
+        answer = tree.nearest(lat, lon, k=4)
+        assert {i for _, i in answer} == {0, 1, 2, 3}
+        assert_same_answer(answer, brute_force(points, lat, lon, 4))
+
+
+@pytest.mark.parametrize("pole", [90.0, -90.0])
+def test_neighbours_around_the_poles(pole):
+    # every longitude meets at the pole: points 180° apart in longitude are neighbours there
+    rng = random.Random(7)
+    points = [(math.copysign(89.0 + rng.random(), pole), rng.uniform(-180, 180)) for _ in range(50)]
+    points += [random_point(rng) for _ in range(200)]
+    tree = SphereKDTree(points)
+
+    for lat, lon in [(pole, 0.0), (pole, 123.0), (math.copysign(89.9, pole), -179.0)]:
+        answer = tree.nearest(lat, lon, k=10)
+        assert all(i < 50 for _, i in answer)
+        assert_same_answer(answer, brute_force(points, lat, lon, 10))
+
+
+@pytest.mark.parametrize("count", [0, 1, LEAF_SIZE, 3 * LEAF_SIZE])
+def test_k_larger_than_the_number_of_points_returns_them_all(count):
+    rng = random.Random(count)
+    points = [random_point(rng) for _ in range(count)]
+    tree = SphereKDTree(points)
+
+    answer = tree.nearest(55.75, 37.62, k=count + 5)
+
+    assert sorted(i for _, i in answer) == list(range(count))
+    assert_same_answer(answer, brute_force(points, 55.75, 37.62, count + 5))
+
+
+def test_k_zero_returns_nothing():
+    assert SphereKDTree([(0.0, 0.0)]).nearest(0.0, 0.0, k=0) == []
+
+
+@pytest.mark.parametrize("radius_km", [0.5, 50.0, 500.0, 5_000.0, 25_000.0])
+def test_radius_cutoff_matches_brute_force(radius_km):
+    rng = random.Random(3)
+    # a dense city around Moscow plus the rest of the world, so every radius cuts somewhere
+    points = [(55.75 + rng.uniform(-1, 1), 37.62 + rng.uniform(-2, 2)) for _ in range(300)]
+    points += [random_point(rng) for _ in range(700)]
+    tree = SphereKDTree(points)
+
+    for lat, lon, k in [(55.75, 37.62, 1_000), (55.75, 37.62, 3), (-33.87, 151.21, 1_000)]:
+        answer = tree.nearest(lat, lon, k=k, max_chord=km_to_chord(radius_km))
+        assert_same_answer(answer, brute_force(points, lat, lon, k, radius_km))
+        assert all(chord_to_km(chord) <= radius_km + 1e-6 for chord, _ in answer)
+
+
+class RowsSession:
+    def __init__(self, points):
+        self.rows = [SimpleNamespace(_asdict=lambda i=i, lat=lat, lon=lon: {"id": i, "name": f"r{i}", "lat": lat,
+                                                                            "lon": lon})
+                     for i, (lat, lon) in enumerate(points)]
+
+    async def execute(self, stmt, *args, **kwargs):
+        return iter(self.rows)
+
+
+def test_restaurant_index_applies_radius_km():
+    rng = random.Random(11)
+    points = [(55.75 + rng.uniform(-1, 1), 37.62 + rng.uniform(-2, 2)) for _ in range(200)]
+
+    restaurants = asyncio.run(RestaurantIndex().nearest(db_sess=RowsSession(points), lat=55.75, lon=37.62, k=200,
+                                                        radius_km=30.0))
+
+    expected = brute_force(points, 55.75, 37.62, 200, 30.0)
+    assert 0 < len(restaurants) < 200
+    assert [r["id"] for r in restaurants] == [i for _, i in expected]
+    assert all(abs(r["distance_km"] - km) < 1e-6 for r, (km, _) in zip(restaurants, expected))